@@ -1,11 +1,18 @@
 """
 Multi-Agent System for Databricks Genie
+
+Agents are imported on first attribute access, so `import agents` (or any
+submodule) does not pull in the coordinator and its dependencies.
 """
 
-from agents.base_agent import BaseGenieAgent
-from agents.sales_agent import SalesAgent
-from agents.customer_agent import CustomerAgent
-from agents.coordinator import CoordinatorAgent
+import importlib
+
+_EXPORTS = {
+    "BaseGenieAgent": "agents.base_agent",
+    "SalesAgent": "agents.sales_agent",
+    "CustomerAgent": "agents.customer_agent",
+    "CoordinatorAgent": "agents.coordinator",
+}
 
 __all__ = [
     "BaseGenieAgent",
@@ -14,3 +21,10 @@ __all__ = [
     "CoordinatorAgent"
 ]
 
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(_EXPORTS[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module 'agents' has no attribute {name!r}")
@@ -1,48 +1,172 @@
 """
 Base class for agents interacting with Databricks Genie workspaces.
+
+Every agent, and the coordinator's fan-out, goes through the same engine:
+the shared GenieClient for the agent's space, i.e. one pooled HTTP session,
+one poll strategy, one result cache and the space's governor and circuit
+breaker. Tune those in one place and both main.py and the UI pick it up.
 """
 
+import json
 from abc import ABC, abstractmethod
 from typing import Dict, Any, Optional
-from databricks.sdk import WorkspaceClient
-from tenacity import retry, stop_after_attempt, wait_exponential
+
 import requests
 
-from config import DATABRICKS_HOST, DATABRICKS_TOKEN, MAX_RETRIES
+from config import MAX_RETRIES, RETRY_DELAY, GENIE_AGENT_DEADLINE
+from agents.conversations import ConversationRegistry
+from agents.genie_client import GenieClient, get_genie_client
+from agents.query_result import ColumnarResult
+
+# Open Genie conversations per chat session, so follow-ups keep the space's context
+conversations = ConversationRegistry()
+
+
+def _is_transient(exc: BaseException) -> bool:
+    """Connection problems and 5xx responses are worth retrying; 4xx, Genie failures and timeouts are not."""
+    if isinstance(exc, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return exc.response.status_code >= 500
+    return False
+
+
+def _conversation_gone(exc: requests.HTTPError) -> bool:
+    """True when a follow-up failed because its conversation no longer exists (404, or a 400 naming it)."""
+    if exc.response is None:
+        return False
+    status = exc.response.status_code
+    return status == 404 or (status == 400 and "conversation" in exc.response.text.lower())
+
+
+_retrying = None
+
+
+def _retry_policy():
+    """tenacity policy for transient Genie errors; tenacity is imported on first use."""
+    global _retrying
+    if _retrying is None:
+        from tenacity import Retrying, retry_if_exception, stop_after_attempt, wait_exponential
+
+        _retrying = Retrying(retry=retry_if_exception(_is_transient), stop=stop_after_attempt(MAX_RETRIES),
+                             wait=wait_exponential(multiplier=1, min=RETRY_DELAY, max=10), reraise=True)
+    # A copy per call, as tenacity's decorator does, keeps concurrent calls' state apart
+    return _retrying.copy()
+
+
+def format_value(value) -> str:
+    """Human-readable cell value: thousands separators, 2 decimals (4 significant digits below 1)."""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return str(value)
+    if isinstance(value, int):
+        return f"{value:,}"
+    if isinstance(value, float):
+        return f"{value:.4g}" if abs(value) < 1 else f"{value:,.2f}"
+    return str(value)
+
+
+def format_result(result, max_rows: int = 20) -> str:
+    """Render a Genie result as readable text (a markdown table for query results)."""
+    if isinstance(result, ColumnarResult):
+        if not result.columns:
+            return "(no columns returned)"
+        lines = [
+            "| " + " | ".join(result.columns) + " |",
+            "|" + "---|" * len(result.columns),
+        ]
+        for i, row in enumerate(result.rows()):
+            if i >= max_rows:
+                break
+            lines.append("| " + " | ".join(format_value(v) for v in row) + " |")
+        if result.total_row_count > max_rows or result.truncated:
+            lines.append(f"\n_Showing {min(max_rows, result.row_count)} of {result.total_row_count} rows._")
+        return "\n".join(lines)
+    if isinstance(result, dict) and isinstance(result.get("message"), dict):
+        content = result["message"].get("content")
+        if content:
+            return str(content)
+    return json.dumps(result, indent=2, default=str)
+
+
+def is_failed(result) -> bool:
+    """True for a per-agent result that is a timeout/error dict rather than data."""
+    return isinstance(result, dict) and result.get("status") in ("timeout", "error")
 
 
 class BaseGenieAgent(ABC):
     """Abstract base class for Databricks Genie agents."""
 
-    def __init__(self, workspace_client: Optional[WorkspaceClient] = None):
+    agent_type = "Genie Agent"
+    deadline = GENIE_AGENT_DEADLINE
+
+    def __init__(self, genie: Optional[GenieClient] = None, deadline: Optional[float] = None):
         """
-        Initialize the agent with a Databricks workspace client.
-        If none provided, a new client is created using environment configuration.
+        Attach the agent to its space's shared GenieClient.
+        Pass `genie` to use a specific client (e.g. in tests or benchmarks).
         """
-        self.client = workspace_client or WorkspaceClient(
-            host=DATABRICKS_HOST,
-            token=DATABRICKS_TOKEN
-        )
+        self.genie = genie or get_genie_client(self.get_genie_space_id())
+        if deadline is not None:
+            self.deadline = deadline
 
     @abstractmethod
     def get_genie_space_id(self) -> str:
         """Return the Genie space ID for this specific agent."""
         raise NotImplementedError("Each agent must define its Genie space ID.")
 
-    @retry(stop=stop_after_attempt(MAX_RETRIES),
-           wait=wait_exponential(multiplier=1, min=2, max=10))
-    def query_genie(self, query: str) -> Dict[str, Any]:
+    @property
+    def space_id(self) -> str:
+        return self.genie.space_id
+
+    def ask(self, question: str, session_id: str = None, timeout_seconds: float = None,
+            held: dict = None, **kwargs):
+        """
+        Ask the Genie and return its raw result (a ColumnarResult for query results).
+
+        With a session_id the question continues that session's conversation with
+        this space. A new conversation is registered for the session, or with
+        `held` stored in held[space_id] for the caller to register if it keeps
+        the answer. Connection errors and 5xx responses are retried with backoff.
+        """
+        return _retry_policy()(self._ask, question, session_id, timeout_seconds, held, **kwargs)
+
+    def _ask(self, question, session_id, timeout_seconds, held=None, **kwargs):
+        timeout_seconds = timeout_seconds or self.deadline
+        if session_id is None:
+            return self.genie.query(question, timeout_seconds=timeout_seconds, **kwargs)
+
+        # keep=True: the session continues this conversation, so even a first turn starts a real one
+        conversation_id = conversations.get(session_id, self.space_id)
+        try:
+            conversation_id, result = self.genie.converse(question, conversation_id, keep=True,
+                                                          timeout_seconds=timeout_seconds, **kwargs)
+        except requests.HTTPError as e:
+            if conversation_id is None or not _conversation_gone(e):
+                raise
+            # The conversation is gone on the Genie side; start a fresh one
+            conversations.drop(session_id, self.space_id)
+            conversation_id, result = self.genie.converse(question, None, keep=True,
+                                                          timeout_seconds=timeout_seconds, **kwargs)
+        if conversation_id is not None:
+            if held is not None:
+                held[self.space_id] = conversation_id
+            else:
+                conversations.put(session_id, self.space_id, conversation_id)
+        return result
+
+    def query_genie(self, query: str, session_id: str = None) -> Dict[str, Any]:
         """
         Send a natural language query to the Databricks Genie workspace.
-        Handles retries on transient errors.
+        Errors are returned as a structured response instead of raised.
         """
         try:
-            space_id = self.get_genie_space_id()
-            response = self._execute_genie_query(query, space_id)
+            result = self.ask(query, session_id)
             return {
                 "query": query,
-                "response": response,
-                "space_id": space_id,
+                "response": format_result(result),
+                "result": result,
+                "space_id": self.space_id,
                 "status": "success"
             }
 
@@ -50,50 +174,27 @@ class BaseGenieAgent(ABC):
             return {
                 "query": query,
                 "response": f"Error: {e}",
-                "space_id": getattr(self, "get_genie_space_id", lambda: "unknown")(),
+                "space_id": self.space_id,
                 "status": "error",
                 "error": str(e)
             }
 
-    def _execute_genie_query(self, query: str, space_id: str) -> str:
-        """
-        Execute the given query using the Genie REST API.
-        Falls back to a simulated response if the API is unavailable.
-        """
-        url = f"{DATABRICKS_HOST}/api/2.0/genie/spaces/{space_id}/chat"
-        headers = {
-            "Authorization": f"Bearer {DATABRICKS_TOKEN}",
-            "Content-Type": "application/json"
-        }
-        payload = {"message": query, "stream": False}
-
-        try:
-            response = requests.post(url, headers=headers, json=payload, timeout=30)
-
-            if response.status_code == 200:
-                data = response.json()
-                if isinstance(data, dict):
-                    return data.get("response") or data.get("message") or str(data)
-                return str(data)
-
-            return (
-                f"Query executed for '{query}' in space {space_id}. "
-                f"API returned status {response.status_code}. "
-                f"Check Genie API configuration."
-            )
-
-        except requests.exceptions.RequestException as e:
-            return (
-                f"Simulated Genie response for '{query}' (space {space_id}). "
-                f"API error: {e}"
-            )
-
-        except Exception as e:
-            return (
-                f"Error executing Genie query: {e}. "
-                f"Query: '{query}' in space {space_id}."
-            )
-
     def process_query(self, query: str) -> Dict[str, Any]:
         """Wrapper for querying Genie and returning structured results."""
         return self.query_genie(query)
+
+    def execute(self, query: str, session_id: str = None) -> Dict[str, Any]:
+        """Answer a query and tag the response with the agent type (used by main.py)."""
+        return dict(self.query_genie(query, session_id), agent_type=self.agent_type)
+
+
+class SpaceAgent(BaseGenieAgent):
+    """Agent for any space in the Genie space registry (see agents.spaces)."""
+
+    def __init__(self, space, genie: Optional[GenieClient] = None):
+        self.space = space
+        self.agent_type = f"{space.name.capitalize()} Agent"
+        super().__init__(genie, deadline=space.deadline)
+
+    def get_genie_space_id(self) -> str:
+        return self.space.space_id
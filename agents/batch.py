@@ -0,0 +1,106 @@
+"""
+Batch runner: push a file of questions through the coordinator.
+
+Questions are read from JSONL ({"id": ..., "question": ...}) or CSV (columns
+`id`, `question`). Results are appended to an output JSONL file as each
+question finishes, so an interrupted run can be resumed: ids that already
+have a successful line in the output file are skipped. Questions answered
+only in part ("partial") or not at all ("error") are retried by the next run.
+"""
+import csv
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from agents.coordinator import CoordinatorAgent, GENIE_AGENTS
+from agents.rate_limit import configure
+
+
+def load_questions(path: str) -> list:
+    """Return [{"id": str, "question": str}, ...] from a JSONL or CSV file."""
+    questions = []
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".csv"):
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for i, row in enumerate(rows, 1):
+            question = (row.get("question") or "").strip()
+            if question:
+                questions.append({"id": str(row.get("id") or i), "question": question})
+    return questions
+
+
+def completed_ids(output_path: str) -> set:
+    """Ids that already have a successful result in the output file."""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash can leave a truncated last line; that question is re-run
+                continue
+            if record.get("status") == "ok":
+                done.add(str(record.get("id")))
+    return done
+
+
+def _ends_mid_line(path: str) -> bool:
+    """True if the file's last line has no newline, e.g. a write cut short by a crash."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return False
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) != b"\n"
+
+
+def _answer(item: dict) -> dict:
+    start = time.time()
+    record = {"id": item["id"], "question": item["question"]}
+    # Status comes from the coordinator's done event: an answer such as
+    # "No Genie returned data" is returned normally but is not a success
+    response = CoordinatorAgent().coordinate_query(item["question"])
+    record["answer"] = response["response"]
+    record["status"] = "ok" if response["status"] == "success" else response["status"]
+    if response.get("error"):
+        record["error"] = response["error"]
+    record["elapsed"] = round(time.time() - start, 3)
+    return record
+
+
+def run_batch(input_path: str, output_path: str, concurrency: int = 4, rate_limits: dict = None) -> dict:
+    """
+    Answer every not-yet-completed question in `input_path`, at most
+    `concurrency` at a time, appending one JSON line per result to `output_path`.
+
+    `rate_limits` maps an agent name ("sales", "customer") to the maximum
+    number of Genie questions per minute for that space.
+    """
+    for agent, per_minute in (rate_limits or {}).items():
+        if agent not in GENIE_AGENTS:
+            raise ValueError(f"Unknown agent '{agent}' (expected one of: {', '.join(GENIE_AGENTS)})")
+        configure(GENIE_AGENTS[agent].space_id, per_minute=per_minute)
+
+    questions = load_questions(input_path)
+    done = completed_ids(output_path)
+    todo = [q for q in questions if q["id"] not in done]
+    print(f"Batch: {len(questions)} questions, {len(done)} already done, {len(todo)} to run")
+
+    summary = {"total": len(questions), "skipped": len(questions) - len(todo), "ok": 0, "partial": 0, "error": 0}
+    with open(output_path, "a", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch") as pool:
+        if _ends_mid_line(output_path):
+            # Start on a fresh line so the first new result is not glued to the broken one
+            out.write("\n")
+        futures = [pool.submit(_answer, item) for item in todo]
+        for n, future in enumerate(as_completed(futures), 1):
+            record = future.result()
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            summary[record["status"]] += 1
+            print(f"[{n}/{len(todo)}] {record['id']}: {record['status']} ({record['elapsed']}s)")
+    return summary
@@ -0,0 +1,70 @@
+"""
+Per-session registry of open Genie conversations.
+
+Follow-up questions in the same chat session are sent into the session's
+existing Genie conversation (send_message) so the space keeps its context.
+Entries expire after CONVERSATION_IDLE_TTL seconds without use and the
+registry holds at most CONVERSATION_MAX_ENTRIES (session, space) pairs,
+evicting the least recently used, so long-running servers do not leak.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from config import CONVERSATION_IDLE_TTL, CONVERSATION_MAX_ENTRIES
+
+
+class ConversationRegistry:
+    """LRU map of (session_id, space_id) -> Genie conversation id."""
+
+    def __init__(self, max_entries=CONVERSATION_MAX_ENTRIES, idle_ttl=CONVERSATION_IDLE_TTL):
+        self.max_entries = max_entries
+        self.idle_ttl = idle_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"reused": 0, "started": 0, "expired": 0, "evicted": 0}
+
+    def get(self, session_id: str, space_id: str):
+        """Return the session's live conversation id for the space, or None."""
+        key = (session_id, space_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            conversation_id, last_used = entry
+            if time.time() - last_used > self.idle_ttl:
+                del self._entries[key]
+                self._stats["expired"] += 1
+                return None
+            self._entries[key] = (conversation_id, time.time())
+            self._entries.move_to_end(key)
+            self._stats["reused"] += 1
+            return conversation_id
+
+    def put(self, session_id: str, space_id: str, conversation_id: str):
+        key = (session_id, space_id)
+        with self._lock:
+            if key not in self._entries:
+                self._stats["started"] += 1
+            self._entries[key] = (conversation_id, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evicted"] += 1
+
+    def has_session(self, session_id: str) -> bool:
+        """Whether the session has any live conversation (i.e. its next question may be a follow-up)."""
+        now = time.time()
+        with self._lock:
+            return any(k[0] == session_id and now - last_used <= self.idle_ttl
+                       for k, (_, last_used) in self._entries.items())
+
+    def drop(self, session_id: str, space_id: str = None):
+        """Forget one space's conversation for a session, or all of them."""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == session_id and space_id in (None, k[1])]:
+                del self._entries[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, active=len(self._entries))
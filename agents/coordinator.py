@@ -1,64 +1,271 @@
 # coordinator.py
-from openai import OpenAI
-from agents.sales_genie_client import query_sales_genie
-from agents.customer_genie_client import query_customer_genie
+from agents.base_agent import SpaceAgent, conversations, format_result, is_failed
+from agents.spaces import SPACES
+from agents.router import route, likely_agents
+from agents.rate_limit import get_governor
+from agents.resilience import get_breaker
+from agents.tracing import span, annotate, submit_in_context
+from agents.templates import choose_summary, record_summary, render_answer
+from agents.warmup import DEMO_QUESTIONS, get_warm_store, staleness_note
+from agents.local_store import get_local_store
+from agents.result_cache import normalize_question
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 import json
+import threading
+import time
 
 # --- CONFIGURATION ---
-from config import OPENAI_API_KEY, LLM_MODEL, validate_config
+from config import (
+    OPENAI_API_KEY, validate_config, GENIE_MAX_WORKERS, SPECULATIVE_DISPATCH,
+    UI_MAX_CONCURRENT_QUESTIONS, SERVICE_WORKERS,
+)
 
-# Initialize OpenAI client using config value
-validate_config(allow_empty_openai=False)
-client = OpenAI(api_key=OPENAI_API_KEY)
+# The OpenAI client is created on first use: importing openai dominates cold
+# start, and commands that never reach the LLM (precomputed answers, --help)
+# should not pay for it or fail config validation at import time.
+_client = None
+_client_lock = threading.Lock()
 
 
-def coordinator(user_query: str):
+def get_openai_client():
+    """Return the shared OpenAI client, validating config on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            from openai import OpenAI
+
+            validate_config(allow_empty_openai=False)
+            _client = OpenAI(api_key=OPENAI_API_KEY)
+        return _client
+
+
+# Genie calls spend most of their time blocked in poll_for_result, so a shared
+# thread pool lets every routed space run at once. The pool is deliberately not
+# used as a context manager: a space that misses its deadline must not block
+# the coordinator on shutdown.
+# It has a thread for every registered space per question the UI or the service
+# can run at once, so a slow space cannot occupy the threads other spaces need.
+# A call still queued for a thread when its deadline passes times out (see
+# _Deadline), so queueing is never unbounded.
+_executor = ThreadPoolExecutor(
+    max_workers=max(GENIE_MAX_WORKERS, len(SPACES) * max(UI_MAX_CONCURRENT_QUESTIONS, SERVICE_WORKERS)),
+    thread_name_prefix="genie")
+
+# One agent per registered space, on the same Genie engine main.py's agents use
+GENIE_AGENTS = {name: SpaceAgent(space) for name, space in SPACES.items()}
+
+
+class _Deadline:
+    """An agent's deadline, counted from when a worker thread starts its call.
+
+    Short waits for a pool thread do not eat into the agent's time; a call
+    that is still queued after the full deadline times out all the same.
     """
-    Decides which Genie(s) to call (sales/customer), fetches their data,
-    and then uses OpenAI to produce a neat, user-readable final answer.
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.submitted_at = time.monotonic()
+        self.started_at = None
+
+    def start(self):
+        self.started_at = time.monotonic()
+
+    def at(self) -> float:
+        """Monotonic deadline: start + seconds once running, submit + seconds while queued."""
+        return (self.started_at if self.started_at is not None else self.submitted_at) + self.seconds
+
+
+def _dispatch(agent: str, question: str, session_id: str = None, held: dict = None):
+    """Start one agent's Genie call; returns (future, deadline, stop_event).
+
+    `held` is passed to BaseGenieAgent.ask to hold back a new conversation
+    instead of registering it for the session.
     """
+    genie_agent = GENIE_AGENTS[agent]
+    print(f"➡️ Routing to {agent.capitalize()} Genie...")
+    stop = threading.Event()
+    deadline = _Deadline(genie_agent.deadline)
 
-    # Step 1: Decide routing (Sales / Customer / Both)
-    system_prompt = """You are a smart coordinator between two Databricks Genies:
-    - Sales Genie handles queries about revenue, products, sales data, etc.
-    - Customer Genie handles queries about customers, demographics, and customer data.
-
-    Determine which agent(s) to call. If both are needed, split the query into sub-queries.
-    You must respond strictly in valid JSON format only, like this:
-    {
-        "agents": ["sales", "customer"],
-        "subqueries": {
-            "sales": "Get total revenue by region",
-            "customer": "Get number of customers by region"
-        }
-    }
+    def run():
+        deadline.start()
+        return genie_agent.ask(question, session_id, held=held, stop_event=stop)
+
+    future = submit_in_context(_executor, run)
+    return future, deadline, stop
+
+
+def iter_fan_out(subqueries: dict, session_id: str = None, started: dict = None):
     """
+    Dispatch every routed sub-query at once and yield (agent, result) pairs
+    as each agent finishes.
+
+    Each agent is waited on until its own deadline (measured from when its
+    call starts on a pool thread, or from dispatch if it never gets one). Agents that fail or miss their deadline
+    are yielded as error entries so the caller can still use whatever data
+    did arrive. With a session_id, each Genie continues that session's
+    conversation (see BaseGenieAgent.ask). Calls already in `started`
+    (agent -> _dispatch() tuple, e.g. speculative ones) are reused instead
+    of being asked again. Closing the generator early stops every call still pending.
+    """
+    pending = {}
+    for agent, question in subqueries.items():
+        future, deadline, stop = (started or {}).get(agent) or _dispatch(agent, question, session_id)
+        pending[future] = (agent, deadline, stop)
+
+    try:
+        while pending:
+            done, _ = wait(pending, timeout=max(0.0, min(d.at() for _, d, _ in pending.values()) - time.monotonic()),
+                           return_when=FIRST_COMPLETED)
+            for future in done:
+                agent, _, _ = pending.pop(future)
+                try:
+                    yield agent, future.result()
+                except Exception as e:
+                    yield agent, {"status": "error", "error": str(e)}
+
+            now = time.monotonic()
+            for future, (agent, deadline, stop) in list(pending.items()):
+                if now >= deadline.at():
+                    # Wake the poll loop so the worker thread is freed right away (or drop the queued call)
+                    stop.set()
+                    future.cancel()
+                    del pending[future]
+                    # The poll's own timeout never fires for a space that hangs until the
+                    # deadline, so the miss is counted against its circuit here. A call that
+                    # never left the local queue says nothing about the space.
+                    if deadline.started_at is not None:
+                        get_breaker(GENIE_AGENTS[agent].space_id).record(failed=True, latency=deadline.seconds)
+                    yield agent, {"status": "timeout",
+                                  "error": f"{agent} Genie did not answer within {deadline.seconds:.0f}s"}
+    finally:
+        for future, (_, _, stop) in pending.items():
+            stop.set()
+            future.cancel()
+
+
+def fan_out(subqueries: dict, session_id: str = None) -> dict:
+    """Run every routed sub-query concurrently and return results per agent."""
+    return dict(iter_fan_out(subqueries, session_id))
+
+
+# --- SPECULATIVE DISPATCH ---
+_spec_lock = threading.Lock()
+_spec_stats = {"questions": 0, "dispatched": 0, "kept": 0, "discarded": 0, "rewritten": 0, "not_predicted": 0,
+               "saved_s": 0.0}
+
+
+class _Speculation:
+    """Genie calls started on the raw question while the routing LLM decides."""
+
+    def __init__(self, user_query: str, session_id: str = None):
+        self.user_query = user_query
+        self.session_id = session_id
+        self.calls = {}
+        self.held = {}
+        self.finished = {}
+        self.started_at = None
+        self.routed_at = None
+
+    def start(self):
+        """Called by route() just before the routing LLM: dispatch the likeliest agents."""
+        # A discarded follow-up would still land in the session's Genie conversation
+        if self.session_id is not None and conversations.has_session(self.session_id):
+            return
+        self.started_at = time.monotonic()
+        for agent in likely_agents():
+            if agent in GENIE_AGENTS:
+                # The call's conversation joins the session only if the call is kept
+                self.held[agent] = {}
+                call = _dispatch(agent, self.user_query, self.session_id, held=self.held[agent])
+                call[0].add_done_callback(lambda f, a=agent: self.finished.setdefault(a, time.monotonic()))
+                self.calls[agent] = call
+
+    def resolve(self, subqueries: dict) -> dict:
+        """Keep calls whose agent was routed the very question they were started on; cancel the rest.
+
+        Routing often splits the question into per-agent subqueries; a call
+        started on the raw question does not answer those and is redispatched.
+        Kept calls register their conversation for the session once they finish.
+        """
+        if not self.calls:
+            return {}
+        asked = normalize_question(self.user_query)
+        kept = {a: call for a, call in self.calls.items()
+                if a in subqueries and normalize_question(subqueries[a]) == asked}
+        for agent, (future, _, stop) in self.calls.items():
+            if agent not in kept:
+                stop.set()
+                future.cancel()
+        if self.session_id is not None:
+            for agent, (future, _, _) in kept.items():
+                future.add_done_callback(lambda f, held=self.held[agent]: self._register(held))
+        self.routed_at = time.monotonic()
+        with _spec_lock:
+            _spec_stats["questions"] += 1
+            _spec_stats["dispatched"] += len(self.calls)
+            _spec_stats["kept"] += len(kept)
+            _spec_stats["discarded"] += len(self.calls) - len(kept)
+            _spec_stats["rewritten"] += len([a for a in subqueries if a in self.calls and a not in kept])
+            _spec_stats["not_predicted"] += len([a for a in subqueries if a not in self.calls])
+        return kept
+
+    def _register(self, held: dict):
+        for space_id, conversation_id in held.items():
+            conversations.put(self.session_id, space_id, conversation_id)
+
+    def saved(self, kept) -> float:
+        """Latency saved by overlapping kept calls with routing: min(routing time, call time)."""
+        if not kept:
+            return 0.0
+        routing = self.routed_at - self.started_at
+        now = time.monotonic()
+        saved = max(min(routing, self.finished.get(a, now) - self.started_at) for a in kept)
+        with _spec_lock:
+            _spec_stats["saved_s"] += saved
+        return saved
+
+    def cancel(self):
+        for future, _, stop in self.calls.values():
+            stop.set()
+            future.cancel()
+
 
-    response = client.chat.completions.create(
-        model=LLM_MODEL,
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_query}
-        ],
-        response_format={"type": "json_object"}
-    )
+def speculation_stats() -> dict:
+    """Speculative dispatch counts, hit rate (kept / dispatched) and latency saved."""
+    with _spec_lock:
+        stats = dict(_spec_stats)
+    stats["hit_rate"] = stats["kept"] / stats["dispatched"] if stats["dispatched"] else 0.0
+    stats["avg_saved_s"] = stats["saved_s"] / stats["questions"] if stats["questions"] else 0.0
+    return stats
 
-    routing = json.loads(response.choices[0].message.content)
-    results = {}
 
-    # Step 2: Route to appropriate Genie(s)
-    if "sales" in routing.get("agents", []):
-        print("➡️ Routing to Sales Genie...")
-        results["sales"] = query_sales_genie(routing["subqueries"].get("sales", user_query))
+def runtime_stats() -> dict:
+    """Counters from every layer the coordinator drives, for load-test reports and /healthz."""
+    from agents.genie_client import coalescing_stats, hedging_stats, sql_index_stats
+    from agents.rate_limit import governor_stats
+    from agents.resilience import resilience_stats
+    from agents.router import routing_stats
+    from agents.templates import summary_stats
 
-    if "customer" in routing.get("agents", []):
-        print("➡️ Routing to Customer Genie...")
-        results["customer"] = query_customer_genie(routing["subqueries"].get("customer", user_query))
+    return {
+        "routing": routing_stats(),
+        "speculation": speculation_stats(),
+        "governors": governor_stats(),
+        "coalescing": coalescing_stats(),
+        "resilience": resilience_stats(),
+        "hedging": hedging_stats(),
+        "sql_index": sql_index_stats(),
+        "summary": summary_stats(),
+    }
+
+
+def _consolidation_messages(user_query: str, results: dict) -> list:
+    from agents.digest import build_digest  # pandas; only needed once there is data to summarize
 
-    if not results:
-        return "⚠️ No agents selected — please refine your question."
+    with span("digest") as s:
+        digest = json.dumps(build_digest(results), default=str)
+        s.set(chars=len(digest))
 
-    # Step 3: Always consolidate into a neat final summary
     consolidation_prompt = f"""
     You are a data analysis assistant. Convert the following raw data responses from Databricks Genies
     into a clear, user-readable summary for an executive audience.
@@ -66,20 +273,240 @@ def coordinator(user_query: str):
     USER QUESTION:
     {user_query}
 
-    RAW RESULTS (JSON or text):
-    {json.dumps(results, indent=2)}
+    RESULTS DIGEST (JSON; small tables are given in full, larger ones as column stats, top rows
+    and group totals, and "joined" lines up the agents' group totals on a shared key):
+    {digest}
 
     Write a concise, natural language summary of the findings, highlighting key figures, comparisons,
     and insights. Use bullet points or short paragraphs where appropriate.
+    If a source has status "timeout" or "error", say that its data is unavailable rather than guessing.
+    """
+    return [
+        {"role": "system", "content": "You summarize and explain analytical results in a professional, readable format."},
+        {"role": "user", "content": consolidation_prompt}
+    ]
+
+
+def coordinator_stream(user_query: str, session_id: str = None, use_precomputed: bool = True):
     """
+    Streaming variant of coordinator().
+
+    Pass the chat session's id as session_id to send follow-up questions into
+    the same Genie conversations as earlier turns. Questions kept warm by
+    agents.warmup are answered from the store unless use_precomputed is False.
+    Follow-ups that only filter, sort or join the session's previous results
+    are answered from agents.local_store without calling any Genie.
+
+    Yields progress events as dicts, in order:
+      {"type": "routing", "agents": [...], "path": "cache" | "keywords" | "llm" | "precomputed" | "local"}
+      {"type": "agent_done", "agent": "sales", "status": "ok" | "timeout" | "error"}  (one per agent)
+      {"type": "token", "content": "..."}  (summary text as it is generated)
+      {"type": "done", "answer": "...", "results": {...}, "trace": {...}}
+        (always last; results are the per-agent Genie results, trace is the timing
+        breakdown, answers from Genie carry "summary": "template" | "llm", precomputed
+        answers "precomputed": {refreshed_at, age, stale} and local refinements
+        "local": {agent: sql})
+    """
+    done = None
+    with span("coordinator", question=user_query) as root:
+        events = _precomputed_events(user_query) if use_precomputed else None
+        events = events or (_local_events(user_query, session_id) if session_id else None)
+        generated = None if events else _coordinator_events(user_query, session_id)
+        try:
+            for event in events or generated:
+                if event["type"] == "done":
+                    done = event
+                    break
+                yield event
+        finally:
+            # A consumer that stops early (client disconnect, Streamlit rerun) stops the Genie calls too
+            if generated is not None:
+                generated.close()
+    done["trace"] = root.to_dict()
+    yield done
+
+
+def _precomputed_events(user_query: str):
+    """Events answering from the warm-up store, or None if the question is not warm."""
+    with span("precomputed") as s:
+        entry = get_warm_store().get(user_query)
+        s.set(hit=entry is not None)
+    if entry is None:
+        return None
+    print(f"⚡ Serving precomputed answer ({entry['age'] / 60:.0f} min old)")
+    return [
+        {"type": "routing", "agents": list(entry["results"]), "path": "precomputed"},
+        {"type": "done", "answer": f"{entry['answer']}\n\n_{staleness_note(entry)}_",
+         "results": entry["results"],
+         "precomputed": {k: entry[k] for k in ("refreshed_at", "age", "stale")}},
+    ]
+
+
+def _local_events(user_query: str, session_id: str):
+    """Events answering a refinement of the session's last results locally, or None."""
+    store = get_local_store()
+    refined = store.refine(session_id, user_query) if store is not None else None
+    if refined is None:
+        return None
+    results, queries = refined
+    print(f"🗃️ Refining previous results locally: {', '.join(results)}")
+    store.put_turn(session_id, user_query, results)
+    tables = "\n\n".join(f"**{agent.capitalize()}**\n\n{format_result(result)}" for agent, result in results.items())
+    return [
+        {"type": "routing", "agents": list(results), "path": "local"},
+        {"type": "done", "answer": f"{tables}\n\n_Refined from the previous answer's data, without a new Genie query._",
+         "results": results, "local": queries},
+    ]
+
+
+def _coordinator_events(user_query: str, session_id: str = None):
+    # Step 1: Decide routing (Sales / Customer / Both); in speculative mode the
+    # likeliest Genie(s) start on the raw question while the routing LLM runs
+    speculation = _Speculation(user_query, session_id) if SPECULATIVE_DISPATCH else None
+    with span("route") as s:
+        try:
+            routing, path = route(get_openai_client(), user_query,
+                                  before_llm=speculation.start if speculation else None)
+        except BaseException:
+            if speculation:
+                speculation.cancel()
+            raise
+        s.set(path=path, agents=",".join(routing.get("agents", [])))
+    print(f"🧭 Routing decided via {path}: {', '.join(routing.get('agents', [])) or 'none'}")
+
+    # Step 2: Route to appropriate Genie(s), all at once
+    subqueries = {
+        agent: (routing.get("subqueries") or {}).get(agent, user_query)
+        for agent in routing.get("agents", [])
+        if agent in GENIE_AGENTS
+    }
+    kept = speculation.resolve(subqueries) if speculation else {}
+    if speculation and speculation.calls:
+        s.set(speculated=",".join(speculation.calls), speculation_kept=",".join(kept))
+    fan = iter_fan_out(subqueries, session_id, started=kept)
+    try:
+        yield {"type": "routing", "agents": list(subqueries), "path": path, "speculative": list(kept)}
+        if not subqueries:
+            yield {"type": "done", "answer": "⚠️ No agents selected — please refine your question."}
+            return
+
+        results = {}
+        with span("fan_out", agents=len(subqueries)) as s:
+            for agent, result in fan:
+                results[agent] = result
+                yield {"type": "agent_done", "agent": agent, "status": result["status"] if is_failed(result) else "ok"}
+            if kept:
+                s.set(speculation_saved=round(speculation.saved(kept), 3))
+    finally:
+        # If the consumer goes away first, stop the calls still pending; kept speculative
+        # calls are stopped too in case it left before the fan-out began
+        fan.close()
+        if speculation is not None:
+            speculation.cancel()
+
+    # Keep this turn's rows locally so refinements of it skip Genie
+    store = get_local_store() if session_id else None
+    if store is not None:
+        store.put_turn(session_id, user_query, results, {a: GENIE_AGENTS[a].space_id for a in results})
+
+    if all(is_failed(r) for r in results.values()):
+        errors = "; ".join(r["error"] for r in results.values())
+        yield {"type": "done", "answer": f"❌ No Genie returned data: {errors}"}
+        return
+
+    # Step 3: A small answer from one space is rendered as is; anything that needs
+    # reconciling is consolidated into a summary by the LLM, streamed token by token
+    mode, reason = choose_summary(results)
+    record_summary(mode, reason)
+    annotate(summary=mode, summary_reason=reason)
+    if mode == "template":
+        print(f"📝 Rendering answer from template ({reason})")
+        yield {"type": "done", "answer": render_answer(results), "results": results, "summary": mode}
+        return
+
+    messages = _consolidation_messages(user_query, results)
+    parts = []
+    with span("llm.consolidation", model="gpt-4o-mini") as s, get_governor("llm:gpt-4o-mini").slot() as waited:
+        s.set(queue_wait=round(waited, 3))
+        stream = get_openai_client().chat.completions.create(
+            model="gpt-4o-mini",
+            messages=messages,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        for chunk in stream:
+            if getattr(chunk, "usage", None) is not None:
+                s.set(prompt_tokens=chunk.usage.prompt_tokens, completion_tokens=chunk.usage.completion_tokens)
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                if not parts:
+                    s.set(first_token=round(time.time() - s.start, 3))
+                parts.append(delta)
+                yield {"type": "token", "content": delta}
+
+    yield {"type": "done", "answer": "".join(parts).strip(), "results": results, "summary": mode}
+
+
+def coordinator(user_query: str, session_id: str = None):
+    """
+    Decides which Genie(s) to call (sales/customer), fetches their data,
+    and then uses OpenAI to produce a neat, user-readable final answer.
+    """
+    for event in coordinator_stream(user_query, session_id):
+        if event["type"] == "done":
+            return event["answer"]
+
+
+class CoordinatorAgent:
+    """Object interface over coordinator_stream(), returning main.py-style response dicts."""
+
+    agent_type = "Coordinator Agent"
+
+    def __init__(self, session_id: str = None):
+        self.session_id = session_id
+
+    def coordinate_query(self, query: str) -> dict:
+        """Route, fan out and consolidate one question."""
+        agents, done = [], {}
+        try:
+            for event in coordinator_stream(query, self.session_id):
+                if event["type"] == "routing":
+                    agents = event["agents"]
+                elif event["type"] == "done":
+                    done = event
+        except Exception as e:
+            return {"agent_type": self.agent_type, "query": query, "status": "error",
+                    "response": f"Error: {e}", "error": str(e)}
+
+        results = done.get("results") or {}
+        failed = [a for a, r in results.items() if is_failed(r)]
+        if not results:
+            status = "error"
+        elif failed:
+            status = "partial"
+        else:
+            status = "success"
+        response = {"agent_type": self.agent_type, "query": query, "status": status,
+                    "response": done.get("answer", ""), "agents": agents}
+        if "precomputed" in done:
+            response["precomputed"] = done["precomputed"]
+        if "local" in done:
+            response["local"] = done["local"]
+        if "summary" in done:
+            response["summary"] = done["summary"]
+        return response
+
+    def execute(self, query: str) -> dict:
+        return self.coordinate_query(query)
+
+    # Dashboard questions; kept precomputed by `python main.py warmup`
+    def analyze_revenue_vs_churn(self) -> dict:
+        return self.coordinate_query(DEMO_QUESTIONS["analyze_revenue_vs_churn"])
 
-    final_response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": "You summarize and explain analytical results in a professional, readable format."},
-            {"role": "user", "content": consolidation_prompt}
-        ]
-    )
+    def compare_sales_with_segments(self) -> dict:
+        return self.coordinate_query(DEMO_QUESTIONS["compare_sales_with_segments"])
 
-    final_answer = final_response.choices[0].message.content.strip()
-    return final_answer
+    def analyze_premium_customer_categories(self) -> dict:
+        return self.coordinate_query(DEMO_QUESTIONS["analyze_premium_customer_categories"])
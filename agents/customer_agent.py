@@ -0,0 +1,16 @@
+"""
+Agent for the Customer Genie space (customers, segments, churn).
+"""
+
+from agents.base_agent import BaseGenieAgent
+from config import CUSTOMER_GENIE_SPACE_ID, CUSTOMER_GENIE_DEADLINE
+
+
+class CustomerAgent(BaseGenieAgent):
+    """Answers customer and churn questions from the Customer Genie space."""
+
+    agent_type = "Customer Agent"
+    deadline = CUSTOMER_GENIE_DEADLINE
+
+    def get_genie_space_id(self) -> str:
+        return CUSTOMER_GENIE_SPACE_ID
@@ -0,0 +1,132 @@
+"""
+Pre-aggregation of Genie results before the consolidation LLM call.
+
+Instead of sending every row of every result to the LLM, each tabular result
+is reduced locally (pandas) to a digest: column statistics, the top rows by
+the main measure, and group totals per low-cardinality key. When several
+agents return tables sharing a key column (e.g. region), their group totals
+are joined on it. The digest is shrunk until it fits a token budget.
+"""
+import json
+import re
+
+import pandas as pd
+
+from agents.query_result import ColumnarResult
+from config import DIGEST_TOKEN_BUDGET, DIGEST_TOP_K
+
+# Key columns with more distinct values than this are not grouped on
+_MAX_GROUPS = 50
+# Ratio-like measures are averaged rather than summed within a group
+_NON_ADDITIVE = re.compile(r"(rate|ratio|pct|percent|avg|average|mean|share|score)", re.IGNORECASE)
+
+
+def estimate_tokens(obj) -> int:
+    """Rough token count (~4 characters per token) of obj's JSON form."""
+    return len(json.dumps(obj, default=str)) // 4
+
+
+def to_frame(result: ColumnarResult) -> pd.DataFrame:
+    return pd.DataFrame(dict(zip(result.columns, result.data)), columns=result.columns)
+
+
+def _records(df: pd.DataFrame) -> list:
+    return json.loads(df.to_json(orient="values", double_precision=4))
+
+
+def _key_columns(df: pd.DataFrame) -> list:
+    return [c for c in df.select_dtypes(exclude="number").columns
+            if 1 < df[c].nunique(dropna=True) <= _MAX_GROUPS]
+
+
+def _group_totals(df: pd.DataFrame, key: str, measures) -> pd.DataFrame:
+    spec = {m: "mean" if _NON_ADDITIVE.search(str(m)) else "sum" for m in measures}
+    return df.groupby(key).agg(spec)
+
+
+def summarize_frame(df: pd.DataFrame, top_k=DIGEST_TOP_K) -> dict:
+    """Column stats, top-k rows and per-key group totals for one table."""
+    if len(df) <= top_k:
+        return {"columns": list(df.columns), "row_count": len(df), "rows": _records(df)}
+
+    numeric = df.select_dtypes(include="number")
+    digest = {"columns": list(df.columns), "row_count": len(df)}
+    if not numeric.empty:
+        stats = numeric.agg(["sum", "mean", "min", "max"]).round(4)
+        digest["numeric_stats"] = json.loads(stats.to_json())
+        measure = numeric.columns[0]
+        digest[f"top_{top_k}_by_{measure}"] = _records(df.nlargest(top_k, measure))
+    else:
+        digest["sample_rows"] = _records(df.head(top_k))
+
+    categorical = {}
+    for col in df.select_dtypes(exclude="number").columns:
+        counts = df[col].value_counts().head(top_k)
+        categorical[col] = {"distinct": int(df[col].nunique()), "top": json.loads(counts.to_json())}
+    if categorical:
+        digest["categorical"] = categorical
+
+    if not numeric.empty:
+        groups = {}
+        for key in _key_columns(df):
+            totals = _group_totals(df, key, numeric.columns)
+            totals = totals.sort_values(numeric.columns[0], ascending=False).head(top_k)
+            groups[key] = json.loads(totals.round(4).to_json(orient="index"))
+        if groups:
+            digest["group_totals"] = groups
+    return digest
+
+
+def join_frames(frames: dict, top_k=DIGEST_TOP_K):
+    """Join per-agent group totals on the first key column they all share."""
+    if len(frames) < 2:
+        return None
+    shared = set.intersection(*(set(_key_columns(df)) for df in frames.values()))
+    if not shared:
+        return None
+    key = sorted(shared)[0]
+
+    joined = None
+    for agent, df in frames.items():
+        numeric = df.select_dtypes(include="number")
+        if numeric.empty:
+            continue
+        totals = _group_totals(df, key, numeric.columns).add_prefix(f"{agent}_")
+        joined = totals if joined is None else joined.join(totals, how="outer")
+    if joined is None:
+        return None
+    joined = joined.sort_values(joined.columns[0], ascending=False).head(top_k).round(4)
+    return {"key": key, "rows": json.loads(joined.reset_index().to_json(orient="records"))}
+
+
+def build_digest(results: dict, token_budget=DIGEST_TOKEN_BUDGET, top_k=DIGEST_TOP_K) -> dict:
+    """
+    Compact, prompt-ready view of all agent results.
+
+    Tabular results are summarized with summarize_frame(); other payloads
+    (text answers, errors) pass through. top_k is halved until the digest
+    fits the token budget; as a last resort long payloads are cut off, but
+    each table's columns and row count are kept.
+    """
+    frames = {agent: to_frame(r) for agent, r in results.items() if isinstance(r, ColumnarResult)}
+
+    while True:
+        digest = {agent: summarize_frame(frames[agent], top_k) if agent in frames else r
+                  for agent, r in results.items()}
+        joined = join_frames(frames, top_k)
+        if joined:
+            digest["joined"] = joined
+        if estimate_tokens(digest) <= token_budget or top_k <= 1:
+            break
+        top_k //= 2
+
+    if estimate_tokens(digest) > token_budget:
+        tables = {agent: {"columns": list(df.columns), "row_count": len(df)} for agent, df in frames.items()}
+        text = json.dumps(digest, default=str)
+        cut = {"tables": tables, "truncated_digest": text[: token_budget * 4]}
+        # Quotes in the cut text are escaped again when the digest is serialized
+        while estimate_tokens(cut) > token_budget and cut["truncated_digest"]:
+            over = (estimate_tokens(cut) - token_budget + 1) * 4
+            cut["truncated_digest"] = cut["truncated_digest"][:-over]
+        return cut
+    return digest
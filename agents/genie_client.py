@@ -0,0 +1,529 @@
+"""
+Genie REST client shared by every Genie space.
+
+One GenieClient per space ID; all clients share a single pooled
+requests.Session so start-conversation, poll and query-result calls reuse
+keep-alive connections to the workspace instead of opening a new TCP+TLS
+connection per request.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# --- CONFIGURATION ---
+from config import (
+    DATABRICKS_HOST, DATABRICKS_TOKEN, GENIE_POOL_SIZE, MAX_RETRIES, RETRY_DELAY, GENIE_HEDGE_ENABLED,
+    TIMEOUT, CONNECT_TIMEOUT,
+)
+from agents.polling import PollSchedule, PhaseTimer
+from agents.query_result import ColumnarResult, encode_result, decode_result
+from agents.rate_limit import get_governor, parse_retry_after
+from agents.resilience import CircuitOpenError, get_breaker, get_latency_tracker
+from agents.result_cache import get_result_cache, normalize_question
+from agents.singleflight import SingleFlight
+from agents.sql_exec import get_sql_index, get_sql_executor
+from agents.tracing import span, current_span, annotate, submit_in_context
+
+
+HTTP_TIMEOUT = (CONNECT_TIMEOUT, TIMEOUT)
+
+
+# --- UTILITY ---
+def _normalize_instance(instance: str) -> str:
+    """Normalize the workspace instance to include a scheme and no trailing slash.
+
+    Accepts either 'dbc-...cloud.databricks.com' or 'https://dbc-...'.
+    Returns a string like 'https://dbc-...'.
+    """
+    if not instance:
+        raise ValueError("workspace_instance must be set to your Databricks workspace host")
+    instance = instance.strip()
+    if instance.startswith("http://") or instance.startswith("https://"):
+        return instance.rstrip('/')
+    return f"https://{instance.rstrip('/')}"
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide pooled session used by every GenieClient.
+
+    The pool holds at most GENIE_POOL_SIZE connections per host and blocks
+    callers beyond that, so many concurrent conversations share a bounded
+    set of keep-alive connections.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=GENIE_POOL_SIZE, pool_block=True)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def governed_request(session: requests.Session, governor, method: str, url: str, **kwargs) -> requests.Response:
+    """Send a workspace API request, counting calls and bytes on the current span.
+
+    429 responses are retried up to MAX_RETRIES times after the Retry-After
+    delay, during which `governor` holds back every other caller too.
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        governor.wait_if_paused()
+        resp = session.request(method, url, timeout=HTTP_TIMEOUT, **kwargs)
+        s = current_span()
+        if s is not None:
+            s.add(api_calls=1, response_bytes=len(resp.content))
+        if resp.status_code != 429 or attempt == MAX_RETRIES:
+            break
+        governor.throttled(parse_retry_after(resp.headers.get("Retry-After"), RETRY_DELAY * 2 ** attempt))
+        if s is not None:
+            s.add(throttled=1)
+    resp.raise_for_status()
+    return resp
+
+
+# --- GENIE CLIENT ---
+class GenieClient:
+    """Client for a single Genie space."""
+
+    def __init__(self, space_id: str, workspace_instance: str = None, token: str = None,
+                 session: requests.Session = None, cache=None, sql_index=None, sql_executor=None):
+        self.space_id = space_id
+        self.cache = cache
+        self.sql_index = sql_index
+        self.sql_executor = sql_executor
+        self.workspace_instance = workspace_instance or DATABRICKS_HOST
+        self.session = session or get_session()
+        self.headers = {
+            "Authorization": f"Bearer {token or DATABRICKS_TOKEN}",
+            "Content-Type": "application/json"
+        }
+
+    def _space_url(self) -> str:
+        base = _normalize_instance(self.workspace_instance)
+        return f"{base}/api/2.0/genie/spaces/{self.space_id}"
+
+    def _message_url(self, conversation_id: str, message_id: str) -> str:
+        return f"{self._space_url()}/conversations/{conversation_id}/messages/{message_id}"
+
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        return governed_request(self.session, get_governor(self.space_id), method, url,
+                                headers=self.headers, **kwargs)
+
+    def start_conversation(self, question: str):
+        with span("genie.start_conversation", space_id=self.space_id):
+            url = f"{self._space_url()}/start-conversation"
+            data = self._request("POST", url, json={"content": question}).json()
+            return data["conversation"]["id"], data["message"]["id"]
+
+    def send_message(self, conversation_id: str, question: str):
+        with span("genie.send_message", space_id=self.space_id):
+            url = f"{self._space_url()}/conversations/{conversation_id}/messages"
+            return self._request("POST", url, json={"content": question}).json()["message"]["id"]
+
+    def poll_for_result(self, conversation_id: str, message_id: str, timeout_seconds=600,
+                        poll_interval=None, timings: dict = None, stop_event: threading.Event = None):
+        """Poll a message until it completes and return its result.
+
+        Uses the adaptive PollSchedule unless a fixed poll_interval is given.
+        If `timings` is passed it is filled with the poll count, seconds spent
+        in each message status and the total wait. Setting `stop_event`
+        interrupts the wait immediately and raises CancelledError.
+        """
+        url = self._message_url(conversation_id, message_id)
+        schedule = PollSchedule()
+        timer = PhaseTimer(timings)
+        start_time = time.time()
+        with span("genie.poll", space_id=self.space_id) as s:
+            try:
+                while True:
+                    msg = self._request("GET", url).json()
+                    status = msg.get("status")
+                    timer.observe(status)
+
+                    if status == "COMPLETED":
+                        break
+                    elif status in ("FAILED", "CANCELLED"):
+                        raise RuntimeError(f"Message status: {status}")
+
+                    remaining = timeout_seconds - (time.time() - start_time)
+                    if remaining <= 0:
+                        raise TimeoutError("Timed out waiting for Genie result")
+
+                    delay = poll_interval if poll_interval is not None else schedule.next_delay(status)
+                    delay = min(delay, remaining)
+                    if stop_event is not None:
+                        if stop_event.wait(delay):
+                            raise CancelledError("Polling cancelled")
+                    else:
+                        time.sleep(delay)
+            finally:
+                timer.timings["total"] = time.time() - start_time
+                s.set(polls=timer.timings["polls"],
+                      phases={k: round(v, 3) for k, v in timer.timings["phases"].items()})
+
+        return self._completed_result(conversation_id, message_id, msg)
+
+    def _completed_result(self, conversation_id: str, message_id: str, msg: dict):
+        attachments = msg.get("attachments", [])
+        if not attachments:
+            # Some Genie responses include results inline instead of
+            # attachments — return the message payload for caller to
+            # interpret.
+            if "result" in msg:
+                return msg["result"]
+            return {"message": msg}
+
+        attachment_id = _find_attachment_id(attachments)
+        if not attachment_id:
+            # Attachment present but no id found — return attachments for
+            # debugging / manual inspection rather than crashing.
+            return {"attachments": attachments, "message": msg}
+
+        result_url = (
+            f"{self._message_url(conversation_id, message_id)}"
+            f"/attachments/{attachment_id}/query-result"
+        )
+        result = self._fetch_query_result(result_url)
+        if isinstance(result, ColumnarResult):
+            result.sql = _find_query_sql(attachments)
+        return result
+
+    def _get_json(self, url: str):
+        return self._request("GET", url).json()
+
+    def _fetch_query_result(self, result_url: str):
+        """Fetch a query result as a ColumnarResult, following result chunks.
+
+        Each chunk is converted into the columnar result and discarded before
+        the next one is requested. Fetching stops at RESULT_MAX_ROWS rows.
+        Payloads without a statement response are returned unchanged.
+        """
+        with span("genie.fetch_result", space_id=self.space_id) as s:
+            payload = self._get_json(result_url)
+            statement = payload.get("statement_response") or {}
+            if "manifest" not in statement:
+                return payload
+
+            result = ColumnarResult.from_manifest(statement["manifest"], statement.get("statement_id"))
+            chunk = statement.get("result") or {}
+            del payload, statement
+            base = _normalize_instance(self.workspace_instance)
+            while result.append_rows(chunk.get("data_array") or []):
+                next_link = chunk.get("next_chunk_internal_link")
+                if not next_link:
+                    break
+                chunk = self._get_json(f"{base}{next_link}")
+            s.set(rows=result.row_count, truncated=result.truncated)
+            return result
+
+    def query(self, question: str, timeout_seconds=600, timings: dict = None,
+              stop_event: threading.Event = None):
+        """Start a new conversation for the question and wait for its result.
+
+        Answers are served from / stored in the client's result cache, if any.
+        """
+        return self.converse(question, timeout_seconds=timeout_seconds,
+                             timings=timings, stop_event=stop_event)[1]
+
+    def converse(self, question: str, conversation_id: str = None, timeout_seconds=600,
+                 timings: dict = None, stop_event: threading.Event = None, keep: bool = False):
+        """Ask a question and return (conversation_id, result).
+
+        With a conversation_id the question is sent as a follow-up in that
+        conversation. Follow-ups depend on earlier turns, so they bypass the
+        result cache; a new conversation's question may be answered from it,
+        from an identical question already in flight or from stored SQL, in
+        which case the returned conversation_id is None. Pass keep=True when
+        the caller will continue the conversation: the question then always
+        starts a real one (only an open circuit can still answer without).
+        """
+        follow_up = conversation_id is not None
+        with span("genie.query", space_id=self.space_id, follow_up=follow_up) as s:
+            if not follow_up and not keep and self.cache is not None:
+                cached = self.cache.get(self.space_id, question)
+                s.set(cache_hit=cached is not None)
+                if cached is not None:
+                    return None, decode_result(cached)
+
+            if follow_up:
+                # Follow-ups skip the breaker: the conversation already exists on this space
+                with get_governor(self.space_id).slot(stop_event) as waited:
+                    s.set(queue_wait=round(waited, 3))
+                    msg_id = self.send_message(conversation_id, question)
+                    return conversation_id, self.poll_for_result(
+                        conversation_id, msg_id, timeout_seconds=timeout_seconds,
+                        timings=timings, stop_event=stop_event)
+
+            if keep:
+                return self._ask_genie(question, timeout_seconds, timings, stop_event, s)
+
+            ran = []
+
+            def run():
+                ran.append(True)
+                # Stored SQL runs here, inside the single flight, so identical repeat
+                # questions arriving together run the statement on the warehouse once
+                result = self._run_stored_sql(question, timeout_seconds, stop_event)
+                if result is not None:
+                    if self.cache is not None:
+                        self.cache.set(self.space_id, question, encode_result(result))
+                    return None, result
+                return self._ask_genie(question, timeout_seconds, timings, stop_event, s)
+
+            # Identical questions already in flight for this space share one conversation
+            # (or one stored-SQL statement). Only the caller that actually ran it gets the
+            # conversation id to continue.
+            key = (self.space_id, normalize_question(question))
+            conversation_id, result = _in_flight.do(key, run, stop_event=stop_event)
+            s.set(coalesced=not ran)
+            return (conversation_id if ran else None), result
+
+    def _ask_genie(self, question, timeout_seconds, timings, stop_event, s):
+        """Answer a question in a new Genie conversation, behind the space's circuit breaker.
+
+        With the circuit open a stale cached answer is returned instead, with
+        no conversation id, or CircuitOpenError is raised.
+        """
+        breaker = get_breaker(self.space_id)
+        if not breaker.allow():
+            s.set(circuit="open")
+            stale = self.cache.get_stale(self.space_id, question) if self.cache is not None else None
+            if stale is not None:
+                stored_at, value = stale
+                s.set(stale_age=round(time.time() - stored_at, 1))
+                return None, decode_result(value)
+            raise CircuitOpenError(f"Genie space {self.space_id} is unavailable (circuit open)")
+
+        started = time.monotonic()
+        try:
+            conv_id, result = self._new_conversation(question, timeout_seconds, timings, stop_event)
+        except CancelledError:
+            # Stopped by the caller: no verdict on the space, but a probe must not hold
+            # the half-open slot forever (deadline misses are counted by the coordinator)
+            breaker.release()
+            raise
+        except Exception:
+            breaker.record(failed=True)
+            raise
+        latency = time.monotonic() - started
+        breaker.record(failed=False, latency=latency)
+        get_latency_tracker(self.space_id).record(latency)
+        if self.sql_index is not None and getattr(result, "sql", None):
+            self.sql_index.put(self.space_id, question, result.sql)
+        if self.cache is not None:
+            self.cache.set(self.space_id, question, encode_result(result))
+        return conv_id, result
+
+    def _run_stored_sql(self, question, timeout_seconds, stop_event):
+        """Answer a repeat question by running the SQL Genie generated for it last time.
+
+        Returns None when there is no stored SQL or no executor, or when the
+        SQL fails (it is then dropped from the index and Genie answers instead).
+        """
+        if self.sql_index is None or self.sql_executor is None:
+            return None
+        sql = self.sql_index.get(self.space_id, question)
+        if sql is None:
+            return None
+        with span("sql.direct", space_id=self.space_id) as s:
+            try:
+                result = self.sql_executor.execute(sql, timeout_seconds=timeout_seconds, stop_event=stop_event)
+            except CancelledError:
+                raise
+            except Exception as e:
+                s.set(error=str(e))
+                self.sql_index.count("failed")
+                self.sql_index.discard(self.space_id, question)
+                return None
+        self.sql_index.count("executed")
+        return result
+
+    def _attempt(self, question, timeout_seconds, timings, stop_event):
+        """One start-conversation + poll round trip under the space's governor."""
+        # One rate token per question; the concurrency slot is held until the answer arrives
+        with get_governor(self.space_id).slot(stop_event) as waited:
+            annotate(queue_wait=round(waited, 3))
+            # A hedge or speculative call may have been dropped while it queued
+            if stop_event is not None and stop_event.is_set():
+                raise CancelledError("Stopped before starting a conversation")
+            conv_id, msg_id = self.start_conversation(question)
+            result = self.poll_for_result(conv_id, msg_id, timeout_seconds=timeout_seconds,
+                                          timings=timings, stop_event=stop_event)
+        return conv_id, result
+
+    def _new_conversation(self, question, timeout_seconds, timings, stop_event):
+        """Run a new conversation, hedged with a second attempt once it runs past the space's p95.
+
+        The primary attempt runs on the caller's thread and launches the hedge
+        from its own poll waits; only the hedge takes a thread from
+        _hedge_executor.
+        """
+        hedge_after = get_latency_tracker(self.space_id).p95() if GENIE_HEDGE_ENABLED else None
+        if hedge_after is None:
+            return self._attempt(question, timeout_seconds, timings, stop_event)
+
+        hedge_at = time.monotonic() + hedge_after
+        hedge_stop = _AttemptStop(stop_event)
+        hedges = []
+
+        def run_hedge():
+            with span("genie.attempt", hedge=True):
+                return self._attempt(question, timeout_seconds, None, hedge_stop)
+
+        def on_hedge_done(future):
+            if not future.cancelled() and future.exception() is None:
+                primary_stop.set()
+
+        def maybe_hedge():
+            if hedges or time.monotonic() < hedge_at:
+                return
+            _count_hedge("hedged")
+            future = submit_in_context(_hedge_executor, run_hedge)
+            hedges.append(future)
+            future.add_done_callback(on_hedge_done)
+
+        primary_stop = _AttemptStop(stop_event, on_wait=maybe_hedge)
+        try:
+            try:
+                with span("genie.attempt", hedge=False):
+                    return self._attempt(question, timeout_seconds, timings, primary_stop)
+            except CancelledError:
+                if not hedges or (stop_event is not None and stop_event.is_set()):
+                    raise
+            except Exception:
+                if not hedges:
+                    raise
+            # The hedge won, or the primary failed after hedging: answer from the hedge
+            conv_id, result = hedges[0].result()
+            _count_hedge("hedge_won")
+            return conv_id, result
+        finally:
+            hedge_stop.set()
+            if hedges:
+                annotate(hedged=True, hedge_after=round(hedge_after, 3))
+
+    async def aquery(self, question: str, timeout_seconds=600):
+        """Awaitable variant of query() for asyncio callers.
+
+        The blocking call runs in the default executor; connections still come
+        from the shared pool, so many coroutines can drive conversations at
+        once without exceeding GENIE_POOL_SIZE sockets.
+        """
+        return await asyncio.to_thread(self.query, question, timeout_seconds)
+
+
+def _find_attachment_id(attachments):
+    """Try to find a usable attachment id from common key names."""
+    for att in attachments:
+        if not isinstance(att, dict):
+            continue
+        # common keys that might hold the attachment id
+        for key in ("id", "attachment_id", "attachmentId", "attachmentID"):
+            if att.get(key):
+                return att[key]
+        # check nested metadata
+        meta = att.get("metadata") or att.get("meta") or {}
+        if isinstance(meta, dict) and meta.get("id"):
+            return meta["id"]
+    return None
+
+
+def _find_query_sql(attachments):
+    """The generated SQL from the first query attachment, if any."""
+    for att in attachments:
+        query = att.get("query") if isinstance(att, dict) else None
+        if isinstance(query, dict) and query.get("query"):
+            return query["query"]
+    return None
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+_in_flight = SingleFlight()
+_hedge_executor = ThreadPoolExecutor(max_workers=GENIE_POOL_SIZE, thread_name_prefix="genie-hedge")
+_hedge_stats = {"hedged": 0, "hedge_won": 0}
+_hedge_lock = threading.Lock()
+
+
+def _count_hedge(name):
+    with _hedge_lock:
+        _hedge_stats[name] += 1
+
+
+class _AttemptStop(threading.Event):
+    """Stop event for one attempt of a hedged query.
+
+    Also reads as set once the caller's stop_event is, and calls on_wait from
+    every wait so the primary's poll loop can launch the hedge on time.
+    """
+
+    def __init__(self, parent=None, on_wait=None):
+        super().__init__()
+        self.parent = parent
+        self.on_wait = on_wait
+
+    def is_set(self):
+        return super().is_set() or (self.parent is not None and self.parent.is_set())
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self.on_wait is not None:
+                self.on_wait()
+            if self.is_set():
+                return True
+            remaining = 0.1 if deadline is None else min(0.1, deadline - time.monotonic())
+            if remaining <= 0:
+                return False
+            super().wait(remaining)
+
+
+def coalescing_stats() -> dict:
+    """How many new-conversation queries ran vs. joined an identical one in flight."""
+    return _in_flight.stats()
+
+
+def sql_index_stats() -> dict:
+    """Generated SQL captured, and repeat questions answered by running it directly."""
+    index = get_sql_index()
+    return index.stats() if index is not None else {}
+
+
+def hedging_stats() -> dict:
+    """How many queries started a hedged second attempt, and how often it won."""
+    with _hedge_lock:
+        return dict(_hedge_stats)
+
+
+def get_genie_client(space_id: str) -> GenieClient:
+    """Return the shared GenieClient for a space, creating it on first use."""
+    with _clients_lock:
+        if space_id not in _clients:
+            _clients[space_id] = GenieClient(space_id, cache=get_result_cache(), sql_index=get_sql_index(),
+                                             sql_executor=get_sql_executor(space_id))
+        return _clients[space_id]
+
+
+# --- MAIN (for local testing) ---
+if __name__ == "__main__":
+    import sys
+    from config import SALES_GENIE_SPACE_ID
+
+    space = sys.argv[1] if len(sys.argv) > 1 else SALES_GENIE_SPACE_ID
+    user_question = sys.argv[2] if len(sys.argv) > 2 else "What are the total revenue?"
+    genie = get_genie_client(space)
+    conv_id, msg_id = genie.start_conversation(user_question)
+    print(f"Started conversation {conv_id}, message {msg_id}")
+    timings = {}
+    result = genie.poll_for_result(conv_id, msg_id, timings=timings)
+    print("Result:", result)
+    print("Timings:", timings)
@@ -0,0 +1,266 @@
+"""
+Durable job queue for the HTTP service.
+
+Each question submitted to the service becomes a row in a SQLite table, so
+queued jobs, and jobs interrupted by a crash, are picked up again after a
+restart. A bounded pool of worker threads claims jobs and
+runs them through the coordinator; each process renews a lease on the jobs it
+is running, so only jobs whose lease has lapsed are taken over. Callers never hold a thread while they
+wait: they poll the job row or subscribe to its progress events.
+"""
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+from config import SERVICE_JOBS_PATH, SERVICE_WORKERS, SERVICE_JOB_RETENTION, SERVICE_JOB_LEASE
+from agents.query_result import ColumnarResult
+
+_FINISHED = ("done", "error", "cancelled")
+
+
+def _result_json(result):
+    """JSON form of one agent's result for API clients."""
+    if isinstance(result, ColumnarResult):
+        return {"columns": result.columns, "types": result.types, "rows": [list(r) for r in result.rows()],
+                "row_count": result.total_row_count, "truncated": result.truncated}
+    return result
+
+
+def public_event(event: dict) -> dict:
+    """A coordinator event with its results converted to plain JSON."""
+    if event.get("type") != "done":
+        return event
+    event = dict(event)
+    if event.get("results"):
+        event["results"] = {agent: _result_json(r) for agent, r in event["results"].items()}
+    return event
+
+
+# --- QUEUE ---
+class JobQueue:
+    """Jobs in SQLite: queued -> running -> done | error (or cancelled while queued)."""
+
+    def __init__(self, path=SERVICE_JOBS_PATH, retention=SERVICE_JOB_RETENTION, lease=SERVICE_JOB_LEASE):
+        self.path = path or ":memory:"
+        self.retention = retention
+        self.lease = lease
+        # Identifies this process's claims; other processes leave them alone while the lease is renewed
+        self.owner = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        if self.path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, question TEXT, session_id TEXT, status TEXT, answer TEXT,"
+            " result TEXT, error TEXT, created_at REAL, started_at REAL, finished_at REAL,"
+            " owner TEXT, heartbeat_at REAL)"
+        )
+        # Tables created before leases existed
+        existing = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, type_name in (("owner", "TEXT"), ("heartbeat_at", "REAL")):
+            if column not in existing:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {type_name}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+        self._conn.commit()
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            cur = self._conn.execute(sql, params)
+            self._conn.commit()
+            return cur
+
+    def submit(self, question: str, session_id: str = None) -> str:
+        job_id = uuid.uuid4().hex
+        self._execute("INSERT INTO jobs (id, question, session_id, status, created_at) VALUES (?, ?, ?, 'queued', ?)",
+                      (job_id, question, session_id, time.time()))
+        return job_id
+
+    def claim(self):
+        """Move the oldest queued job to running and return it, or None if the queue is empty."""
+        while True:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1").fetchone()
+            if row is None:
+                return None
+            # Another worker may claim the same row first; only one UPDATE matches
+            now = time.time()
+            cur = self._execute(
+                "UPDATE jobs SET status = 'running', started_at = ?, owner = ?, heartbeat_at = ?"
+                " WHERE id = ? AND status = 'queued'", (now, self.owner, now, row["id"]))
+            if cur.rowcount:
+                return self.get(row["id"])
+
+    def finish(self, job_id: str, done: dict):
+        # The coordinator reports "no agents selected" / "no Genie returned data" as a done event without results
+        failed = done.get("results") is None
+        self._execute(
+            "UPDATE jobs SET status = ?, answer = ?, error = ?, result = ?, finished_at = ? WHERE id = ?",
+            ("error" if failed else "done", done.get("answer"), done.get("answer") if failed else None,
+             json.dumps({k: v for k, v in public_event(done).items() if k not in ("type", "answer")}, default=str),
+             time.time(), job_id))
+
+    def fail(self, job_id: str, error: str):
+        self._execute("UPDATE jobs SET status = 'error', error = ?, finished_at = ? WHERE id = ?",
+                      (error, time.time(), job_id))
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a job that has not started yet; returns False if it is already running or finished."""
+        cur = self._execute("UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+                            (time.time(), job_id))
+        return bool(cur.rowcount)
+
+    def get(self, job_id: str):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def counts(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: n for status, n in rows}
+
+    def heartbeat(self) -> int:
+        """Renew the lease on every job this process is running; returns how many."""
+        return self._execute("UPDATE jobs SET heartbeat_at = ? WHERE owner = ? AND status = 'running'",
+                             (time.time(), self.owner)).rowcount
+
+    def recover(self) -> int:
+        """Re-queue running jobs whose lease has lapsed (their process died); returns how many."""
+        return self._execute(
+            "UPDATE jobs SET status = 'queued', started_at = NULL, owner = NULL, heartbeat_at = NULL"
+            " WHERE status = 'running' AND (heartbeat_at IS NULL OR heartbeat_at < ?)",
+            (time.time() - self.lease,)).rowcount
+
+    def purge(self) -> int:
+        """Delete finished jobs older than the retention period."""
+        return self._execute(
+            f"DELETE FROM jobs WHERE status IN ({', '.join('?' for _ in _FINISHED)}) AND finished_at < ?",
+            (*_FINISHED, time.time() - self.retention)).rowcount
+
+
+# --- WORKERS ---
+class JobWorkers:
+    """Bounded pool of threads answering queued jobs with the coordinator.
+
+    Progress events of running jobs are kept in memory so clients can stream
+    them; subscribers get every event so far, then each new one as it happens.
+    """
+
+    def __init__(self, queue: JobQueue, workers: int = SERVICE_WORKERS, idle_poll: float = 1.0):
+        self.queue = queue
+        self.workers = workers
+        self.idle_poll = idle_poll
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._events = {}
+        self._listeners = {}
+
+    def start(self):
+        self._recover()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        thread = threading.Thread(target=self._keep_leases, name="job-lease", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+        return self
+
+    def stop(self, timeout: float = None):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def notify(self):
+        """Wake idle workers after a submit (jobs from other processes are picked up by polling)."""
+        self._wake.set()
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued job and send subscribers a terminal "cancelled" event."""
+        if not self.queue.cancel(job_id):
+            return False
+        self._emit(job_id, {"type": "cancelled"})
+        with self._lock:
+            self._events.pop(job_id, None)
+        return True
+
+    def subscribe(self, job_id: str, callback) -> list:
+        """Register callback(event) for a running job; returns the events it already emitted."""
+        with self._lock:
+            self._listeners.setdefault(job_id, []).append(callback)
+            return list(self._events.get(job_id, []))
+
+    def unsubscribe(self, job_id: str, callback):
+        with self._lock:
+            listeners = self._listeners.get(job_id, [])
+            if callback in listeners:
+                listeners.remove(callback)
+            if not listeners:
+                self._listeners.pop(job_id, None)
+
+    def _emit(self, job_id: str, event: dict):
+        with self._lock:
+            self._events.setdefault(job_id, []).append(event)
+            listeners = list(self._listeners.get(job_id, []))
+        for callback in listeners:
+            callback(event)
+
+    def _recover(self):
+        recovered = self.queue.recover()
+        if recovered:
+            print(f"♻️ Re-queued {recovered} interrupted job(s)")
+            self._wake.set()
+
+    def _keep_leases(self):
+        """Renew this process's leases, and take over jobs of processes that stopped renewing theirs."""
+        while not self._stop.wait(self.queue.lease / 3):
+            try:
+                self.queue.heartbeat()
+                self._recover()
+            except sqlite3.Error as e:
+                print(f"⚠️ Job lease renewal failed: {e}")
+
+    def _run(self):
+        from agents.coordinator import coordinator_stream
+
+        last_purge = 0.0
+        while not self._stop.is_set():
+            job = self.queue.claim()
+            if job is None:
+                if time.time() - last_purge > 3600:
+                    self.queue.purge()
+                    last_purge = time.time()
+                self._wake.wait(self.idle_poll)
+                self._wake.clear()
+                continue
+            # Another job may be waiting too; let the next idle worker look
+            self._wake.set()
+            job_id = job["id"]
+            try:
+                done = None
+                for event in coordinator_stream(job["question"], session_id=job["session_id"]):
+                    if event["type"] == "done":
+                        done = event
+                    else:
+                        self._emit(job_id, public_event(event))
+                # Stored before "done" is announced, so a woken waiter always reads the finished row
+                self.queue.finish(job_id, done)
+                self._emit(job_id, public_event(done))
+            except Exception as e:
+                self.queue.fail(job_id, str(e))
+                self._emit(job_id, {"type": "error", "error": str(e)})
+            finally:
+                with self._lock:
+                    self._events.pop(job_id, None)
@@ -0,0 +1,323 @@
+"""
+Local analytical store of Genie results, for follow-up refinements.
+
+After each chat turn the coordinator writes every space's query result into an
+embedded database (DuckDB if installed, SQLite otherwise), one table per
+(session, turn, space), with metadata about the question that produced it.
+Follow-ups that only reshape those rows ("now only for North region", "sort
+that by churn", "top 5 by revenue", "join them") are planned into local SQL
+and answered without routing, Genie or the warehouse. Anything the planner
+cannot fully account for is a new data request and goes back to Genie.
+"""
+import json
+import re
+import threading
+import time
+import uuid
+
+from config import (
+    LOCAL_STORE_ENABLED, LOCAL_STORE_ENGINE, LOCAL_STORE_PATH, LOCAL_STORE_MAX_TURNS, LOCAL_STORE_TTL,
+)
+from agents.query_result import ColumnarResult, _INT_TYPES, _FLOAT_TYPES
+from agents.sql_exec import LocalSQLExecutor
+from agents.tracing import span
+
+_NUMERIC = _INT_TYPES | _FLOAT_TYPES
+# Every Statement-API numeric type is stored as a number, so sorts and "top N" compare values, not strings
+_SQL_TYPES = dict({t: "BIGINT" for t in _INT_TYPES}, **{t: "DOUBLE" for t in _FLOAT_TYPES}, BOOLEAN="BOOLEAN")
+
+# Words a refinement may contain besides column names, values and numbers
+_FILLER = {
+    "now", "then", "and", "but", "also", "that", "this", "it", "them", "those", "these", "same", "the", "a",
+    "an", "for", "in", "of", "to", "by", "on", "with", "only", "just", "show", "me", "please", "can", "you",
+    "what", "about", "how", "is", "are", "results", "result", "rows", "data", "table", "tables", "filter",
+    "filtered", "keep", "limit", "sort", "sorted", "order", "ordered", "rank", "ranked", "top", "bottom",
+    "highest", "lowest", "most", "least", "largest", "smallest", "desc", "descending", "asc", "ascending",
+    "exclude", "excluding", "without", "except", "not", "join", "joined", "combine", "combined", "merge",
+    "merged", "together", "side", "first",
+}
+_SORT_WORDS = {"sort", "sorted", "order", "ordered", "rank", "ranked", "highest", "lowest", "most", "least",
+               "largest", "smallest", "top", "bottom"}
+_ASC_WORDS = {"asc", "ascending", "lowest", "least", "smallest", "bottom"}
+_NEGATIONS = {"exclude", "excluding", "without", "except", "not"}
+_JOIN_WORDS = {"join", "joined", "combine", "combined", "merge", "merged", "together"}
+_AVG_COLUMN = re.compile(r"rate|ratio|pct|percent|avg|average|share|margin")
+
+
+def _ident(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _words(text: str) -> list:
+    return re.findall(r"[a-z0-9_]+", (text or "").lower())
+
+
+class LocalStore:
+    """Per-session, per-space tables of Genie results in an embedded database."""
+
+    def __init__(self, path=LOCAL_STORE_PATH, engine=LOCAL_STORE_ENGINE,
+                 max_turns=LOCAL_STORE_MAX_TURNS, ttl=LOCAL_STORE_TTL):
+        if engine == "auto":
+            try:
+                import duckdb  # noqa: F401
+                engine = "duckdb"
+            except ImportError:
+                engine = "sqlite"
+        self.db = LocalSQLExecutor(path or ":memory:", engine=engine)
+        self.max_turns = max_turns
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._stats = {"stored": 0, "refined": 0, "passed_to_genie": 0}
+        self.db.run(
+            "CREATE TABLE IF NOT EXISTS frames ("
+            " name VARCHAR, session_id VARCHAR, turn BIGINT, agent VARCHAR, space_id VARCHAR,"
+            " question VARCHAR, columns VARCHAR, types VARCHAR, row_count BIGINT, created_at DOUBLE)"
+        )
+
+    def count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+    # --- Writes ---
+    def put_turn(self, session_id: str, question: str, results: dict, space_ids: dict = None):
+        """Store one turn's ColumnarResults ({agent: result}); other result types are skipped.
+
+        Truncated results are not stored: refining a partial table locally would give wrong answers.
+        """
+        frames = {agent: r for agent, r in results.items()
+                  if isinstance(r, ColumnarResult) and r.columns and not r.truncated}
+        if not frames:
+            return
+        with span("local_store.put", frames=len(frames)):
+            self._expire(session_id)
+            turn = self._latest_turn(session_id) + 1
+            now = time.time()
+            for agent, result in frames.items():
+                name = f"f_{uuid.uuid4().hex[:16]}"
+                columns = ", ".join(f"{_ident(c)} {_SQL_TYPES.get((t or '').upper(), 'VARCHAR')}"
+                                    for c, t in zip(result.columns, result.types))
+                self.db.run(f"CREATE TABLE {name} ({columns})")
+                if result.row_count:
+                    placeholders = ", ".join("?" for _ in result.columns)
+                    self.db.run(f"INSERT INTO {name} VALUES ({placeholders})", list(result.rows()), many=True)
+                self.db.run("INSERT INTO frames VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", (
+                    name, session_id, turn, agent, (space_ids or {}).get(agent), question,
+                    json.dumps(result.columns), json.dumps(result.types), result.row_count, now))
+                self.count("stored")
+
+    def _latest_turn(self, session_id) -> int:
+        rows = list(self.db.execute("SELECT MAX(turn) FROM frames WHERE session_id = ?",
+                                    params=(session_id,)).rows())
+        return (rows[0][0] or 0) if rows else 0
+
+    def _expire(self, session_id):
+        """Drop turns past max_turns for this session, and every session idle longer than the TTL."""
+        stale = self.db.execute(
+            "SELECT name FROM frames WHERE created_at < ? OR (session_id = ? AND turn <= ?)",
+            params=(time.time() - self.ttl, session_id, self._latest_turn(session_id) - self.max_turns + 1),
+        )
+        for (name,) in stale.rows():
+            self.db.run(f"DROP TABLE IF EXISTS {name}")
+            self.db.run("DELETE FROM frames WHERE name = ?", (name,))
+
+    # --- Reads ---
+    def latest_frames(self, session_id: str) -> list:
+        """Metadata of the frames stored for the session's most recent turn."""
+        result = self.db.execute(
+            "SELECT name, agent, space_id, question, columns, types, row_count, created_at FROM frames"
+            " WHERE session_id = ? AND turn = (SELECT MAX(turn) FROM frames WHERE session_id = ?)"
+            " AND created_at >= ? ORDER BY agent",
+            params=(session_id, session_id, time.time() - self.ttl),
+        )
+        keys = ("name", "agent", "space_id", "question", "columns", "types", "row_count", "created_at")
+        frames = [dict(zip(keys, row)) for row in result.rows()]
+        for frame in frames:
+            frame["columns"] = json.loads(frame["columns"])
+            frame["types"] = json.loads(frame["types"])
+        return frames
+
+    def has_session(self, session_id: str) -> bool:
+        """True if the session has results a follow-up could refine."""
+        return bool(self.latest_frames(session_id))
+
+    def distinct_values(self, frame: dict, column: str, limit: int = 200) -> list:
+        result = self.db.execute(f"SELECT DISTINCT {_ident(column)} FROM {frame['name']} LIMIT {int(limit)}")
+        return [v for (v,) in result.rows() if isinstance(v, str)]
+
+    def query(self, sql: str, params=()) -> ColumnarResult:
+        return self.db.execute(sql, params=params)
+
+    # --- Refinements ---
+    def refine(self, session_id: str, question: str):
+        """Answer a refinement of the session's last turn locally.
+
+        Returns ({agent: ColumnarResult}, {agent: sql}), or None when the
+        question is not a pure refinement of data already held locally.
+        """
+        frames = self.latest_frames(session_id)
+        if not frames:
+            return None
+        with span("local_store.refine") as s:
+            plan = plan_refinement(question, frames, self.distinct_values)
+            s.set(refinement=plan is not None)
+            if plan is None:
+                self.count("passed_to_genie")
+                return None
+            results, queries = {}, {}
+            for agent, (sql, params) in plan.items():
+                results[agent] = self.query(sql, params)
+                queries[agent] = sql
+            self.count("refined")
+            return results, queries
+
+
+# --- Planner ---
+def _column_mentions(words: list, columns: list) -> dict:
+    """Map question word positions to the column they name (e.g. "churn" -> churn_rate)."""
+    found = {}
+    for i, word in enumerate(words):
+        for col in columns:
+            parts = col.lower().split("_")
+            if word in (col.lower(), parts[0]) or word.rstrip("s") == col.lower().rstrip("s"):
+                found[i] = col
+                # Multi-word column names ("churn rate") consume the following words too
+                if words[i:i + len(parts)] == parts:
+                    for j in range(i + 1, i + len(parts)):
+                        found[j] = col
+                break
+    return found
+
+
+def plan_refinement(question: str, frames: list, distinct_values) -> dict:
+    """Plan a question as filters / sort / limit / join over stored frames.
+
+    Returns {agent: (sql, params)} or None. Every word of the question must be
+    a column name, a value present in the data, the N of "top N" or a refinement word,
+    and at least one operation must apply; otherwise the question may need
+    data the store does not have.
+    """
+    words = _words(question)
+    if not words:
+        return None
+    all_columns = sorted({c for f in frames for c in f["columns"]}, key=len, reverse=True)
+    mentions = _column_mentions(words, all_columns)
+    consumed = set(mentions)
+    text = " ".join(words)
+
+    # Filters: string values from the data named in the question
+    filters = {}  # column -> (included values, excluded values)
+    for frame in frames:
+        for col, type_name in zip(frame["columns"], frame["types"]):
+            if (type_name or "").upper() in _NUMERIC:
+                continue
+            for value in distinct_values(frame, col):
+                value_words = _words(value)
+                if not value_words:
+                    continue
+                for i in range(len(words) - len(value_words) + 1):
+                    if words[i:i + len(value_words)] != value_words:
+                        continue
+                    consumed.update(range(i, i + len(value_words)))
+                    negated = bool(_NEGATIONS & set(words[max(0, i - 3):i]))
+                    values = filters.setdefault(col, ([], []))[1 if negated else 0]
+                    if value not in values:
+                        values.append(value)
+
+    # Limit: "top 5", "bottom 3"
+    limit = None
+    m = re.search(r"\b(top|bottom|first)\s+(\d+)\b", text)
+    if m:
+        limit = int(m.group(2))
+        consumed.update(i for i in range(1, len(words)) if words[i - 1:i + 1] == [m.group(1), m.group(2)])
+
+    # Sort: the column after "by", else the first numeric column mentioned
+    sort_col = None
+    if _SORT_WORDS & set(words) or limit:
+        after_by = [mentions[i] for i in sorted(mentions) if "by" in words[:i]]
+        numeric = [mentions[i] for i in sorted(mentions)
+                   if any((t or "").upper() in _NUMERIC for f in frames
+                          for c, t in zip(f["columns"], f["types"]) if c == mentions[i])]
+        sort_col = (after_by or numeric or [None])[0]
+    descending = not (_ASC_WORDS & set(words))
+    join = bool(_JOIN_WORDS & set(words))
+
+    # Any other number ("in 2023") may be a filter the stored data cannot answer
+    leftover = [w for i, w in enumerate(words) if i not in consumed and w not in _FILLER]
+    if leftover or not (filters or sort_col or limit or join):
+        return None
+
+    def where(frame):
+        clauses, params = [], []
+        for col, (included, excluded) in filters.items():
+            if col not in frame["columns"]:
+                continue
+            for op, values in (("IN", included), ("NOT IN", excluded)):
+                if values:
+                    clauses.append(f"{_ident(col)} {op} ({', '.join('?' for _ in values)})")
+                    params.extend(values)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def order(columns):
+        # Without a sort column, "top N" keeps the order of the previous answer
+        clause = ""
+        if sort_col in [c for c, _ in columns]:
+            clause = f" ORDER BY {_ident(sort_col)} {'DESC' if descending else 'ASC'}"
+        return clause + (f" LIMIT {limit}" if limit else "")
+
+    # Every filter and the sort column must exist in some frame
+    if any(not any(col in f["columns"] for f in frames) for col in list(filters) + [sort_col] if col):
+        return None
+
+    if join:
+        return _plan_join(frames, filters, where, order)
+
+    plan = {}
+    for frame in frames:
+        touched = any(col in frame["columns"] for col in filters) or sort_col in frame["columns"]
+        if not touched and (filters or sort_col):
+            continue
+        clause, params = where(frame)
+        sql = f"SELECT * FROM {frame['name']}{clause}{order(list(zip(frame['columns'], frame['types'])))}"
+        plan[frame["agent"]] = (sql, params)
+    return plan or None
+
+
+def _plan_join(frames, filters, where, order):
+    """Aggregate each frame by the string columns they all share, then join on them."""
+    if len(frames) < 2:
+        return None
+    keys = [c for c, t in zip(frames[0]["columns"], frames[0]["types"])
+            if (t or "").upper() not in _NUMERIC and all(c in f["columns"] for f in frames[1:])]
+    if not keys:
+        return None
+    parts, params, out_columns = [], [], [(k, "STRING") for k in keys]
+    for i, frame in enumerate(frames):
+        measures = [(c, t) for c, t in zip(frame["columns"], frame["types"])
+                    if (t or "").upper() in _NUMERIC and c not in [o for o, _ in out_columns]]
+        select = [_ident(k) for k in keys] + [
+            f"{'AVG' if _AVG_COLUMN.search(c.lower()) else 'SUM'}({_ident(c)}) AS {_ident(c)}" for c, _ in measures]
+        clause, frame_params = where(frame)
+        group = ", ".join(_ident(k) for k in keys)
+        parts.append(f"(SELECT {', '.join(select)} FROM {frame['name']}{clause} GROUP BY {group}) AS j{i}")
+        params.extend(frame_params)
+        out_columns += measures
+    using = ", ".join(_ident(k) for k in keys)
+    sql = "SELECT * FROM " + parts[0] + "".join(f" JOIN {p} USING ({using})" for p in parts[1:])
+    return {"joined": (sql + order(out_columns), params)}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_local_store():
+    """Process-wide local store, or None if LOCAL_STORE_ENABLED is off."""
+    global _store
+    with _store_lock:
+        if _store is None and LOCAL_STORE_ENABLED:
+            _store = LocalStore()
+        return _store
@@ -0,0 +1,62 @@
+"""
+Adaptive polling schedule for Genie message status.
+
+Polls start fast so short queries return almost immediately, then back off
+exponentially (with jitter) up to a cap. The schedule resets on every status
+transition, since a new phase (e.g. ASKING_AI -> EXECUTING_QUERY) often
+finishes quickly, and some phases use a tighter cap than others.
+"""
+import random
+import time
+
+from config import (
+    POLL_INITIAL_INTERVAL, POLL_MAX_INTERVAL, POLL_BACKOFF, POLL_JITTER,
+    POLL_STATUS_MAX_INTERVAL,
+)
+
+
+class PollSchedule:
+    """Computes the delay before the next status poll."""
+
+    def __init__(self, initial=POLL_INITIAL_INTERVAL, maximum=POLL_MAX_INTERVAL,
+                 backoff=POLL_BACKOFF, jitter=POLL_JITTER, status_max=None):
+        self.initial = initial
+        self.maximum = maximum
+        self.backoff = backoff
+        self.jitter = jitter
+        self.status_max = POLL_STATUS_MAX_INTERVAL if status_max is None else status_max
+        self._status = None
+        self._interval = initial
+
+    def next_delay(self, status: str) -> float:
+        """Return how long to sleep after observing `status`."""
+        if status != self._status:
+            self._status = status
+            self._interval = self.initial
+        else:
+            self._interval = self._interval * self.backoff
+
+        cap = min(self.maximum, self.status_max.get(status, self.maximum))
+        self._interval = min(self._interval, cap)
+        spread = self._interval * self.jitter
+        return max(0.0, self._interval + random.uniform(-spread, spread))
+
+
+class PhaseTimer:
+    """Accumulates wall-clock time spent in each Genie message status."""
+
+    def __init__(self, timings: dict = None):
+        self.timings = timings if timings is not None else {}
+        self.timings.setdefault("phases", {})
+        self.timings.setdefault("polls", 0)
+        self._status = None
+        self._since = time.monotonic()
+
+    def observe(self, status: str):
+        now = time.monotonic()
+        self.timings["polls"] += 1
+        if self._status is not None:
+            phases = self.timings["phases"]
+            phases[self._status] = phases.get(self._status, 0.0) + (now - self._since)
+        self._status = status
+        self._since = now
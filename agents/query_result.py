@@ -0,0 +1,125 @@
+"""
+Compact columnar representation of Genie query results.
+
+The Genie query-result endpoint returns a SQL statement response whose rows
+arrive as JSON arrays of strings, possibly split over several chunks. Rows are
+converted chunk by chunk into one typed list per column, so the raw JSON of a
+chunk can be dropped as soon as it has been read and large results never sit
+in memory twice.
+"""
+from config import RESULT_MAX_ROWS
+
+_INT_TYPES = {"BYTE", "SHORT", "INT", "LONG", "BIGINT", "INTEGER", "SMALLINT", "TINYINT"}
+_FLOAT_TYPES = {"FLOAT", "DOUBLE", "DECIMAL", "REAL"}
+
+
+def _converter(type_name: str):
+    type_name = (type_name or "").upper()
+    if type_name in _INT_TYPES:
+        return int
+    if type_name in _FLOAT_TYPES:
+        return float
+    if type_name == "BOOLEAN":
+        return lambda v: v if isinstance(v, bool) else str(v).lower() == "true"
+    return None
+
+
+class ColumnarResult:
+    """Query result stored column-wise with values converted to Python types."""
+
+    __slots__ = ("columns", "types", "data", "row_count", "total_row_count", "truncated", "statement_id",
+                 "sql")
+
+    def __init__(self, columns, types, data=None, total_row_count=None, truncated=False, statement_id=None,
+                 sql=None):
+        self.columns = list(columns)
+        self.types = list(types)
+        self.data = data if data is not None else [[] for _ in self.columns]
+        self.row_count = len(self.data[0]) if self.data else 0
+        self.total_row_count = total_row_count if total_row_count is not None else self.row_count
+        self.truncated = truncated
+        self.statement_id = statement_id
+        self.sql = sql
+
+    @classmethod
+    def from_manifest(cls, manifest: dict, statement_id=None):
+        """Create an empty result from a statement manifest's schema."""
+        cols = (manifest.get("schema") or {}).get("columns") or []
+        cols = sorted(cols, key=lambda c: c.get("position", 0))
+        return cls(
+            columns=[c.get("name") for c in cols],
+            types=[c.get("type_name") for c in cols],
+            total_row_count=manifest.get("total_row_count"),
+            truncated=bool(manifest.get("truncated")),
+            statement_id=statement_id,
+        )
+
+    def append_rows(self, data_array, max_rows=RESULT_MAX_ROWS) -> bool:
+        """Append row-major string values; returns False once max_rows is reached."""
+        converters = [_converter(t) for t in self.types]
+        room = max(0, max_rows - self.row_count)
+        rows = data_array[:room]
+        for i, convert in enumerate(converters):
+            column = self.data[i]
+            for row in rows:
+                value = row[i] if i < len(row) else None
+                if value is not None and convert is not None:
+                    try:
+                        value = convert(value)
+                    except (TypeError, ValueError):
+                        pass
+                column.append(value)
+        self.row_count += len(rows)
+        if len(data_array) > room:
+            self.truncated = True
+            return False
+        return True
+
+    def append_columns(self, columns, max_rows=RESULT_MAX_ROWS) -> bool:
+        """Append already-typed column lists (e.g. an Arrow record batch); returns False once max_rows is reached."""
+        room = max(0, max_rows - self.row_count)
+        n = len(columns[0]) if columns else 0
+        for i, values in enumerate(columns):
+            self.data[i].extend(values[:room])
+        self.row_count += min(n, room)
+        if n > room:
+            self.truncated = True
+            return False
+        return True
+
+    def rows(self):
+        """Iterate over rows as tuples."""
+        return zip(*self.data)
+
+    def column(self, name: str) -> list:
+        return self.data[self.columns.index(name)]
+
+    def to_dict(self) -> dict:
+        return {
+            "columns": self.columns, "types": self.types, "data": self.data,
+            "total_row_count": self.total_row_count, "truncated": self.truncated,
+            "statement_id": self.statement_id, "sql": self.sql,
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict):
+        return cls(d["columns"], d["types"], d["data"], d.get("total_row_count"),
+                   d.get("truncated", False), d.get("statement_id"), d.get("sql"))
+
+    def __repr__(self):
+        return f"ColumnarResult(columns={self.columns}, rows={self.row_count}, truncated={self.truncated})"
+
+
+def encode_result(result):
+    """JSON-safe form of a Genie result, for caches and stores."""
+    if isinstance(result, ColumnarResult):
+        return {"__columnar__": result.to_dict()}
+    return result
+
+
+def decode_result(value):
+    """Inverse of encode_result()."""
+    if isinstance(value, dict) and "__columnar__" in value:
+        return ColumnarResult.from_dict(value["__columnar__"])
+    return value
+
@@ -0,0 +1,206 @@
+"""
+Client-side rate limiting and concurrency governors.
+
+A Governor per key (a Genie space ID, or "llm:<model>" for OpenAI) combines
+a token bucket (requests per minute) with a semaphore (requests in flight).
+Callers queue until both allow them through instead of hitting the API and
+failing; a 429 with Retry-After pauses the whole governor so other callers
+back off too. Queue depth and wait times are exposed through stats().
+
+Every wait takes an optional stop_event: a caller that is cancelled or past
+its deadline leaves the queue with CancelledError instead of spending a
+request once a slot frees up.
+"""
+import email.utils
+import threading
+import time
+from concurrent.futures import CancelledError
+from contextlib import contextmanager
+
+from config import (
+    GENIE_RATE_PER_MINUTE, GENIE_MAX_CONCURRENCY, GENIE_SPACE_LIMITS,
+    LLM_RATE_PER_MINUTE, LLM_MAX_CONCURRENCY, LLM_MODEL_LIMITS,
+)
+from agents.spaces import space_limits
+
+# How often a stopped caller blocked on the concurrency semaphore notices the stop
+_STOP_CHECK = 0.05
+
+
+def _sleep(delay: float, stop_event: threading.Event = None):
+    """Sleep for delay seconds, raising CancelledError as soon as stop_event is set."""
+    if stop_event is None:
+        time.sleep(delay)
+    elif stop_event.wait(delay):
+        raise CancelledError("Stopped while queued")
+
+
+class TokenBucket:
+    """Blocking token bucket: `rate` tokens per second, holding at most `burst`."""
+
+    def __init__(self, rate: float, burst: float = 1):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, stop_event: threading.Event = None) -> float:
+        """Take one token, sleeping until one is available. Returns seconds waited."""
+        waited = 0.0
+        while True:
+            if stop_event is not None and stop_event.is_set():
+                raise CancelledError("Stopped while queued")
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            _sleep(delay, stop_event)
+            waited += delay
+
+
+class Governor:
+    """Rate limit plus concurrency limit for one key; 0 disables either limit."""
+
+    def __init__(self, per_minute: float = 0, max_concurrency: int = 0, burst: float = 1):
+        self.per_minute = per_minute
+        self.max_concurrency = max_concurrency
+        self._bucket = TokenBucket(per_minute / 60.0, burst) if per_minute and per_minute > 0 else None
+        self._semaphore = threading.Semaphore(max_concurrency) if max_concurrency and max_concurrency > 0 else None
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self._stats = {"acquired": 0, "queued": 0, "max_queued": 0, "in_flight": 0,
+                       "wait_total": 0.0, "wait_max": 0.0, "throttled": 0, "cancelled": 0}
+
+    def _wait_pause(self, stop_event=None):
+        while True:
+            if stop_event is not None and stop_event.is_set():
+                raise CancelledError("Stopped while queued")
+            with self._lock:
+                delay = self._paused_until - time.monotonic()
+            if delay <= 0:
+                return
+            _sleep(delay, stop_event)
+
+    def _acquire_semaphore(self, stop_event=None):
+        if stop_event is None:
+            self._semaphore.acquire()
+            return
+        while not self._semaphore.acquire(timeout=_STOP_CHECK):
+            if stop_event.is_set():
+                raise CancelledError("Stopped while queued")
+
+    @contextmanager
+    def slot(self, stop_event: threading.Event = None):
+        """Hold one request slot: waits for any pause, a rate token and a concurrency slot.
+
+        Setting `stop_event` while queued raises CancelledError without taking a slot.
+        """
+        start = time.monotonic()
+        with self._lock:
+            self._stats["queued"] += 1
+            self._stats["max_queued"] = max(self._stats["max_queued"], self._stats["queued"])
+        try:
+            self._wait_pause(stop_event)
+            if self._bucket is not None:
+                self._bucket.acquire(stop_event)
+            if self._semaphore is not None:
+                self._acquire_semaphore(stop_event)
+        except CancelledError:
+            with self._lock:
+                self._stats["cancelled"] += 1
+            raise
+        finally:
+            waited = time.monotonic() - start
+            with self._lock:
+                self._stats["queued"] -= 1
+        with self._lock:
+            self._stats["acquired"] += 1
+            self._stats["in_flight"] += 1
+            self._stats["wait_total"] += waited
+            self._stats["wait_max"] = max(self._stats["wait_max"], waited)
+        try:
+            yield waited
+        finally:
+            with self._lock:
+                self._stats["in_flight"] -= 1
+            if self._semaphore is not None:
+                self._semaphore.release()
+
+    def throttled(self, retry_after: float):
+        """Record a 429 and hold back every caller of this key for retry_after seconds."""
+        with self._lock:
+            self._stats["throttled"] += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+
+    def wait_if_paused(self, stop_event: threading.Event = None):
+        self._wait_pause(stop_event)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["wait_avg"] = stats["wait_total"] / stats["acquired"] if stats["acquired"] else 0.0
+        stats.update(per_minute=self.per_minute, max_concurrency=self.max_concurrency)
+        return stats
+
+
+def parse_retry_after(value, default: float) -> float:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
+_governors = {}
+_governors_lock = threading.Lock()
+
+
+def _default_limits(key: str) -> dict:
+    if key.startswith("llm:"):
+        limits = {"per_minute": LLM_RATE_PER_MINUTE, "max_concurrency": LLM_MAX_CONCURRENCY}
+        limits.update(LLM_MODEL_LIMITS.get(key[len("llm:"):], {}))
+    else:
+        limits = {"per_minute": GENIE_RATE_PER_MINUTE, "max_concurrency": GENIE_MAX_CONCURRENCY}
+        limits.update(space_limits(key))
+        limits.update(GENIE_SPACE_LIMITS.get(key, {}))
+    return limits
+
+
+def get_governor(key: str) -> Governor:
+    """Return the governor for a Genie space ID or "llm:<model>", created from config on first use."""
+    with _governors_lock:
+        if key not in _governors:
+            _governors[key] = Governor(**_default_limits(key))
+        return _governors[key]
+
+
+def configure(key: str, per_minute: float = None, max_concurrency: int = None):
+    """Override a key's limits at runtime (e.g. from CLI flags); unset values keep config defaults."""
+    limits = _default_limits(key)
+    if per_minute is not None:
+        limits["per_minute"] = per_minute
+    if max_concurrency is not None:
+        limits["max_concurrency"] = max_concurrency
+    with _governors_lock:
+        _governors[key] = Governor(**limits)
+
+
+def governor_stats() -> dict:
+    """Queue depth, wait times and 429 counts for every governor in use."""
+    with _governors_lock:
+        governors = dict(_governors)
+    return {key: g.stats() for key, g in governors.items()}
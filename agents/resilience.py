@@ -0,0 +1,153 @@
+"""
+Circuit breaker and latency tracking for Genie spaces.
+
+A CircuitBreaker per space watches the outcome of recent calls. Once too many
+of them fail or run slower than CIRCUIT_SLOW_SECONDS, the circuit opens and
+callers fail fast (or get a stale cached answer) instead of waiting minutes
+on a degraded space. After CIRCUIT_RESET_TIMEOUT one probe call is let
+through; its outcome closes the circuit again or re-opens it.
+
+LatencyTracker keeps recent successful latencies per space; its p95 is the
+delay after which a hedged second attempt is started.
+"""
+import threading
+import time
+from collections import deque
+
+from config import (
+    CIRCUIT_WINDOW, CIRCUIT_MIN_CALLS, CIRCUIT_FAILURE_RATIO, CIRCUIT_SLOW_SECONDS,
+    CIRCUIT_SLOW_RATIO, CIRCUIT_RESET_TIMEOUT, HEDGE_MIN_SAMPLES,
+)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a call is rejected because the space's circuit is open."""
+
+
+class CircuitBreaker:
+    """Closed -> open on too many failures/slow calls -> half-open probe -> closed."""
+
+    def __init__(self, window=CIRCUIT_WINDOW, min_calls=CIRCUIT_MIN_CALLS,
+                 failure_ratio=CIRCUIT_FAILURE_RATIO, slow_seconds=CIRCUIT_SLOW_SECONDS,
+                 slow_ratio=CIRCUIT_SLOW_RATIO, reset_timeout=CIRCUIT_RESET_TIMEOUT):
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.slow_seconds = slow_seconds
+        self.slow_ratio = slow_ratio
+        self.reset_timeout = reset_timeout
+        self._outcomes = deque(maxlen=window)  # (failed, slow)
+        self._state = "closed"
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self._stats = {"rejected": 0, "opened": 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead now; counts a rejection if not."""
+        with self._lock:
+            if self._state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = "half_open"
+                self._probing = False
+            if self._state == "closed":
+                return True
+            if self._state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            self._stats["rejected"] += 1
+            return False
+
+    def record(self, failed: bool, latency: float = 0.0):
+        slow = latency > self.slow_seconds
+        with self._lock:
+            if self._state == "half_open":
+                if failed or slow:
+                    self._open()
+                else:
+                    self._state = "closed"
+                    self._outcomes.clear()
+                return
+            self._outcomes.append((failed, slow))
+            n = len(self._outcomes)
+            if n < self.min_calls:
+                return
+            failures = sum(1 for f, _ in self._outcomes if f)
+            slows = sum(1 for _, s in self._outcomes if s)
+            if failures / n >= self.failure_ratio or slows / n >= self.slow_ratio:
+                self._open()
+
+    def release(self):
+        """Free the half-open probe slot after a call that ended without an outcome (cancelled)."""
+        with self._lock:
+            if self._state == "half_open":
+                self._probing = False
+
+    def _open(self):
+        self._state = "open"
+        self._opened_at = time.monotonic()
+        self._probing = False
+        self._outcomes.clear()
+        self._stats["opened"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, state=self._state)
+
+
+class LatencyTracker:
+    """Recent successful call latencies and their percentiles."""
+
+    def __init__(self, size=200, min_samples=HEDGE_MIN_SAMPLES):
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float):
+        with self._lock:
+            self._samples.append(latency)
+
+    def percentile(self, pct: float):
+        """The pct-th percentile, or None until min_samples latencies are known."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * pct / 100.0))]
+
+    def p95(self):
+        return self.percentile(95)
+
+
+_breakers = {}
+_trackers = {}
+_registry_lock = threading.Lock()
+
+
+def get_breaker(space_id: str) -> CircuitBreaker:
+    with _registry_lock:
+        if space_id not in _breakers:
+            _breakers[space_id] = CircuitBreaker()
+        return _breakers[space_id]
+
+
+def get_latency_tracker(space_id: str) -> LatencyTracker:
+    with _registry_lock:
+        if space_id not in _trackers:
+            _trackers[space_id] = LatencyTracker()
+        return _trackers[space_id]
+
+
+def resilience_stats() -> dict:
+    """Circuit state and latency percentiles for every space seen so far."""
+    with _registry_lock:
+        spaces = set(_breakers) | set(_trackers)
+    return {
+        space_id: dict(get_breaker(space_id).stats(),
+                       p50=get_latency_tracker(space_id).percentile(50),
+                       p95=get_latency_tracker(space_id).p95())
+        for space_id in spaces
+    }
@@ -0,0 +1,288 @@
+"""
+Result cache for Genie questions.
+
+Entries are keyed by Genie space ID plus a normalized form of the question,
+expire after a TTL and are evicted least-recently-used once the cache is full.
+Two backends are available: an in-process memory store and an on-disk SQLite
+store that can be shared by several processes. Optionally, questions that are
+not an exact key match can still hit the cache when their embedding is close
+enough to a cached question in the same space.
+"""
+import json
+import math
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from config import (
+    RESULT_CACHE_BACKEND, RESULT_CACHE_TTL, RESULT_CACHE_MAX_ENTRIES, RESULT_CACHE_PATH,
+    RESULT_CACHE_SEMANTIC, RESULT_CACHE_SIMILARITY, EMBEDDING_MODEL, OPENAI_API_KEY,
+)
+
+
+# --- UTILITY ---
+def normalize_question(question: str) -> str:
+    """Lower-case, drop punctuation and collapse whitespace."""
+    question = re.sub(r"[^\w\s]", " ", (question or "").lower())
+    return " ".join(question.split())
+
+
+def _cache_key(space_id: str, question: str) -> str:
+    return f"{space_id}::{normalize_question(question)}"
+
+
+def _cosine(a, b) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+# --- BACKENDS ---
+class MemoryBackend:
+    """In-process LRU store."""
+
+    def __init__(self, max_entries=RESULT_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return (stored_at, value) and mark the entry as recently used."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry["stored_at"], entry["value"]
+
+    def set(self, key, space_id, question, value, embedding=None) -> int:
+        """Store an entry and return how many entries were evicted."""
+        with self._lock:
+            self._entries[key] = {
+                "space_id": space_id, "question": question, "value": value,
+                "embedding": embedding, "stored_at": time.time(),
+            }
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def embeddings(self, space_id):
+        """Return (key, embedding) for every entry of a space that has one."""
+        with self._lock:
+            items = [(k, e["embedding"]) for k, e in self._entries.items()
+                     if e["space_id"] == space_id and e["embedding"]]
+        return items
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteBackend:
+    """On-disk LRU store; safe to share between processes."""
+
+    def __init__(self, path=RESULT_CACHE_PATH, max_entries=RESULT_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS genie_cache ("
+            " key TEXT PRIMARY KEY, space_id TEXT, question TEXT, value TEXT,"
+            " embedding TEXT, stored_at REAL, last_access REAL)"
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT stored_at, value FROM genie_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE genie_cache SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            return row[0], json.loads(row[1])
+
+    def set(self, key, space_id, question, value, embedding=None) -> int:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO genie_cache VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, space_id, question, json.dumps(value),
+                 json.dumps(embedding) if embedding else None, now, now),
+            )
+            cur = self._conn.execute(
+                "DELETE FROM genie_cache WHERE key IN ("
+                " SELECT key FROM genie_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+            return cur.rowcount
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM genie_cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def embeddings(self, space_id):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, embedding FROM genie_cache WHERE space_id = ? AND embedding IS NOT NULL",
+                (space_id,),
+            ).fetchall()
+        return [(key, json.loads(embedding)) for key, embedding in rows]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM genie_cache")
+            self._conn.commit()
+
+
+# --- CACHE ---
+class ResultCache:
+    """TTL cache of Genie results in front of GenieClient.query()."""
+
+    # Embeddings computed by a semantic lookup are kept until set() stores the
+    # answer, so an uncached question costs one embedding call, not two
+    _PENDING_EMBEDDINGS = 256
+
+    def __init__(self, backend, ttl=RESULT_CACHE_TTL, embed_fn=None,
+                 similarity_threshold=RESULT_CACHE_SIMILARITY):
+        self.backend = backend
+        self.ttl = ttl
+        self.embed_fn = embed_fn
+        self.similarity_threshold = similarity_threshold
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "semantic_hits": 0, "misses": 0, "expired": 0, "evictions": 0,
+                       "stale_hits": 0}
+        self._pending = OrderedDict()
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self._stats[name] += n
+
+    def _lookup(self, key):
+        entry = self.backend.get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        if self.ttl and time.time() - stored_at > self.ttl:
+            # Expired entries stay until LRU eviction so get_stale() can still serve them
+            self._count("expired")
+            return None
+        return value
+
+    def get(self, space_id: str, question: str):
+        """Return the cached result for the question, or None on a miss."""
+        value = self._lookup(_cache_key(space_id, question))
+        if value is not None:
+            self._count("hits")
+            return value
+
+        if self.embed_fn is not None:
+            value = self._semantic_lookup(space_id, question)
+            if value is not None:
+                self._count("semantic_hits")
+                return value
+
+        self._count("misses")
+        return None
+
+    def get_stale(self, space_id: str, question: str):
+        """Return (stored_at, value) for the question even if expired, or None.
+
+        Used as a fallback when the space cannot be reached (e.g. its circuit is open).
+        """
+        entry = self.backend.get(_cache_key(space_id, question))
+        if entry is not None:
+            self._count("stale_hits")
+        return entry
+
+    def _embed(self, space_id, question, keep=True):
+        """Embedding of the question, reusing the one a recent lookup computed."""
+        key = _cache_key(space_id, question)
+        with self._lock:
+            embedding = self._pending.pop(key, None)
+        if embedding is None:
+            embedding = self.embed_fn(question)
+        if keep:
+            with self._lock:
+                self._pending[key] = embedding
+                while len(self._pending) > self._PENDING_EMBEDDINGS:
+                    self._pending.popitem(last=False)
+        return embedding
+
+    def _semantic_lookup(self, space_id, question):
+        candidates = self.backend.embeddings(space_id)
+        if not candidates:
+            return None
+        target = self._embed(space_id, question)
+        scored = sorted(((_cosine(target, embedding), key) for key, embedding in candidates), reverse=True)
+        # The closest entry may have expired; fall back to the next one above the threshold
+        for score, key in scored:
+            if score < self.similarity_threshold:
+                break
+            value = self._lookup(key)
+            if value is not None:
+                return value
+        return None
+
+    def set(self, space_id: str, question: str, value):
+        embedding = self._embed(space_id, question, keep=False) if self.embed_fn is not None else None
+        evicted = self.backend.set(_cache_key(space_id, question), space_id, question, value, embedding)
+        if evicted:
+            self._count("evictions", evicted)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["semantic_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["semantic_hits"]) / lookups if lookups else 0.0
+        return stats
+
+
+def openai_embedder(model=EMBEDDING_MODEL):
+    """Return an embed_fn backed by the OpenAI embeddings endpoint."""
+    from openai import OpenAI
+
+    client = OpenAI(api_key=OPENAI_API_KEY)
+
+    def embed(text):
+        resp = client.embeddings.create(model=model, input=normalize_question(text))
+        return resp.data[0].embedding
+
+    return embed
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache():
+    """Return the process-wide cache configured in config.py, or None if disabled."""
+    global _cache
+    with _cache_lock:
+        if _cache is None and RESULT_CACHE_BACKEND != "none":
+            if RESULT_CACHE_BACKEND == "sqlite":
+                backend = SQLiteBackend()
+            elif RESULT_CACHE_BACKEND == "memory":
+                backend = MemoryBackend()
+            else:
+                raise ValueError(f"Unknown RESULT_CACHE_BACKEND: {RESULT_CACHE_BACKEND}")
+            embed_fn = openai_embedder() if RESULT_CACHE_SEMANTIC else None
+            _cache = ResultCache(backend, embed_fn=embed_fn)
+        return _cache
@@ -0,0 +1,123 @@
+"""
+Routing decision for the coordinator: which Genie(s) should answer a question.
+
+Three paths, cheapest first:
+  1. cache    - a recent identical (normalized) question was already routed
+  2. keywords - the question clearly mentions only one domain
+  3. llm      - ambiguous or multi-domain questions go to the routing LLM
+
+Recent LLM decisions are kept as routing history; likely_agents() uses it to
+guess which spaces to start speculatively while the routing LLM is running.
+"""
+import json
+import threading
+from collections import Counter, deque
+
+from agents.result_cache import MemoryBackend, ResultCache
+from agents.rate_limit import get_governor
+from agents.spaces import SPACES
+from agents.tracing import span, record_usage
+from config import (
+    LLM_MODEL, LOCAL_ROUTER_ENABLED, ROUTING_CACHE_TTL, ROUTING_CACHE_MAX_ENTRIES,
+    ROUTING_HISTORY_SIZE, SPECULATIVE_MAX_SPACES, SPECULATIVE_MIN_SHARE, SPECULATIVE_MIN_HISTORY,
+)
+
+
+def build_routing_prompt(spaces) -> str:
+    """System prompt listing every registered Genie space and its description."""
+    spaces = list(spaces)
+    catalog = "\n".join(f"    - {s.name}: {s.description}" for s in spaces)
+    example = {
+        "agents": [s.name for s in spaces[:2]],
+        "subqueries": {s.name: f"<the part of the question for the {s.name} Genie>" for s in spaces[:2]},
+    }
+    return f"""You are a smart coordinator between {len(spaces)} Databricks Genies:
+{catalog}
+
+    Determine which agent(s) to call, using the names above. Call only the agents the
+    question needs; if several are needed, split the query into one sub-query per agent.
+    You must respond strictly in valid JSON format only, like this:
+    {json.dumps(example, indent=4).replace(chr(10), chr(10) + "    ")}
+    """
+
+
+ROUTING_SYSTEM_PROMPT = build_routing_prompt(SPACES.values())
+
+# Routing decisions only depend on the question text, so one cache "space" is enough
+_ROUTING_SPACE = "__routing__"
+_cache = ResultCache(MemoryBackend(max_entries=ROUTING_CACHE_MAX_ENTRIES), ttl=ROUTING_CACHE_TTL)
+
+_stats_lock = threading.Lock()
+_path_counts = {"cache": 0, "keywords": 0, "llm": 0}
+_history = deque(maxlen=ROUTING_HISTORY_SIZE)
+
+
+def keyword_route(user_query: str):
+    """Return a single-agent routing if exactly one domain matches, else None."""
+    matched = [name for name, space in SPACES.items() if space.keywords and space.keywords.search(user_query)]
+    if len(matched) != 1:
+        return None
+    agent = matched[0]
+    return {"agents": [agent], "subqueries": {agent: user_query}}
+
+
+def llm_route(client, user_query: str) -> dict:
+    with span("llm.routing", model=LLM_MODEL) as s, get_governor(f"llm:{LLM_MODEL}").slot() as waited:
+        s.set(queue_wait=round(waited, 3))
+        response = client.chat.completions.create(
+            model=LLM_MODEL,
+            messages=[
+                {"role": "system", "content": ROUTING_SYSTEM_PROMPT},
+                {"role": "user", "content": user_query}
+            ],
+            response_format={"type": "json_object"}
+        )
+        record_usage(response)
+        return json.loads(response.choices[0].message.content)
+
+
+def route(client, user_query: str, before_llm=None):
+    """Return (routing, path) where path is "cache", "keywords" or "llm".
+
+    before_llm, if given, is called right before falling back to the routing
+    LLM, so the caller can start work that overlaps with it.
+    """
+    routing = _cache.get(_ROUTING_SPACE, user_query)
+    path = "cache"
+
+    if routing is None and LOCAL_ROUTER_ENABLED:
+        routing = keyword_route(user_query)
+        path = "keywords"
+
+    if routing is None:
+        if before_llm is not None:
+            before_llm()
+        routing = llm_route(client, user_query)
+        path = "llm"
+
+    if path == "llm":
+        _cache.set(_ROUTING_SPACE, user_query, routing)
+    with _stats_lock:
+        _path_counts[path] += 1
+        if path == "llm":
+            _history.append(tuple(routing.get("agents", [])))
+    return routing, path
+
+
+def likely_agents(max_agents=SPECULATIVE_MAX_SPACES, min_share=SPECULATIVE_MIN_SHARE,
+                  min_history=SPECULATIVE_MIN_HISTORY) -> list:
+    """Agents picked for at least min_share of recent LLM routings, most frequent first."""
+    with _stats_lock:
+        history = list(_history)
+    if len(history) < max(1, min_history):
+        return []
+    counts = Counter(agent for agents in history for agent in set(agents))
+    return [agent for agent, n in counts.most_common(max_agents) if n / len(history) >= min_share]
+
+
+def routing_stats() -> dict:
+    """Counts of routing decisions per path, plus routing cache stats."""
+    with _stats_lock:
+        stats = dict(_path_counts)
+    stats["cache_stats"] = _cache.stats()
+    return stats
@@ -0,0 +1,16 @@
+"""
+Agent for the Sales Genie space (revenue, orders, products, regions).
+"""
+
+from agents.base_agent import BaseGenieAgent
+from config import SALES_GENIE_SPACE_ID, SALES_GENIE_DEADLINE
+
+
+class SalesAgent(BaseGenieAgent):
+    """Answers sales questions from the Sales Genie space."""
+
+    agent_type = "Sales Agent"
+    deadline = SALES_GENIE_DEADLINE
+
+    def get_genie_space_id(self) -> str:
+        return SALES_GENIE_SPACE_ID
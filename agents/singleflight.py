@@ -0,0 +1,86 @@
+"""
+Request coalescing ("single-flight") for identical in-flight work.
+
+The first caller for a key runs the work; callers arriving with the same key
+while it is still running wait for that result instead of starting their
+own. Every waiter receives the same result (or the same exception). A
+leader that is cancelled has not failed: its waiters retry, and the first of
+them becomes the new leader.
+"""
+import threading
+from concurrent.futures import CancelledError
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = {"executed": 0, "coalesced": 0, "takeovers": 0}
+
+    def do(self, key, fn, stop_event: threading.Event = None):
+        """Run fn() for key, or wait for the identical call already in flight.
+
+        A waiter whose stop_event is set stops waiting and gets CancelledError;
+        the in-flight call itself keeps running for the other waiters. If the
+        leader is cancelled (its own deadline, a discarded speculative call),
+        waiters that are still live run fn() again instead of failing with it.
+        """
+        retry = False
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+                    self._stats["takeovers" if retry else "executed"] += 1
+                elif not retry:
+                    call.waiters += 1
+                    self._stats["coalesced"] += 1
+
+            if not leader:
+                while not call.done.wait(0.1):
+                    if stop_event is not None and stop_event.is_set():
+                        raise CancelledError("Stopped waiting for coalesced call")
+                if isinstance(call.error, CancelledError):
+                    if stop_event is not None and stop_event.is_set():
+                        raise CancelledError("Stopped waiting for coalesced call")
+                    retry = True
+                    continue
+                if call.error is not None:
+                    raise call.error
+                return call.result
+
+            try:
+                call.result = fn()
+                return call.result
+            except BaseException as e:
+                call.error = e
+                raise
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> dict:
+        """Calls executed vs. calls served by joining one already in flight."""
+        with self._lock:
+            stats = dict(self._stats, in_flight=len(self._calls))
+        total = stats["executed"] + stats["coalesced"]
+        stats["coalesced_ratio"] = stats["coalesced"] / total if total else 0.0
+        return stats
@@ -0,0 +1,67 @@
+"""
+Registry of the Genie spaces the coordinator can route to.
+
+Spaces are declared in config (GENIE_SPACES / GENIE_SPACES_FILE). The routing
+prompt, the keyword pre-router, the per-space governors and the fan-out are
+all built from this registry, so adding a space is a config change only.
+"""
+import re
+
+from config import GENIE_SPACES, GENIE_AGENT_DEADLINE
+
+
+class GenieSpace:
+    """One routable Genie space."""
+
+    __slots__ = ("name", "space_id", "description", "keywords", "deadline", "per_minute", "max_concurrency",
+                 "warehouse_id")
+
+    def __init__(self, name, space_id, description="", keywords=None, deadline=None,
+                 per_minute=None, max_concurrency=None, warehouse_id=None):
+        self.name = name
+        self.space_id = space_id
+        self.description = description
+        self.keywords = (re.compile(r"\b(" + "|".join(keywords) + r")\b", re.IGNORECASE)
+                         if keywords else None)
+        self.deadline = float(deadline) if deadline else GENIE_AGENT_DEADLINE
+        self.per_minute = per_minute
+        self.max_concurrency = max_concurrency
+        self.warehouse_id = warehouse_id
+
+    def limits(self) -> dict:
+        """Governor overrides declared for this space."""
+        limits = {"per_minute": self.per_minute, "max_concurrency": self.max_concurrency}
+        return {k: v for k, v in limits.items() if v is not None}
+
+    def __repr__(self):
+        return f"GenieSpace(name={self.name!r}, space_id={self.space_id!r})"
+
+
+def load_spaces(entries=GENIE_SPACES) -> dict:
+    """Build name -> GenieSpace from registry entries, rejecting duplicate names."""
+    spaces = {}
+    for entry in entries:
+        space = GenieSpace(**entry)
+        if space.name in spaces:
+            raise ValueError(f"Duplicate Genie space name in registry: {space.name!r}")
+        spaces[space.name] = space
+    return spaces
+
+
+SPACES = load_spaces()
+
+
+def space_limits(space_id: str) -> dict:
+    """Registry limits for a space ID (empty if the space is not registered)."""
+    for space in SPACES.values():
+        if space.space_id == space_id:
+            return space.limits()
+    return {}
+
+
+def space_warehouse(space_id: str):
+    """SQL warehouse declared for a space ID in the registry, or None."""
+    for space in SPACES.values():
+        if space.space_id == space_id:
+            return space.warehouse_id
+    return None
@@ -0,0 +1,341 @@
+"""
+Direct re-execution of the SQL Genie generates.
+
+Most of a Genie answer's latency is spent turning the question into SQL. Every
+completed message carries that SQL in its query attachment, so the client
+indexes it by space + normalized question; a repeat question can then run the
+stored SQL straight on the warehouse and skip Genie's NL-to-SQL step.
+
+Executors are pluggable and share one interface, execute(sql) -> ColumnarResult:
+  StatementExecutor  Databricks Statement Execution API. Results arrive as
+                     Arrow IPC chunks when pyarrow is installed, JSON chunks
+                     otherwise.
+  LocalSQLExecutor   a local SQLite or DuckDB database standing in for the
+                     warehouse in offline tests.
+"""
+import sqlite3
+import threading
+import time
+from concurrent.futures import CancelledError
+
+from config import (
+    DATABRICKS_HOST, DATABRICKS_TOKEN, SQL_EXECUTOR, SQL_WAREHOUSE_ID, SQL_LOCAL_DB,
+    SQL_INDEX_PATH, SQL_INDEX_TTL, SQL_CHUNK_ROWS,
+)
+from agents.polling import PollSchedule
+from agents.query_result import ColumnarResult
+from agents.rate_limit import get_governor
+from agents.result_cache import MemoryBackend, SQLiteBackend, _cache_key
+from agents.tracing import span, current_span
+
+
+def _pyarrow():
+    """pyarrow if installed, else None (Arrow results are optional)."""
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def _arrow_type_name(arrow_type) -> str:
+    """Statement-API style type name for an Arrow type."""
+    import pyarrow.types as t
+
+    if t.is_integer(arrow_type):
+        return "LONG"
+    if t.is_floating(arrow_type) or t.is_decimal(arrow_type):
+        return "DOUBLE"
+    if t.is_boolean(arrow_type):
+        return "BOOLEAN"
+    return "STRING"
+
+
+def _column_values(column) -> list:
+    """Python values for an Arrow column, matching what the JSON path produces.
+
+    Decimals become floats and dates/times ISO strings, so results stay
+    JSON-serializable and agree with the DOUBLE/STRING type names above.
+    """
+    import pyarrow as pa
+    import pyarrow.types as t
+
+    if t.is_decimal(column.type):
+        return column.cast(pa.float64()).to_pylist()
+    if t.is_temporal(column.type):
+        return [None if v is None else v.isoformat() if hasattr(v, "isoformat") else str(v)
+                for v in column.to_pylist()]
+    return column.to_pylist()
+
+
+def _append_batches(result: ColumnarResult, batches) -> bool:
+    """Append Arrow record batches column-wise; returns False once the row limit is hit."""
+    for batch in batches:
+        if not result.append_columns([_column_values(column) for column in batch.columns]):
+            return False
+    return True
+
+
+# --- SQL INDEX ---
+class SQLIndex:
+    """(space, normalized question) -> the SQL Genie generated for it."""
+
+    def __init__(self, backend, ttl=SQL_INDEX_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._stats = {"captured": 0, "hits": 0, "misses": 0, "executed": 0, "failed": 0}
+
+    def count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def get(self, space_id: str, question: str):
+        """Stored SQL for the question, or None if unknown or older than the TTL."""
+        entry = self.backend.get(_cache_key(space_id, question))
+        if entry is None or (self.ttl and time.time() - entry[0] > self.ttl):
+            self.count("misses")
+            return None
+        self.count("hits")
+        return entry[1]
+
+    def put(self, space_id: str, question: str, sql: str):
+        self.backend.set(_cache_key(space_id, question), space_id, question, sql)
+        self.count("captured")
+
+    def discard(self, space_id: str, question: str):
+        """Forget the SQL for a question, e.g. after it failed to run."""
+        self.backend.delete(_cache_key(space_id, question))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+
+# --- EXECUTORS ---
+# Statement states after which there is nothing left to cancel (besides SUCCEEDED)
+_TERMINAL_STATES = ("FAILED", "CANCELED", "CLOSED")
+
+class StatementExecutor:
+    """Runs SQL on a Databricks SQL warehouse through the Statement Execution API.
+
+    Statements go through the governor of `governor_key` (the Genie space the
+    SQL came from), so the direct path shares that space's rate, concurrency
+    and 429 back-off with its Genie calls.
+    """
+
+    def __init__(self, warehouse_id: str, workspace_instance: str = None, token: str = None,
+                 session=None, wait_timeout: int = 10, governor_key: str = None):
+        from agents.genie_client import get_session, _normalize_instance, HTTP_TIMEOUT
+
+        self.warehouse_id = warehouse_id
+        self.governor_key = governor_key or f"sql:{warehouse_id}"
+        self.host = _normalize_instance(workspace_instance or DATABRICKS_HOST)
+        self.base_url = f"{self.host}/api/2.0/sql/statements"
+        self.session = session or get_session()
+        self.wait_timeout = wait_timeout
+        self.timeout = HTTP_TIMEOUT
+        self.headers = {
+            "Authorization": f"Bearer {token or DATABRICKS_TOKEN}",
+            "Content-Type": "application/json"
+        }
+
+    def _request(self, method: str, url: str, auth=True, **kwargs):
+        if auth:
+            from agents.genie_client import governed_request
+
+            return governed_request(self.session, get_governor(self.governor_key), method, url,
+                                    headers=self.headers, **kwargs)
+        # Pre-signed cloud storage links are outside the workspace's rate limits
+        resp = self.session.request(method, url, timeout=self.timeout, **kwargs)
+        s = current_span()
+        if s is not None:
+            s.add(api_calls=1, response_bytes=len(resp.content))
+        resp.raise_for_status()
+        return resp
+
+    def execute(self, sql: str, timeout_seconds=600, stop_event: threading.Event = None) -> ColumnarResult:
+        """Run a statement and return its result, following every result chunk.
+
+        Waits server-side for up to wait_timeout seconds, then polls. Setting
+        `stop_event` cancels the statement and raises CancelledError; so does
+        any other error before the statement finishes, so nothing is left
+        running on the warehouse. One governor slot is held for the whole
+        statement.
+        """
+        pa = _pyarrow()
+        body = {
+            "statement": sql, "warehouse_id": self.warehouse_id,
+            "wait_timeout": f"{self.wait_timeout}s", "on_wait_timeout": "CONTINUE",
+            "format": "ARROW_STREAM" if pa else "JSON_ARRAY",
+            "disposition": "EXTERNAL_LINKS" if pa else "INLINE",
+        }
+        start_time = time.time()
+        with span("sql.statement", warehouse_id=self.warehouse_id, arrow=pa is not None) as s, \
+                get_governor(self.governor_key).slot(stop_event) as waited:
+            s.set(queue_wait=round(waited, 3))
+            statement = self._request("POST", self.base_url, json=body).json()
+            statement_id = statement["statement_id"]
+            schedule = PollSchedule()
+            state = None
+            try:
+                while True:
+                    state = (statement.get("status") or {}).get("state")
+                    if state == "SUCCEEDED":
+                        break
+                    if state in _TERMINAL_STATES:
+                        error = (statement.get("status") or {}).get("error") or {}
+                        raise RuntimeError(f"Statement {state}: {error.get('message', '')}".rstrip(": "))
+                    remaining = timeout_seconds - (time.time() - start_time)
+                    if remaining <= 0:
+                        raise TimeoutError("Timed out waiting for SQL statement")
+                    delay = min(schedule.next_delay(state), remaining)
+                    if stop_event is not None and stop_event.wait(delay):
+                        raise CancelledError("Statement cancelled")
+                    if stop_event is None:
+                        time.sleep(delay)
+                    statement = self._request("GET", f"{self.base_url}/{statement_id}").json()
+            finally:
+                if state != "SUCCEEDED" and state not in _TERMINAL_STATES:
+                    self._cancel(statement_id)
+
+            result = ColumnarResult.from_manifest(statement.get("manifest") or {}, statement_id)
+            result.sql = sql
+            chunk = statement.get("result") or {}
+            del statement
+            while True:
+                links = chunk.get("external_links")
+                if pa is not None and links:
+                    more = all(_append_batches(result, self._arrow_batches(pa, link["external_link"]))
+                               for link in links)
+                    next_link = links[-1].get("next_chunk_internal_link")
+                else:
+                    # JSON chunks, also from a server that answered inline despite the Arrow request
+                    more = result.append_rows(chunk.get("data_array") or [])
+                    next_link = chunk.get("next_chunk_internal_link")
+                if not more or not next_link:
+                    break
+                chunk = self._request("GET", f"{self.host}{next_link}").json()
+            s.set(rows=result.row_count, truncated=result.truncated)
+            return result
+
+    def _arrow_batches(self, pa, url):
+        # External links are pre-signed cloud storage URLs: sending the workspace token is refused
+        resp = self._request("GET", url, auth=False)
+        return pa.ipc.open_stream(resp.content)
+
+    def _cancel(self, statement_id):
+        try:
+            self._request("POST", f"{self.base_url}/{statement_id}/cancel")
+        except Exception:
+            pass
+
+
+class LocalSQLExecutor:
+    """Runs SQL on a local SQLite or DuckDB database (an offline stand-in for the warehouse).
+
+    DuckDB results are streamed as Arrow record batches when pyarrow is
+    installed; otherwise rows are fetched SQL_CHUNK_ROWS at a time.
+    """
+
+    def __init__(self, path=SQL_LOCAL_DB, engine="sqlite", chunk_rows=SQL_CHUNK_ROWS):
+        self.path = path
+        self.engine = engine
+        self.chunk_rows = chunk_rows
+        self._lock = threading.Lock()
+        if engine == "duckdb":
+            import duckdb
+
+            self._conn = duckdb.connect(path)
+        elif engine == "sqlite":
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+        else:
+            raise ValueError(f"Unknown local SQL engine: {engine}")
+
+    def execute(self, sql: str, timeout_seconds=None, stop_event: threading.Event = None,
+                params=()) -> ColumnarResult:
+        with span("sql.local", engine=self.engine) as s, self._lock:
+            cur = self._conn.cursor()
+            cur.execute(sql, params)
+            columns = [d[0] for d in cur.description or []]
+            pa = _pyarrow() if self.engine == "duckdb" else None
+            if pa is not None:
+                reader = cur.fetch_record_batch(self.chunk_rows)
+                result = ColumnarResult(columns, [_arrow_type_name(f.type) for f in reader.schema], sql=sql)
+                _append_batches(result, reader)
+            else:
+                result = ColumnarResult(columns, [None] * len(columns), sql=sql)
+                while True:
+                    if stop_event is not None and stop_event.is_set():
+                        raise CancelledError("Statement cancelled")
+                    rows = cur.fetchmany(self.chunk_rows)
+                    if not rows or not result.append_rows(rows):
+                        break
+                result.types = [_python_type_name(values) for values in result.data]
+            cur.close()
+            result.total_row_count = result.row_count
+            s.set(rows=result.row_count, truncated=result.truncated)
+            return result
+
+    def run(self, sql: str, params=(), many=False):
+        """Run a statement that returns no result (DDL, inserts); `many` runs it once per params row."""
+        with self._lock:
+            if many:
+                self._conn.executemany(sql, params)
+            else:
+                self._conn.execute(sql, params)
+            if self.engine == "sqlite":  # DuckDB autocommits
+                self._conn.commit()
+
+
+def _python_type_name(values) -> str:
+    """Type name for a column of untyped (SQLite) values, from its first non-null value."""
+    for v in values:
+        if isinstance(v, bool):
+            return "BOOLEAN"
+        if isinstance(v, int):
+            return "LONG"
+        if isinstance(v, float):
+            return "DOUBLE"
+        if v is not None:
+            return "STRING"
+    return "STRING"
+
+
+_index = None
+_local = None
+_executors = {}
+_lock = threading.Lock()
+
+
+def get_sql_index():
+    """Process-wide SQL index, or None when no SQL_EXECUTOR is configured."""
+    global _index
+    with _lock:
+        if _index is None and SQL_EXECUTOR != "none":
+            _index = SQLIndex(SQLiteBackend(SQL_INDEX_PATH) if SQL_INDEX_PATH else MemoryBackend())
+        return _index
+
+
+def get_sql_executor(space_id: str):
+    """Executor for a space's SQL per SQL_EXECUTOR, or None if direct execution is off."""
+    global _local
+    if SQL_EXECUTOR == "none":
+        return None
+    with _lock:
+        if SQL_EXECUTOR in ("sqlite", "duckdb"):
+            if _local is None:
+                _local = LocalSQLExecutor(engine=SQL_EXECUTOR)
+            return _local
+        if SQL_EXECUTOR != "databricks":
+            raise ValueError(f"Unknown SQL_EXECUTOR: {SQL_EXECUTOR}")
+        from agents.spaces import space_warehouse
+
+        warehouse_id = space_warehouse(space_id) or SQL_WAREHOUSE_ID
+        if not warehouse_id:
+            return None
+        # One executor per space, so each runs under its space's governor
+        if space_id not in _executors:
+            _executors[space_id] = StatementExecutor(warehouse_id, governor_key=space_id)
+        return _executors[space_id]
@@ -0,0 +1,83 @@
+"""
+Deterministic markdown answers for simple Genie results.
+
+Most questions are answered by one space with a scalar or a small table, and
+an LLM summary of that adds a full round-trip without adding information.
+choose_summary() decides whether the consolidation LLM is needed, and
+render_answer() turns simple results into markdown with formatted numbers.
+"""
+import threading
+
+from config import TEMPLATE_FAST_PATH, TEMPLATE_MAX_ROWS, TEMPLATE_MAX_COLUMNS
+from agents.base_agent import format_result, format_value, is_failed
+from agents.query_result import ColumnarResult
+
+_lock = threading.Lock()
+_stats = {"template": 0, "llm": 0}
+_reasons = {}
+
+
+def choose_summary(results: dict):
+    """Return ("template" | "llm", reason) for a turn's per-agent results."""
+    answered = {a: r for a, r in results.items() if not is_failed(r)}
+    if not TEMPLATE_FAST_PATH:
+        return "llm", "disabled"
+    if len(answered) > 1:
+        return "llm", "multiple_sources"
+    result = next(iter(answered.values()), None)
+    if isinstance(result, ColumnarResult):
+        if result.truncated or result.total_row_count > TEMPLATE_MAX_ROWS:
+            return "llm", "too_many_rows"
+        if result.row_count == 0:
+            return "template", "empty"
+        if len(result.columns) > TEMPLATE_MAX_COLUMNS:
+            return "llm", "too_many_columns"
+        if result.row_count == 1:
+            return "template", "scalar" if len(result.columns) == 1 else "single_row"
+        return "template", "small_table"
+    if isinstance(result, dict) and isinstance(result.get("message"), dict):
+        return "template", "text"
+    return "llm", "unstructured"
+
+
+def record_summary(mode: str, reason: str):
+    with _lock:
+        _stats[mode] += 1
+        _reasons[reason] = _reasons.get(reason, 0) + 1
+
+
+def summary_stats() -> dict:
+    """How many answers were rendered by template vs. the consolidation LLM, and why."""
+    with _lock:
+        stats = dict(_stats, reasons=dict(_reasons))
+    total = stats["template"] + stats["llm"]
+    stats["template_rate"] = stats["template"] / total if total else 0.0
+    return stats
+
+
+def _label(column: str) -> str:
+    return column.replace("_", " ").capitalize()
+
+
+def _render(result) -> str:
+    if isinstance(result, ColumnarResult):
+        if result.row_count == 0:
+            return "No rows matched the question."
+        if result.row_count == 1:
+            row = next(iter(result.rows()))
+            if len(row) == 1:
+                return f"**{_label(result.columns[0])}:** {format_value(row[0])}"
+            return "\n".join(f"- **{_label(c)}:** {format_value(v)}" for c, v in zip(result.columns, row))
+        return format_result(result, max_rows=TEMPLATE_MAX_ROWS)
+    return format_result(result)
+
+
+def render_answer(results: dict) -> str:
+    """Markdown answer for a template-eligible turn; spaces that failed are noted, not guessed."""
+    parts = []
+    for agent, result in results.items():
+        if is_failed(result):
+            parts.append(f"_{agent.capitalize()} data is unavailable: {result.get('error', result['status'])}._")
+        else:
+            parts.append(f"**{agent.capitalize()}**\n\n{_render(result)}")
+    return "\n\n".join(parts)
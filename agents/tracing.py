@@ -0,0 +1,151 @@
+"""
+Lightweight in-process span recorder for end-to-end latency breakdowns.
+
+Spans nest through a context variable, so `with span("genie.poll"):` inside a
+`with span("coordinator"):` block becomes its child. Work submitted to thread
+pools keeps its parent when submitted through `contextvars.copy_context().run`
+(see `submit_in_context`). When a root span finishes it is kept in a bounded
+in-memory history and, if configured, appended to a JSONL file and/or POSTed
+to a local collector.
+"""
+import contextvars
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from config import TRACE_EXPORT_PATH, TRACE_COLLECTOR_URL, TRACE_HISTORY
+
+_current = contextvars.ContextVar("current_span", default=None)
+_history = deque(maxlen=TRACE_HISTORY)
+_local = threading.local()
+_export_lock = threading.Lock()
+
+
+class Span:
+    """One timed operation with attributes and child spans."""
+
+    __slots__ = ("name", "attrs", "start", "end", "children", "_lock")
+
+    def __init__(self, name: str, attrs: dict = None):
+        self.name = name
+        self.attrs = dict(attrs or {})
+        self.start = time.time()
+        self.end = None
+        self.children = []
+        self._lock = threading.Lock()
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.time()) - self.start
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def add(self, **counters):
+        """Increment numeric attributes (e.g. poll counts, bytes)."""
+        for key, value in counters.items():
+            self.attrs[key] = self.attrs.get(key, 0) + value
+
+    def _add_child(self, child):
+        with self._lock:
+            self.children.append(child)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            children = list(self.children)
+        return {
+            "name": self.name,
+            "start": self.start,
+            "duration": round(self.duration, 4),
+            "attrs": self.attrs,
+            "children": [c.to_dict() for c in children],
+        }
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """Record a span around the block; nested under the current span if any."""
+    parent = _current.get()
+    s = Span(name, attrs)
+    if parent is not None:
+        parent._add_child(s)
+    _current.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.set(error=f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        s.end = time.time()
+        # set() rather than reset(token): a span held open across generator
+        # yields may be closed from a different context than it was opened in
+        _current.set(parent)
+        if parent is None:
+            _finish_trace(s)
+
+
+def current_span():
+    """The innermost active span, or None outside any trace."""
+    return _current.get()
+
+
+def annotate(**attrs):
+    """Set attributes on the current span, if there is one."""
+    s = _current.get()
+    if s is not None:
+        s.set(**attrs)
+
+
+def record_usage(response):
+    """Copy OpenAI token usage from a completion onto the current span."""
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        annotate(prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens)
+
+
+def submit_in_context(executor, fn, *args, **kwargs):
+    """executor.submit() that keeps the caller's current span as parent."""
+    ctx = contextvars.copy_context()
+    return executor.submit(ctx.run, fn, *args, **kwargs)
+
+
+def _finish_trace(root: Span):
+    trace = root.to_dict()
+    _history.append(trace)
+    _local.last = trace
+    if TRACE_EXPORT_PATH:
+        with _export_lock, open(TRACE_EXPORT_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(trace, default=str) + "\n")
+    if TRACE_COLLECTOR_URL:
+        try:
+            import requests
+            requests.post(TRACE_COLLECTOR_URL, json=trace, timeout=2)
+        except Exception as e:
+            print(f"⚠️ Trace export failed: {e}")
+
+
+def last_trace():
+    """The most recent finished trace recorded on this thread."""
+    return getattr(_local, "last", None)
+
+
+def recent_traces() -> list:
+    """Recently finished traces from all threads, oldest first."""
+    return list(_history)
+
+
+def format_breakdown(trace: dict) -> str:
+    """Indented per-span timing breakdown of a trace."""
+    lines = []
+
+    def walk(node, depth):
+        attrs = " ".join(f"{k}={v}" for k, v in node["attrs"].items() if not isinstance(v, (dict, list)))
+        lines.append(f"{'  ' * depth}{node['name']:<{32 - 2 * depth}} {node['duration']:>8.3f}s  {attrs}".rstrip())
+        for child in node["children"]:
+            walk(child, depth + 1)
+
+    if trace:
+        walk(trace, 0)
+    return "\n".join(lines)
@@ -0,0 +1,214 @@
+"""
+Precomputed answers for known dashboard questions.
+
+A small registry of canonical questions (the ones executives ask over and
+over) is refreshed in the background on a cron-like schedule. Each refresh
+runs the full coordinator pipeline and stores the routed Genie results and
+the final summary. The coordinator then answers those questions straight from
+the store, marking answers older than WARMUP_STALE_AFTER as stale.
+
+    python main.py warmup          # refresh on WARMUP_SCHEDULE until stopped
+    python main.py warmup --once   # refresh everything once and exit
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from config import (
+    WARMUP_SCHEDULE, WARMUP_STALE_AFTER, WARMUP_MAX_AGE, WARMUP_STORE_PATH, WARMUP_QUESTIONS,
+)
+from agents.base_agent import is_failed
+from agents.query_result import encode_result, decode_result
+from agents.result_cache import MemoryBackend, SQLiteBackend, _cache_key
+
+# Dashboard questions, keyed by the CoordinatorAgent demo method that asks them
+DEMO_QUESTIONS = {
+    "analyze_revenue_vs_churn": "What regions have high revenue but high customer churn?",
+    "compare_sales_with_segments": "Compare sales performance with customer segments",
+    "analyze_premium_customer_categories": "Which product categories appeal to Premium customers?",
+}
+
+# Questions kept warm: the demo questions unless WARMUP_QUESTIONS replaces them
+CANONICAL_QUESTIONS = WARMUP_QUESTIONS or DEMO_QUESTIONS
+
+_STORE_SPACE = "__warmup__"
+
+
+# --- SCHEDULE ---
+def _parse_field(field: str, lo: int, hi: int) -> set:
+    """Values allowed by one cron field: *, */n, a, a/n (a to the max), a-b, a-b/n, and comma lists."""
+    values = set()
+    for part in field.split(","):
+        spec, _, step = part.partition("/")
+        if spec == "*":
+            start, end = lo, hi
+        elif "-" in spec:
+            start, end = (int(v) for v in spec.split("-", 1))
+        else:
+            start = int(spec)
+            end = hi if step else start
+        if start < lo or end > hi:
+            raise ValueError(f"Cron field {part!r} out of range {lo}-{hi}")
+        values.update(range(start, end + 1, int(step) if step else 1))
+    return values
+
+
+class CronSchedule:
+    """5-field cron expression: minute hour day-of-month month day-of-week (0 = Sunday).
+
+    As in standard cron, when both day fields are restricted (neither starts
+    with *) a day matches if either does: "0 6 1 * 1" fires on the 1st and
+    on every Monday.
+    """
+
+    def __init__(self, expr: str):
+        fields = expr.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expr!r}")
+        self.expr = expr
+        self.minutes = _parse_field(fields[0], 0, 59)
+        self.hours = _parse_field(fields[1], 0, 23)
+        self.days = _parse_field(fields[2], 1, 31)
+        self.months = _parse_field(fields[3], 1, 12)
+        self.weekdays = {d % 7 for d in _parse_field(fields[4], 0, 7)}
+        self.either_day = not fields[2].startswith("*") and not fields[4].startswith("*")
+
+    def matches(self, dt: datetime) -> bool:
+        if not (dt.minute in self.minutes and dt.hour in self.hours and dt.month in self.months):
+            return False
+        day_ok = dt.day in self.days
+        weekday_ok = (dt.weekday() + 1) % 7 in self.weekdays
+        return day_ok or weekday_ok if self.either_day else day_ok and weekday_ok
+
+    def next_after(self, dt: datetime) -> datetime:
+        """The first matching minute strictly after dt."""
+        candidate = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        for _ in range(366 * 24 * 60):
+            if self.matches(candidate):
+                return candidate
+            candidate += timedelta(minutes=1)
+        raise ValueError(f"Cron expression never matches: {self.expr!r}")
+
+
+# --- STORE ---
+class WarmStore:
+    """Precomputed answers keyed by normalized question."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def put(self, question: str, answer: str, results: dict = None):
+        value = {
+            "question": question,
+            "answer": answer,
+            "results": {agent: encode_result(r) for agent, r in (results or {}).items()},
+        }
+        self.backend.set(_cache_key(_STORE_SPACE, question), _STORE_SPACE, question, value)
+
+    def get(self, question: str, max_age: float = WARMUP_MAX_AGE):
+        """Return the stored entry plus refreshed_at/age/stale, or None if missing or too old."""
+        entry = self.backend.get(_cache_key(_STORE_SPACE, question))
+        if entry is None:
+            return None
+        stored_at, value = entry
+        age = time.time() - stored_at
+        if max_age and age > max_age:
+            return None
+        return dict(
+            value,
+            results={agent: decode_result(r) for agent, r in value.get("results", {}).items()},
+            refreshed_at=stored_at,
+            age=age,
+            stale=age > WARMUP_STALE_AFTER,
+        )
+
+
+def staleness_note(entry: dict) -> str:
+    """One-line indicator of how old a precomputed answer is."""
+    minutes = int(entry["age"] // 60)
+    age = f"{minutes} min" if minutes < 120 else f"{minutes // 60} h"
+    refreshed = datetime.fromtimestamp(entry["refreshed_at"]).strftime("%Y-%m-%d %H:%M")
+    if entry["stale"]:
+        return f"⚠️ Precomputed answer, may be stale: last refreshed {age} ago ({refreshed})."
+    return f"⚡ Precomputed answer, refreshed {age} ago ({refreshed})."
+
+
+_store = None
+_store_on_disk = False
+_store_lock = threading.Lock()
+
+
+def get_warm_store(create: bool = False) -> WarmStore:
+    """Return the process-wide store; with a path it is shared with the warm-up process.
+
+    Only the warm-up job (create=True) creates the store file. Other processes
+    open it once it exists and use an empty in-memory store until then, so
+    importing the coordinator never leaves a SQLite file behind.
+    """
+    global _store, _store_on_disk
+    with _store_lock:
+        on_disk = bool(WARMUP_STORE_PATH) and (create or os.path.exists(WARMUP_STORE_PATH))
+        if _store is None or (on_disk and not _store_on_disk):
+            _store = WarmStore(SQLiteBackend(path=WARMUP_STORE_PATH) if on_disk else MemoryBackend())
+            _store_on_disk = on_disk
+        return _store
+
+
+# --- WARMER ---
+class Warmer:
+    """Refreshes the canonical questions on a cron schedule in a background thread."""
+
+    def __init__(self, questions: dict = None, schedule: str = WARMUP_SCHEDULE, store: WarmStore = None):
+        self.questions = dict(questions or CANONICAL_QUESTIONS)
+        self.schedule = CronSchedule(schedule)
+        self.store = store or get_warm_store(create=True)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def refresh(self, names=None) -> dict:
+        """Recompute the given questions (all by default); returns status per name."""
+        from agents.coordinator import coordinator_stream
+
+        statuses = {}
+        for name in names or self.questions:
+            question = self.questions[name]
+            start = time.perf_counter()
+            try:
+                done = None
+                for event in coordinator_stream(question, use_precomputed=False):
+                    done = event
+                if not done.get("results"):
+                    raise RuntimeError(done.get("answer", "no results"))
+                failed = [agent for agent, r in done["results"].items() if is_failed(r)]
+                if failed and self.store.get(question, max_age=0) is not None:
+                    # Keep serving the last complete answer rather than a partial one
+                    raise RuntimeError(f"{', '.join(failed)} unavailable, kept previous answer")
+                self.store.put(question, done["answer"], done["results"])
+                statuses[name] = "ok"
+                print(f"🔥 Warmed '{name}' in {time.perf_counter() - start:.1f}s")
+            except Exception as e:
+                statuses[name] = f"error: {e}"
+                print(f"⚠️ Warm-up of '{name}' failed: {e}")
+        return statuses
+
+    def run_forever(self):
+        """Refresh once now, then at every scheduled minute until stop() is called."""
+        self.refresh()
+        while not self._stop.is_set():
+            next_run = self.schedule.next_after(datetime.now())
+            print(f"⏰ Next warm-up at {next_run:%Y-%m-%d %H:%M}")
+            if self._stop.wait(max(0.0, (next_run - datetime.now()).total_seconds())):
+                break
+            self.refresh()
+
+    def start(self):
+        """Run the schedule in a daemon thread (e.g. alongside the UI)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run_forever, name="warmup", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
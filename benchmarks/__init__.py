@@ -0,0 +1,3 @@
+"""
+Offline benchmarks: a mock Genie/OpenAI server and load-test harnesses.
+"""
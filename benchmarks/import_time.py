@@ -0,0 +1,118 @@
+"""
+Cold-start import benchmark.
+
+Imports each module in a fresh interpreter with `python -X importtime`,
+keeps the best of --repeat runs and reports the cumulative import time plus
+the slowest imports it pulled in. The exit code is non-zero when any module
+exceeds the --max-ms budget (DEFAULT_MAX_MS unless given; 0 disables it), so
+a heavy top-level import fails CI.
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time main agents.coordinator --max-ms 300
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+DEFAULT_MODULES = ["main", "agents", "agents.coordinator", "agents.batch"]
+
+# Generous next to today's cold starts (well under 200ms), but importing pandas,
+# openai or duckdb at module level on its own blows through it
+DEFAULT_MAX_MS = 400.0
+
+# Imported on first use only; none of them may load when a command starts
+HEAVY_MODULES = ["pandas", "openai", "duckdb", "pyarrow", "tenacity", "langchain"]
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+# Dummy settings so config validation and client construction never hit the network
+_ENV = {
+    "DATABRICKS_HOST": "http://127.0.0.1:9",
+    "DATABRICKS_TOKEN": "import-time",
+    "SALES_GENIE_SPACE_ID": "sales",
+    "CUSTOMER_GENIE_SPACE_ID": "customer",
+    "OPENAI_API_KEY": "import-time",
+    "RESULT_CACHE_BACKEND": "memory",
+    "WARMUP_STORE_PATH": "",
+}
+
+
+def _run(code: str, *flags) -> subprocess.CompletedProcess:
+    """Run `code` in a fresh interpreter from the repo root with the dummy settings."""
+    return subprocess.run([sys.executable, *flags, "-c", code], capture_output=True, text=True,
+                          env=dict(os.environ, **_ENV),
+                          cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def heavy_imports(module: str) -> list:
+    """The HEAVY_MODULES that a cold import of `module` loads."""
+    proc = _run(f"import sys, {module}; print(' '.join(sorted(sys.modules)))")
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr.strip().splitlines()[-1]}")
+    loaded = set(proc.stdout.split())
+    return [name for name in HEAVY_MODULES if name in loaded]
+
+
+def measure(module: str) -> dict:
+    """One cold import of `module`: total time and its slowest direct imports, in ms."""
+    proc = _run(f"import {module}", "-X", "importtime")
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr.strip().splitlines()[-1]}")
+    # -X importtime prints children before their parent, so the lines since the
+    # previous top-level import are the ones this module pulled in
+    total, children = 0, []
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if not m:
+            continue
+        cumulative, depth, name = int(m.group(2)), (len(m.group(3)) - 1) // 2 + 1, m.group(4)
+        if depth == 1:
+            if name == module:
+                total = cumulative
+                break
+            children = []
+        elif depth == 2:
+            children.append((name, cumulative))
+    slowest = sorted(children, key=lambda item: -item[1])[:5]
+    return {"ms": round(total / 1000, 1), "slowest": {name: round(us / 1000, 1) for name, us in slowest}}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per module; the fastest counts")
+    parser.add_argument("--json", metavar="PATH", help="also write the report as JSON")
+    parser.add_argument("--max-ms", type=float, default=DEFAULT_MAX_MS,
+                        help=f"fail if any module takes longer to import than this (default {DEFAULT_MAX_MS:g}; 0 disables)")
+    opts = parser.parse_args(argv)
+
+    report = {}
+    for module in opts.modules:
+        try:
+            runs = [measure(module) for _ in range(max(1, opts.repeat))]
+        except RuntimeError as e:
+            print(e, file=sys.stderr)
+            report[module] = {"error": str(e)}
+            continue
+        report[module] = min(runs, key=lambda r: r["ms"])
+
+    print(json.dumps(report, indent=2))
+    if opts.json:
+        with open(opts.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    failed = [f"{m} failed to import" for m, r in report.items() if "error" in r]
+    if opts.max_ms:
+        failed += [f"{m} {r['ms']}ms > {opts.max_ms}ms" for m, r in report.items()
+                   if "ms" in r and r["ms"] > opts.max_ms]
+    if failed:
+        print("Budget exceeded: " + "; ".join(failed), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
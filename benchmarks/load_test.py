@@ -0,0 +1,163 @@
+"""
+Offline load test for the coordinator and the Genie client.
+
+Starts the mock Genie/OpenAI server in-process, points the agents at it and
+drives N concurrent users. Reports p50/p95/p99 latency, questions per second
+and API calls per question. With --max-p95 / --max-calls-per-question the
+exit code is non-zero when a budget is exceeded, so regressions fail CI.
+
+    python -m benchmarks.load_test --users 8 --questions 40
+    python -m benchmarks.load_test --target genie --users 32 --max-p95 3.0
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.mock_server import start_server
+
+QUESTIONS = [
+    "What is the total revenue?",
+    "Show customer segments",
+    "What regions have high revenue but high customer churn?",
+    "Compare sales performance with customer segments",
+    "Which product categories appeal to Premium customers?",
+    "Show revenue by category for the North region",
+    "How many customers churned last quarter?",
+]
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100.0
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def _rounded(value):
+    if isinstance(value, float):
+        return round(value, 3)
+    if isinstance(value, dict):
+        return {k: _rounded(v) for k, v in value.items()}
+    return value
+
+
+def configure_environment(base_url: str, cache: bool, speculative: bool = False):
+    """Point config.py at the mock server; must run before any agents import."""
+    os.environ.update({
+        "SPECULATIVE_DISPATCH": "true" if speculative else "false",
+        "DATABRICKS_HOST": base_url,
+        "DATABRICKS_TOKEN": "mock-token",
+        "SALES_GENIE_SPACE_ID": "mock-sales",
+        "CUSTOMER_GENIE_SPACE_ID": "mock-customer",
+        "OPENAI_API_KEY": "mock-key",
+        "OPENAI_BASE_URL": f"{base_url}/v1",
+        "RESULT_CACHE_BACKEND": "memory" if cache else "none",
+        # A warm store left by `main.py warmup` would answer from disk and skew latencies
+        "WARMUP_STORE_PATH": "",
+    })
+
+
+def run(target: str, users: int, questions: int, unique: bool):
+    if target == "coordinator":
+        from agents.coordinator import coordinator as ask
+    else:
+        from agents.genie_client import get_genie_client
+        from config import SALES_GENIE_SPACE_ID
+        ask = get_genie_client(SALES_GENIE_SPACE_ID).query
+
+    def one(i):
+        question = QUESTIONS[i % len(QUESTIONS)]
+        if unique:
+            question = f"{question} (run {i})"
+        start = time.perf_counter()
+        try:
+            ask(question)
+            return time.perf_counter() - start, None
+        except Exception as e:
+            return time.perf_counter() - start, str(e)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        outcomes = list(pool.map(one, range(questions)))
+    return outcomes, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=["coordinator", "genie"], default="coordinator")
+    parser.add_argument("--users", type=int, default=8, help="concurrent users")
+    parser.add_argument("--questions", type=int, default=40, help="total questions to ask")
+    parser.add_argument("--genie-latency", default="lognormal:1.0,0.5")
+    parser.add_argument("--llm-latency", default="fixed:0.05")
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of Genie starts answered 429")
+    parser.add_argument("--cache", action="store_true", help="keep the result cache enabled")
+    parser.add_argument("--repeat", action="store_true",
+                        help="reuse the same few questions instead of making each one unique")
+    parser.add_argument("--speculative", action="store_true",
+                        help="start likely Genies while the routing LLM runs (reports hit rate and time saved)")
+    parser.add_argument("--json", metavar="PATH", help="also write the report as JSON")
+    parser.add_argument("--max-p95", type=float, help="fail if p95 latency (s) exceeds this")
+    parser.add_argument("--max-calls-per-question", type=float, help="fail if API calls per question exceed this")
+    opts = parser.parse_args(argv)
+
+    server, state, base_url = start_server(genie_latency=opts.genie_latency, llm_latency=opts.llm_latency,
+                                           rows=opts.rows, failure_rate=opts.failure_rate,
+                                           throttle_rate=opts.throttle_rate)
+    configure_environment(base_url, opts.cache, opts.speculative)
+    try:
+        outcomes, elapsed = run(opts.target, opts.users, opts.questions, unique=not opts.repeat)
+    finally:
+        server.shutdown()
+
+    latencies = [t for t, _ in outcomes]
+    errors = [e for _, e in outcomes if e]
+    api_calls = sum(state.calls.values())
+    report = {
+        "target": opts.target,
+        "users": opts.users,
+        "questions": len(outcomes),
+        "errors": len(errors),
+        "elapsed_s": round(elapsed, 3),
+        "questions_per_s": round(len(outcomes) / elapsed, 3) if elapsed else 0.0,
+        "p50_s": round(percentile(latencies, 50), 3),
+        "p95_s": round(percentile(latencies, 95), 3),
+        "p99_s": round(percentile(latencies, 99), 3),
+        "api_calls": dict(state.calls),
+        "api_calls_per_question": round(api_calls / max(1, len(outcomes)), 2),
+    }
+    from agents.coordinator import runtime_stats
+    stats = _rounded(runtime_stats())
+    if opts.target != "coordinator":
+        for key in ("routing", "speculation", "summary"):
+            stats.pop(key)
+    elif not opts.speculative:
+        stats.pop("speculation")
+    report.update(stats)
+
+    print(json.dumps(report, indent=2))
+    if errors:
+        print(f"First error: {errors[0]}", file=sys.stderr)
+    if opts.json:
+        with open(opts.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    failed = []
+    if opts.max_p95 is not None and report["p95_s"] > opts.max_p95:
+        failed.append(f"p95 {report['p95_s']}s > {opts.max_p95}s")
+    if opts.max_calls_per_question is not None and report["api_calls_per_question"] > opts.max_calls_per_question:
+        failed.append(f"{report['api_calls_per_question']} API calls/question > {opts.max_calls_per_question}")
+    if failed:
+        print("Budget exceeded: " + "; ".join(failed), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,372 @@
+"""
+Local stand-in for the Databricks Genie REST API and the OpenAI chat API.
+
+Implements the endpoints the agents use:
+  POST /api/2.0/genie/spaces/{space}/start-conversation
+  POST /api/2.0/genie/spaces/{space}/conversations/{conv}/messages
+  GET  /api/2.0/genie/spaces/{space}/conversations/{conv}/messages/{msg}
+  GET  .../messages/{msg}/attachments/{att}/query-result
+  POST /api/2.0/sql/statements  (runs the SQL attached to a completed message)
+  GET  /api/2.0/sql/statements/{statement}/result/chunks/{n}
+  GET  /_arrow/{statement}/{n} (external link to an Arrow IPC chunk; needs pyarrow)
+  POST /v1/chat/completions   (routing JSON, plain and stream=True summaries)
+  POST /v1/embeddings
+  GET  /_stats                (API call counts per endpoint)
+
+An optional fraction of start-conversation calls is answered with 429 and
+Retry-After to exercise client-side throttling.
+
+Each Genie message moves through ASKING_AI -> EXECUTING_QUERY -> COMPLETED
+over a completion time drawn from a configurable latency distribution, and
+returns a generated table of configurable size (chunked like the SQL
+statement API). Re-running a message's generated SQL through the statement
+endpoint returns the same table after --sql-latency, without the NL step.
+
+Run standalone:
+    python -m benchmarks.mock_server --port 8765 --genie-latency lognormal:1.0,0.5 --rows 200
+"""
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+REGIONS = ["North", "South", "East", "West", "Central"]
+SEGMENTS = ["Premium", "Standard", "Basic"]
+CATEGORIES = ["Electronics", "Clothing", "Home", "Sports", "Books"]
+
+
+def parse_latency(spec: str):
+    """Return a sampler from "fixed:S", "uniform:A,B", "normal:MU,SIGMA" or "lognormal:MU,SIGMA" (seconds)."""
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",") if v]
+    if kind == "fixed":
+        return lambda: values[0]
+    if kind == "uniform":
+        return lambda: random.uniform(values[0], values[1])
+    if kind == "normal":
+        return lambda: max(0.0, random.gauss(values[0], values[1]))
+    if kind == "lognormal":
+        # MU is the median in seconds, SIGMA the spread of log(latency)
+        return lambda: random.lognormvariate(math.log(values[0]), values[1])
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+class MockState:
+    """Conversations, messages and counters shared by all request handlers."""
+
+    def __init__(self, genie_latency="lognormal:1.0,0.5", llm_latency="fixed:0.05",
+                 rows=100, chunk_rows=1000, failure_rate=0.0, throttle_rate=0.0, sql_latency="fixed:0.2"):
+        self.genie_latency = parse_latency(genie_latency)
+        self.llm_latency = parse_latency(llm_latency)
+        self.sql_latency = parse_latency(sql_latency)
+        self.rows = rows
+        self.chunk_rows = chunk_rows
+        self.failure_rate = failure_rate
+        self.throttle_rate = throttle_rate
+        self.messages = {}
+        self.statements = {}
+        self.calls = {}
+        self.lock = threading.Lock()
+
+    def count(self, endpoint: str):
+        with self.lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+
+    def new_message(self, space_id, conversation_id, content):
+        message_id = uuid.uuid4().hex[:16]
+        failed = random.random() < self.failure_rate
+        with self.lock:
+            self.messages[message_id] = {
+                "space_id": space_id, "conversation_id": conversation_id, "content": content,
+                "created": time.time(), "duration": self.genie_latency(), "failed": failed,
+            }
+        return message_id
+
+    def message_status(self, message_id):
+        msg = self.messages[message_id]
+        progress = (time.time() - msg["created"]) / max(msg["duration"], 1e-6)
+        if progress >= 1:
+            return "FAILED" if msg["failed"] else "COMPLETED"
+        if progress >= 0.5:
+            return "EXECUTING_QUERY"
+        return "ASKING_AI"
+
+    def table(self, space_id, content):
+        """Deterministic table for a (space, question) pair."""
+        seed = int(hashlib.md5(f"{space_id}:{content}".encode()).hexdigest()[:8], 16)
+        rng = random.Random(seed)
+        space = space_id.lower()
+        if "customer" in space or ("sales" not in space and "customer" in content.lower()):
+            columns = [("region", "STRING"), ("segment", "STRING"), ("customers", "LONG"), ("churn_rate", "DOUBLE")]
+            rows = [[rng.choice(REGIONS), rng.choice(SEGMENTS), str(rng.randint(10, 5000)),
+                     f"{rng.random() * 0.3:.4f}"] for _ in range(self.rows)]
+        else:
+            columns = [("region", "STRING"), ("category", "STRING"), ("revenue", "DOUBLE"), ("units", "LONG")]
+            rows = [[rng.choice(REGIONS), rng.choice(CATEGORIES), f"{rng.uniform(100, 100000):.2f}",
+                     str(rng.randint(1, 1000))] for _ in range(self.rows)]
+        return columns, rows
+
+
+def _quote(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+_MOCK_SQL = re.compile(r"space_id = '((?:[^']|'')*)' AND question = '((?:[^']|'')*)'")
+
+
+def make_handler(state: MockState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, obj, code=200):
+            body = json.dumps(obj).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_bytes(self, body: bytes, content_type: str):
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _throttled(self):
+            body = b'{"error_code": "RESOURCE_EXHAUSTED"}'
+            self.send_response(429)
+            self.send_header("Retry-After", "1")
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _body(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        # --- Request dispatch ---
+        def do_POST(self):
+            path = self.path.split("?")[0]
+            body = self._body()
+
+            m = re.fullmatch(r"/api/2\.0/genie/spaces/([^/]+)/start-conversation", path)
+            if m and random.random() < state.throttle_rate:
+                state.count("throttled")
+                return self._throttled()
+            if m:
+                state.count("start-conversation")
+                conversation_id = uuid.uuid4().hex[:16]
+                message_id = state.new_message(m.group(1), conversation_id, body.get("content", ""))
+                return self._send({"conversation": {"id": conversation_id},
+                                   "message": {"id": message_id, "status": "SUBMITTED"}})
+
+            m = re.fullmatch(r"/api/2\.0/genie/spaces/([^/]+)/conversations/([^/]+)/messages", path)
+            if m:
+                state.count("send-message")
+                message_id = state.new_message(m.group(1), m.group(2), body.get("content", ""))
+                return self._send({"message": {"id": message_id, "status": "SUBMITTED"}})
+
+            if path == "/api/2.0/sql/statements":
+                state.count("sql-statement")
+                m = _MOCK_SQL.search(body.get("statement", ""))
+                if not m:
+                    return self._send({"error_code": "BAD_REQUEST", "message": "unknown table"}, 400)
+                time.sleep(state.sql_latency())
+                space_id, content = (g.replace("''", "'") for g in m.groups())
+                arrow = body.get("format") == "ARROW_STREAM" and body.get("disposition") == "EXTERNAL_LINKS"
+                return self._send(self._statement(*state.table(space_id, content), arrow=arrow))
+
+            if path.endswith("/chat/completions"):
+                state.count("chat-completions")
+                return self._chat(body)
+
+            if path.endswith("/embeddings"):
+                state.count("embeddings")
+                text = body.get("input") or ""
+                vec = [((hash((text, i)) % 1000) / 1000.0) for i in range(32)]
+                return self._send({"object": "list", "model": body.get("model"),
+                                   "data": [{"object": "embedding", "index": 0, "embedding": vec}],
+                                   "usage": {"prompt_tokens": 1, "total_tokens": 1}})
+
+            self._send({"error": "not found"}, 404)
+
+        def do_GET(self):
+            path = self.path.split("?")[0]
+
+            if path == "/_stats":
+                with state.lock:
+                    return self._send(dict(state.calls))
+
+            m = re.fullmatch(r"/api/2\.0/sql/statements/([^/]+)/result/chunks/(\d+)", path)
+            if m:
+                state.count("result-chunk")
+                return self._send(self._chunk(m.group(1), int(m.group(2))))
+
+            m = re.fullmatch(r"/_arrow/([^/]+)/(\d+)", path)
+            if m:
+                state.count("arrow-chunk")
+                return self._send_bytes(self._arrow_chunk(m.group(1), int(m.group(2))),
+                                        "application/vnd.apache.arrow.stream")
+
+            m = re.fullmatch(r"/api/2\.0/genie/spaces/([^/]+)/conversations/([^/]+)/messages/([^/]+)"
+                             r"(/attachments/([^/]+)/query-result)?", path)
+            if not m or m.group(3) not in state.messages:
+                return self._send({"error": "not found"}, 404)
+            message_id = m.group(3)
+            msg = state.messages[message_id]
+
+            if m.group(4):
+                state.count("query-result")
+                return self._send(self._query_result(msg))
+
+            state.count("get-message")
+            status = state.message_status(message_id)
+            payload = {"id": message_id, "conversation_id": msg["conversation_id"], "status": status}
+            if status == "COMPLETED":
+                payload["attachments"] = [{
+                    "attachment_id": f"att-{message_id}",
+                    "query": {"query": f"SELECT * FROM mock WHERE space_id = {_quote(msg['space_id'])}"
+                                       f" AND question = {_quote(msg['content'])}",
+                              "description": msg["content"]},
+                }]
+            self._send(payload)
+
+        def _query_result(self, msg):
+            return {"statement_response": self._statement(*state.table(msg["space_id"], msg["content"]))}
+
+        def _statement(self, columns, rows, arrow=False):
+            """A SUCCEEDED statement; arrow=True answers ARROW_STREAM + EXTERNAL_LINKS requests."""
+            statement_id = uuid.uuid4().hex[:16]
+            with state.lock:
+                state.statements[statement_id] = {"columns": columns, "rows": rows, "arrow": arrow}
+            total_chunks = max(1, -(-len(rows) // state.chunk_rows))
+            return {
+                "statement_id": statement_id,
+                "status": {"state": "SUCCEEDED"},
+                "manifest": {
+                    "format": "ARROW_STREAM" if arrow else "JSON_ARRAY",
+                    "schema": {"column_count": len(columns), "columns": [
+                        {"name": n, "type_name": t, "position": i} for i, (n, t) in enumerate(columns)]},
+                    "total_row_count": len(rows), "total_chunk_count": total_chunks, "truncated": False,
+                },
+                "result": self._chunk(statement_id, 0),
+            }
+
+        def _chunk(self, statement_id, index):
+            statement = state.statements.get(statement_id) or {"rows": [], "arrow": False}
+            rows = statement["rows"]
+            start = index * state.chunk_rows
+            count = len(rows[start:start + state.chunk_rows])
+            chunk = {"chunk_index": index, "row_offset": start, "row_count": count}
+            next_link = None
+            if start + state.chunk_rows < len(rows):
+                chunk["next_chunk_index"] = index + 1
+                next_link = f"/api/2.0/sql/statements/{statement_id}/result/chunks/{index + 1}"
+            if statement["arrow"]:
+                link = {"chunk_index": index, "row_offset": start, "row_count": count,
+                        "external_link": f"http://{self.headers['Host']}/_arrow/{statement_id}/{index}"}
+                if next_link:
+                    link["next_chunk_internal_link"] = next_link
+                chunk["external_links"] = [link]
+            else:
+                chunk["data_array"] = rows[start:start + state.chunk_rows]
+                if next_link:
+                    chunk["next_chunk_internal_link"] = next_link
+            return chunk
+
+        def _arrow_chunk(self, statement_id, index) -> bytes:
+            import pyarrow as pa
+
+            statement = state.statements[statement_id]
+            rows = statement["rows"][index * state.chunk_rows:(index + 1) * state.chunk_rows]
+            convert = {"LONG": (int, pa.int64()), "DOUBLE": (float, pa.float64())}
+            arrays, fields = [], []
+            for i, (name, type_name) in enumerate(statement["columns"]):
+                cast, arrow_type = convert.get(type_name, (str, pa.string()))
+                arrays.append(pa.array([cast(r[i]) for r in rows], type=arrow_type))
+                fields.append(pa.field(name, arrow_type))
+            batch = pa.record_batch(arrays, schema=pa.schema(fields))
+            sink = pa.BufferOutputStream()
+            with pa.ipc.new_stream(sink, batch.schema) as writer:
+                writer.write_batch(batch)
+            return sink.getvalue().to_pybytes()
+
+        # --- OpenAI ---
+        def _chat(self, body):
+            time.sleep(state.llm_latency())
+            question = body["messages"][-1]["content"]
+            if body.get("response_format", {}).get("type") == "json_object":
+                # Route to the registry spaces named in the question (all of them if none is)
+                spaces = re.findall(r"^\s*- (\w+):", body["messages"][0]["content"], re.MULTILINE)
+                agents = [a for a in spaces
+                          if a in question.lower() or (a == "sales" and "revenue" in question.lower())]
+                agents = agents or spaces
+                content = json.dumps({"agents": agents, "subqueries": {a: question for a in agents}})
+            else:
+                content = f"Mock summary ({len(question)} prompt characters)."
+            usage = {"prompt_tokens": len(question) // 4, "completion_tokens": len(content) // 4,
+                     "total_tokens": (len(question) + len(content)) // 4}
+            base = {"id": "chatcmpl-mock", "created": int(time.time()), "model": body.get("model", "mock")}
+
+            if not body.get("stream"):
+                return self._send({**base, "object": "chat.completion", "usage": usage, "choices": [
+                    {"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}]})
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            for word in content.split(" "):
+                chunk = {**base, "object": "chat.completion.chunk",
+                         "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            if (body.get("stream_options") or {}).get("include_usage"):
+                chunk = {**base, "object": "chat.completion.chunk", "choices": [], "usage": usage}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.close_connection = True
+
+    return Handler
+
+
+def start_server(port=0, **state_kwargs):
+    """Start the mock server on a background thread; returns (server, state, base_url)."""
+    state = MockState(**state_kwargs)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--genie-latency", default="lognormal:1.0,0.5")
+    parser.add_argument("--llm-latency", default="fixed:0.05")
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--chunk-rows", type=int, default=1000)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of start-conversation calls answered 429")
+    parser.add_argument("--sql-latency", default="fixed:0.2", help="latency of direct SQL statement execution")
+    opts = parser.parse_args()
+
+    server, _, url = start_server(opts.port, genie_latency=opts.genie_latency, llm_latency=opts.llm_latency,
+                                  rows=opts.rows, chunk_rows=opts.chunk_rows, failure_rate=opts.failure_rate,
+                                  throttle_rate=opts.throttle_rate, sql_latency=opts.sql_latency)
+    print(f"Mock Genie/OpenAI server on {url}")
+    print(f"  DATABRICKS_HOST={url}  OPENAI_BASE_URL={url}/v1")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -9,6 +9,7 @@ Set values via environment variables or edit this file if you prefer hardcoding
 for local development (not recommended for production).
 """
 import os
+import json
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -32,12 +33,221 @@ LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
 # General agent settings
 MAX_RETRIES = int(os.getenv("MAX_RETRIES", "3"))
 RETRY_DELAY = int(os.getenv("RETRY_DELAY", "2"))
+# HTTP timeouts (seconds) for every Genie / SQL request: connecting, and each
+# read on the socket, so a stalled connection cannot hold a pool thread forever
 TIMEOUT = int(os.getenv("TIMEOUT", "30"))
+CONNECT_TIMEOUT = float(os.getenv("CONNECT_TIMEOUT", "10"))
+
+# Genie HTTP connection pool: max keep-alive connections shared by all spaces
+GENIE_POOL_SIZE = int(os.getenv("GENIE_POOL_SIZE", "16"))
+
+# Genie status polling: start fast, back off exponentially with jitter up to a
+# cap. The schedule resets whenever the message status changes, and statuses
+# listed in POLL_STATUS_MAX_INTERVAL use their own (tighter) cap.
+POLL_INITIAL_INTERVAL = float(os.getenv("POLL_INITIAL_INTERVAL", "0.25"))
+POLL_MAX_INTERVAL = float(os.getenv("POLL_MAX_INTERVAL", "10"))
+POLL_BACKOFF = float(os.getenv("POLL_BACKOFF", "1.6"))
+POLL_JITTER = float(os.getenv("POLL_JITTER", "0.2"))
+POLL_STATUS_MAX_INTERVAL = {
+    "EXECUTING_QUERY": float(os.getenv("POLL_EXECUTING_MAX_INTERVAL", "2")),
+    "ASKING_AI": float(os.getenv("POLL_ASKING_AI_MAX_INTERVAL", "3")),
+}
+
+# Genie result cache: keyed by space ID + normalized question.
+# RESULT_CACHE_BACKEND is "memory", "sqlite" (shared across processes) or "none".
+# With RESULT_CACHE_SEMANTIC enabled, questions whose embedding is at least
+# RESULT_CACHE_SIMILARITY cosine-similar to a cached one also count as hits.
+RESULT_CACHE_BACKEND = os.getenv("RESULT_CACHE_BACKEND", "memory").lower()
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "900"))
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "512"))
+RESULT_CACHE_PATH = os.getenv("RESULT_CACHE_PATH", ".genie_cache.sqlite")
+RESULT_CACHE_SEMANTIC = os.getenv("RESULT_CACHE_SEMANTIC", "false").lower() in ("1", "true", "yes")
+RESULT_CACHE_SIMILARITY = float(os.getenv("RESULT_CACHE_SIMILARITY", "0.92"))
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+
+# Routing: obvious single-domain questions are routed by keyword without an
+# LLM call; LLM routing decisions are cached per normalized question.
+LOCAL_ROUTER_ENABLED = os.getenv("LOCAL_ROUTER_ENABLED", "true").lower() in ("1", "true", "yes")
+ROUTING_CACHE_TTL = float(os.getenv("ROUTING_CACHE_TTL", "3600"))
+ROUTING_CACHE_MAX_ENTRIES = int(os.getenv("ROUTING_CACHE_MAX_ENTRIES", "1024"))
+
+# Speculative dispatch: while the routing LLM runs, start the raw question on
+# the space(s) that were picked for at least SPECULATIVE_MIN_SHARE of the last
+# ROUTING_HISTORY_SIZE LLM routing decisions (once SPECULATIVE_MIN_HISTORY are
+# known). Calls the routing then rejects are cancelled.
+SPECULATIVE_DISPATCH = os.getenv("SPECULATIVE_DISPATCH", "false").lower() in ("1", "true", "yes")
+SPECULATIVE_MAX_SPACES = int(os.getenv("SPECULATIVE_MAX_SPACES", "1"))
+SPECULATIVE_MIN_SHARE = float(os.getenv("SPECULATIVE_MIN_SHARE", "0.6"))
+SPECULATIVE_MIN_HISTORY = int(os.getenv("SPECULATIVE_MIN_HISTORY", "10"))
+ROUTING_HISTORY_SIZE = int(os.getenv("ROUTING_HISTORY_SIZE", "200"))
+
+# Query results: stop fetching result chunks after RESULT_MAX_ROWS rows. What the
+# consolidation LLM sees of them is built by agents.digest.build_digest.
+RESULT_MAX_ROWS = int(os.getenv("RESULT_MAX_ROWS", "100000"))
+
+# Pre-aggregation: results are reduced to stats / top-k / group totals before
+# consolidation, and the digest is shrunk to fit DIGEST_TOKEN_BUDGET tokens.
+DIGEST_TOKEN_BUDGET = int(os.getenv("DIGEST_TOKEN_BUDGET", "1500"))
+DIGEST_TOP_K = int(os.getenv("DIGEST_TOP_K", "10"))
+
+# Tracing: finished per-question traces are kept in memory (last TRACE_HISTORY),
+# appended to TRACE_EXPORT_PATH (JSONL) and/or POSTed to TRACE_COLLECTOR_URL.
+TRACE_HISTORY = int(os.getenv("TRACE_HISTORY", "100"))
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH")
+TRACE_COLLECTOR_URL = os.getenv("TRACE_COLLECTOR_URL")
+
+# Conversation reuse: follow-ups in a chat session continue the session's Genie
+# conversation until it has been idle for CONVERSATION_IDLE_TTL seconds.
+CONVERSATION_IDLE_TTL = float(os.getenv("CONVERSATION_IDLE_TTL", "1800"))
+CONVERSATION_MAX_ENTRIES = int(os.getenv("CONVERSATION_MAX_ENTRIES", "1000"))
+
+# Client-side governors: callers queue for a rate token (per minute) and a
+# concurrency slot instead of failing with 429s. 0 disables a limit.
+# Per-space / per-model overrides are JSON, e.g.
+#   GENIE_SPACE_LIMITS='{"<space-id>": {"per_minute": 5, "max_concurrency": 2}}'
+#   LLM_MODEL_LIMITS='{"gpt-4o-mini": {"per_minute": 500}}'
+GENIE_RATE_PER_MINUTE = float(os.getenv("GENIE_RATE_PER_MINUTE", "0"))
+GENIE_MAX_CONCURRENCY = int(os.getenv("GENIE_MAX_CONCURRENCY", "10"))
+GENIE_SPACE_LIMITS = json.loads(os.getenv("GENIE_SPACE_LIMITS") or "{}")
+LLM_RATE_PER_MINUTE = float(os.getenv("LLM_RATE_PER_MINUTE", "0"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_MODEL_LIMITS = json.loads(os.getenv("LLM_MODEL_LIMITS") or "{}")
+
+# Per-space circuit breaker: opens when, over the last CIRCUIT_WINDOW calls
+# (and at least CIRCUIT_MIN_CALLS), the failure ratio or the ratio of calls
+# slower than CIRCUIT_SLOW_SECONDS crosses its threshold. While open, callers
+# get a stale cached answer or fail fast; a probe is let through after
+# CIRCUIT_RESET_TIMEOUT seconds.
+CIRCUIT_WINDOW = int(os.getenv("CIRCUIT_WINDOW", "20"))
+CIRCUIT_MIN_CALLS = int(os.getenv("CIRCUIT_MIN_CALLS", "5"))
+CIRCUIT_FAILURE_RATIO = float(os.getenv("CIRCUIT_FAILURE_RATIO", "0.5"))
+CIRCUIT_SLOW_SECONDS = float(os.getenv("CIRCUIT_SLOW_SECONDS", "120"))
+CIRCUIT_SLOW_RATIO = float(os.getenv("CIRCUIT_SLOW_RATIO", "0.8"))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "60"))
+
+# Hedged requests: when a new Genie conversation has not answered after the
+# space's observed p95 latency, start a second attempt and keep whichever
+# finishes first. Needs HEDGE_MIN_SAMPLES latencies before it kicks in.
+GENIE_HEDGE_ENABLED = os.getenv("GENIE_HEDGE_ENABLED", "false").lower() in ("1", "true", "yes")
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+
+# Precomputed answers for known dashboard questions (`python main.py warmup`).
+# WARMUP_SCHEDULE is a 5-field cron expression (minute hour day month weekday);
+# as in cron, a restricted day and weekday match if either does.
+# Answers older than WARMUP_STALE_AFTER seconds are flagged as stale, and are
+# not served at all past WARMUP_MAX_AGE. WARMUP_STORE_PATH empty = in-memory;
+# the file is created by the warm-up job, other processes only read it.
+# WARMUP_QUESTIONS (JSON {"name": "question"}) replaces the built-in registry.
+WARMUP_SCHEDULE = os.getenv("WARMUP_SCHEDULE", "*/30 * * * *")
+WARMUP_STALE_AFTER = float(os.getenv("WARMUP_STALE_AFTER", "3600"))
+WARMUP_MAX_AGE = float(os.getenv("WARMUP_MAX_AGE", "86400"))
+WARMUP_STORE_PATH = os.getenv("WARMUP_STORE_PATH", ".genie_warmup.sqlite")
+WARMUP_QUESTIONS = json.loads(os.getenv("WARMUP_QUESTIONS") or "{}")
+
+# Streamlit UI: questions answered at once across all sessions (each runs on
+# a shared worker pool, off the script thread), and how long a first-turn
+# answer is reused for other analysts asking the same question (0 disables).
+UI_MAX_CONCURRENT_QUESTIONS = int(os.getenv("UI_MAX_CONCURRENT_QUESTIONS", "32"))
+UI_ANSWER_CACHE_TTL = float(os.getenv("UI_ANSWER_CACHE_TTL", str(RESULT_CACHE_TTL)))
+
+# Generated-SQL reuse: the SQL Genie wrote for a first-turn question is indexed
+# by space + normalized question (SQL_INDEX_PATH empty = in-memory) for
+# SQL_INDEX_TTL seconds. Repeat questions run the stored SQL through
+# SQL_EXECUTOR instead of asking Genie again: "databricks" (Statement Execution
+# API on SQL_WAREHOUSE_ID, or a space's own warehouse_id), "sqlite" / "duckdb"
+# (the local SQL_LOCAL_DB, for offline tests) or "none".
+SQL_EXECUTOR = os.getenv("SQL_EXECUTOR", "none").lower()
+SQL_WAREHOUSE_ID = os.getenv("SQL_WAREHOUSE_ID")
+SQL_LOCAL_DB = os.getenv("SQL_LOCAL_DB", ":memory:")
+SQL_INDEX_PATH = os.getenv("SQL_INDEX_PATH", "")
+SQL_INDEX_TTL = float(os.getenv("SQL_INDEX_TTL", "86400"))
+SQL_CHUNK_ROWS = int(os.getenv("SQL_CHUNK_ROWS", "10000"))
+
+# Local analytical store: each chat turn's Genie results are kept per session
+# and space in an embedded database ("duckdb", "sqlite" or "auto" = DuckDB if
+# installed; LOCAL_STORE_PATH empty = in-memory). Follow-ups that only filter,
+# sort, rank or join the previous turn's results ("only North", "sort that by
+# churn", "top 5") are answered from it without routing or Genie calls. Only
+# the last LOCAL_STORE_MAX_TURNS turns of a session, idle for less than
+# LOCAL_STORE_TTL seconds, are kept.
+LOCAL_STORE_ENABLED = os.getenv("LOCAL_STORE_ENABLED", "true").lower() in ("1", "true", "yes")
+LOCAL_STORE_ENGINE = os.getenv("LOCAL_STORE_ENGINE", "auto").lower()
+LOCAL_STORE_PATH = os.getenv("LOCAL_STORE_PATH", "")
+LOCAL_STORE_MAX_TURNS = int(os.getenv("LOCAL_STORE_MAX_TURNS", "5"))
+LOCAL_STORE_TTL = float(os.getenv("LOCAL_STORE_TTL", str(CONVERSATION_IDLE_TTL)))
+
+# Template fast path: when a single space answers with a small result (at most
+# TEMPLATE_MAX_ROWS rows and TEMPLATE_MAX_COLUMNS columns), the answer is
+# rendered as markdown directly instead of being summarized by the
+# consolidation LLM. Results from several spaces always go to the LLM.
+TEMPLATE_FAST_PATH = os.getenv("TEMPLATE_FAST_PATH", "true").lower() in ("1", "true", "yes")
+TEMPLATE_MAX_ROWS = int(os.getenv("TEMPLATE_MAX_ROWS", "20"))
+TEMPLATE_MAX_COLUMNS = int(os.getenv("TEMPLATE_MAX_COLUMNS", "6"))
+
+# HTTP service (`python main.py serve`): questions are queued as jobs in a
+# durable SQLite queue (SERVICE_JOBS_PATH) and answered by SERVICE_WORKERS
+# worker threads sharing the pooled Genie/OpenAI clients. POST /v1/ask waits up
+# to SERVICE_SYNC_TIMEOUT seconds before handing back the job id instead; new
+# jobs are refused (503) beyond SERVICE_MAX_QUEUED waiting jobs, and finished
+# jobs are kept for SERVICE_JOB_RETENTION seconds. A running job whose worker
+# process has not renewed its lease for SERVICE_JOB_LEASE seconds is re-queued.
+SERVICE_HOST = os.getenv("SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.getenv("SERVICE_PORT", "8080"))
+SERVICE_WORKERS = int(os.getenv("SERVICE_WORKERS", "8"))
+SERVICE_JOBS_PATH = os.getenv("SERVICE_JOBS_PATH", ".genie_jobs.sqlite")
+SERVICE_SYNC_TIMEOUT = float(os.getenv("SERVICE_SYNC_TIMEOUT", "60"))
+SERVICE_MAX_QUEUED = int(os.getenv("SERVICE_MAX_QUEUED", "1000"))
+SERVICE_JOB_RETENTION = float(os.getenv("SERVICE_JOB_RETENTION", "86400"))
+SERVICE_JOB_LEASE = float(os.getenv("SERVICE_JOB_LEASE", "60"))
+
+# Coordinator fan-out settings
+# Each routed Genie gets its own deadline (seconds); a space that misses it is
+# reported as a partial result instead of blocking the other agents.
+GENIE_MAX_WORKERS = int(os.getenv("GENIE_MAX_WORKERS", "8"))
+GENIE_AGENT_DEADLINE = float(os.getenv("GENIE_AGENT_DEADLINE", "600"))
+SALES_GENIE_DEADLINE = float(os.getenv("SALES_GENIE_DEADLINE", str(GENIE_AGENT_DEADLINE)))
+CUSTOMER_GENIE_DEADLINE = float(os.getenv("CUSTOMER_GENIE_DEADLINE", str(GENIE_AGENT_DEADLINE)))
+
+# Genie space registry: every space the coordinator can route to. Each entry has
+# a name, space_id and description (shown to the routing LLM), and optionally
+# keywords (regex alternatives for the keyword pre-router), deadline, per_minute
+# and max_concurrency. Set GENIE_SPACES to a JSON list or GENIE_SPACES_FILE to
+# a JSON file, e.g.
+#   [{"name": "finance", "space_id": "01ef...", "description": "budgets, costs, P&L",
+#     "keywords": ["budgets?", "costs?"], "per_minute": 5}]
+# Without either, the registry holds the sales and customer spaces above.
+GENIE_SPACES_FILE = os.getenv("GENIE_SPACES_FILE")
+if GENIE_SPACES_FILE:
+    with open(GENIE_SPACES_FILE, encoding="utf-8") as f:
+        GENIE_SPACES = json.load(f)
+elif os.getenv("GENIE_SPACES"):
+    GENIE_SPACES = json.loads(os.getenv("GENIE_SPACES"))
+else:
+    GENIE_SPACES = [
+        {
+            "name": "sales",
+            "space_id": SALES_GENIE_SPACE_ID,
+            "description": "revenue, products, orders, pricing, sales data and sales performance",
+            "keywords": ["revenue", "sales?", "sold", "selling", "products?", "orders?", "prices?", "pricing",
+                         "profit", "margin", "units", "discounts?"],
+            "deadline": SALES_GENIE_DEADLINE,
+        },
+        {
+            "name": "customer",
+            "space_id": CUSTOMER_GENIE_SPACE_ID,
+            "description": "customers, demographics, segments, churn and customer data",
+            "keywords": ["customers?", "churn(ed|ing)?", "segments?", "demographics?", "age", "gender",
+                         "loyalty", "retention", "signups?", "premium"],
+            "deadline": CUSTOMER_GENIE_DEADLINE,
+        },
+    ]
+_CUSTOM_SPACES = bool(GENIE_SPACES_FILE or os.getenv("GENIE_SPACES"))
 
 def validate_config(allow_empty_openai=False):
     """Validate presence of key configuration values.
 
-    By default require Databricks host, token and both space IDs. If
+    By default require Databricks host, token and a space ID for every
+    registered Genie space. If
     allow_empty_openai is True, OPENAI_API_KEY may be empty (useful for
     offline runs that don't call OpenAI).
     """
@@ -46,10 +256,12 @@ def validate_config(allow_empty_openai=False):
         missing.append("DATABRICKS_HOST")
     if not DATABRICKS_TOKEN:
         missing.append("DATABRICKS_TOKEN")
-    if not SALES_GENIE_SPACE_ID:
-        missing.append("SALES_GENIE_SPACE_ID")
-    if not CUSTOMER_GENIE_SPACE_ID:
-        missing.append("CUSTOMER_GENIE_SPACE_ID")
+    if not GENIE_SPACES:
+        missing.append("GENIE_SPACES")
+    for space in GENIE_SPACES:
+        if not space.get("space_id"):
+            name = space.get("name", "?")
+            missing.append(f"space_id of Genie space '{name}'" if _CUSTOM_SPACES else f"{name.upper()}_GENIE_SPACE_ID")
     if not allow_empty_openai and not OPENAI_API_KEY:
         missing.append("OPENAI_API_KEY")
 
@@ -5,13 +5,19 @@ Handles demo, example, and interactive modes for multi-agent coordination.
 
 import sys
 import json
+import argparse
 import time
+import uuid
 from typing import Dict, Any
 
 from config import validate_config
-from agents.sales_agent import SalesAgent
-from agents.customer_agent import CustomerAgent
-from agents.coordinator import CoordinatorAgent
+
+# Agents are imported inside the functions that use them, so a command only
+# pays for the parts of the stack it runs (see benchmarks/import_time.py).
+
+
+# Set by --trace: print a per-query timing breakdown after each response
+SHOW_TRACE = False
 
 
 def print_divider(title: str = ""):
@@ -31,6 +37,19 @@ def show_response(response: Dict[str, Any]):
     print("-" * 80)
     print(response.get('response', 'No response available'))
     print("-" * 80)
+    if SHOW_TRACE:
+        show_trace()
+
+
+def show_trace():
+    """Print the timing breakdown of the last coordinator call on this thread"""
+    from agents.tracing import last_trace, format_breakdown
+
+    trace = last_trace()
+    if trace:
+        print("Timing breakdown:")
+        print(format_breakdown(trace))
+        print("-" * 80)
 
 
 # ------------------- DEMO FUNCTIONS -------------------
@@ -39,6 +58,9 @@ def demo_individual_agents():
     """Run demo showing each agent independently"""
     print_divider("Demo 1: Individual Agents")
 
+    from agents.sales_agent import SalesAgent
+    from agents.customer_agent import CustomerAgent
+
     sales_agent = SalesAgent()
     customer_agent = CustomerAgent()
 
@@ -59,6 +81,8 @@ def demo_coordinator():
     """Run demo for coordinator handling multi-agent queries"""
     print_divider("Demo 2: Coordinator Agent")
 
+    from agents.coordinator import CoordinatorAgent
+
     coordinator = CoordinatorAgent()
 
     print("\n[Query 1] Revenue vs Churn Analysis")
@@ -80,13 +104,17 @@ def interactive_mode():
     """Start interactive query mode"""
     print_divider("Demo 3: Interactive Mode")
 
-    coordinator = CoordinatorAgent()
+    from agents.coordinator import CoordinatorAgent
+
+    # One session for the whole run, so follow-ups build on earlier answers
+    coordinator = CoordinatorAgent(session_id=f"cli-{uuid.uuid4().hex[:8]}")
 
     print("Type your queries (type 'exit' to quit):")
     print("Examples:")
     print(" - What is the total revenue in North region?")
     print(" - Show customer segments with high churn risk")
-    print(" - Which regions have both high sales and low churn?\n")
+    print(" - Which regions have both high sales and low churn?")
+    print(" - then refine: only North / sort that by churn / top 5\n")
 
     while True:
         try:
@@ -115,6 +143,8 @@ def run_example_queries():
     """Run the required example queries"""
     print_divider("Running Example Queries")
 
+    from agents.coordinator import CoordinatorAgent
+
     coordinator = CoordinatorAgent()
 
     queries = [
@@ -139,6 +169,92 @@ def run_example_queries():
     return results
 
 
+# ------------------- BATCH MODE -------------------
+
+def batch_mode(args):
+    """Run a question file through the coordinator with bounded concurrency"""
+    from agents.batch import run_batch
+
+    parser = argparse.ArgumentParser(prog="python main.py batch")
+    parser.add_argument("input", help="questions file (.jsonl with id/question, or .csv)")
+    parser.add_argument("output", help="results file (.jsonl); existing successful ids are skipped")
+    parser.add_argument("--concurrency", type=int, default=4, help="questions in flight at once")
+    parser.add_argument("--rate-limit", action="append", default=[], metavar="AGENT=PER_MIN",
+                        help="max Genie questions per minute for a space, e.g. sales=5")
+    opts = parser.parse_args(args)
+    if opts.concurrency < 1:
+        parser.error("--concurrency must be a positive number of questions")
+
+    from agents.spaces import SPACES
+
+    rate_limits = {}
+    for spec in opts.rate_limit:
+        agent, _, per_minute = spec.partition("=")
+        agent = agent.strip()
+        if agent not in SPACES:
+            parser.error(f"--rate-limit: unknown agent '{agent}' (expected one of: {', '.join(SPACES)})")
+        try:
+            rate_limits[agent] = float(per_minute)
+        except ValueError:
+            parser.error(f"--rate-limit: '{spec}' is not AGENT=PER_MIN")
+        if rate_limits[agent] <= 0:
+            parser.error(f"--rate-limit: {agent} needs a positive number of questions per minute")
+
+    print_divider("Batch Mode")
+    summary = run_batch(opts.input, opts.output, concurrency=opts.concurrency, rate_limits=rate_limits)
+    print(f"\nDone: {summary['ok']} ok, {summary['partial']} partial, {summary['error']} errors, "
+          f"{summary['skipped']} skipped")
+    return summary
+
+
+# ------------------- WARM-UP MODE -------------------
+
+def warmup_mode(args):
+    """Keep precomputed answers for the dashboard questions fresh"""
+    from agents.warmup import Warmer, CANONICAL_QUESTIONS
+
+    parser = argparse.ArgumentParser(prog="python main.py warmup")
+    parser.add_argument("--once", action="store_true", help="refresh every question once and exit")
+    parser.add_argument("--schedule", help="cron expression overriding WARMUP_SCHEDULE, e.g. '0 7-19 * * 1-5'")
+    parser.add_argument("names", nargs="*", help=f"questions to refresh (default: all of {', '.join(CANONICAL_QUESTIONS)})")
+    opts = parser.parse_args(args)
+    unknown = [n for n in opts.names if n not in CANONICAL_QUESTIONS]
+    if unknown:
+        parser.error(f"unknown question(s): {', '.join(unknown)}")
+
+    print_divider("Warm-up Mode")
+    questions = {n: CANONICAL_QUESTIONS[n] for n in opts.names} or CANONICAL_QUESTIONS
+    warmer = Warmer(questions, schedule=opts.schedule) if opts.schedule else Warmer(questions)
+    if opts.once:
+        return warmer.refresh()
+    try:
+        warmer.run_forever()
+    except KeyboardInterrupt:
+        print("\nStopping warm-up.")
+
+
+# ------------------- SERVICE MODE -------------------
+
+def serve_mode(args):
+    """Serve the coordinator over HTTP with a durable job queue"""
+    from config import SERVICE_HOST, SERVICE_PORT, SERVICE_WORKERS
+    from service import serve
+
+    parser = argparse.ArgumentParser(prog="python main.py serve")
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--workers", type=int, default=SERVICE_WORKERS, help="questions answered at once")
+    opts = parser.parse_args(args)
+    if opts.workers < 1:
+        parser.error("--workers must be a positive number of questions")
+
+    print_divider("Service Mode")
+    try:
+        serve(opts.host, opts.port, opts.workers)
+    except KeyboardInterrupt:
+        print("\nStopping service.")
+
+
 # ------------------- MAIN FUNCTION -------------------
 
 def main():
@@ -154,7 +270,10 @@ def main():
         sys.exit(1)
 
     # Determine mode
-    mode = sys.argv[1].lower() if len(sys.argv) > 1 else "examples"
+    global SHOW_TRACE
+    args = [a for a in sys.argv[1:] if a != "--trace"]
+    SHOW_TRACE = len(args) != len(sys.argv) - 1
+    mode = args[0].lower() if args else "examples"
 
     if mode == "demo":
         demo_individual_agents()
@@ -163,12 +282,23 @@ def main():
         interactive_mode()
     elif mode in {"examples", "required"}:
         run_example_queries()
+    elif mode == "batch":
+        batch_mode(args[1:])
+    elif mode == "warmup":
+        warmup_mode(args[1:])
+    elif mode == "serve":
+        serve_mode(args[1:])
     else:
         print(f"Unknown mode: {mode}")
         print("Available modes:")
         print("  python main.py             -> Run example queries (default)")
         print("  python main.py demo        -> Run demo sequences")
         print("  python main.py interactive -> Interactive query mode")
+        print("  python main.py batch IN OUT [--concurrency N] [--rate-limit sales=5]")
+        print("                             -> Answer a JSONL/CSV question file into a JSONL results file")
+        print("  python main.py warmup [--once] -> Keep the example questions precomputed on a schedule")
+        print("  python main.py serve [--port 8080] -> HTTP service with sync and async (job) endpoints")
+        print("  Add --trace to any mode to print a per-query timing breakdown")
         sys.exit(1)
 
     print_divider("Session Complete")
@@ -0,0 +1,264 @@
+"""
+HTTP service for the coordinator.
+
+    python main.py serve [--host HOST] [--port PORT] [--workers N]
+
+Endpoints (JSON bodies and responses):
+  POST   /v1/ask                {"question", "session_id"?, "timeout"?}
+                                answers within the timeout (200), else returns the job (202)
+  POST   /v1/jobs               {"question", "session_id"?} -> 202 with the job id
+  GET    /v1/jobs/{id}?wait=S   job status and answer; `wait` long-polls up to S seconds
+  GET    /v1/jobs/{id}/events   Server-Sent Events: routing, agent_done, token, done | error | cancelled
+  DELETE /v1/jobs/{id}          cancel a job that has not started
+  GET    /healthz               queue depth, worker count and coordinator counters
+
+The server is one asyncio event loop: a waiting client costs a coroutine, not
+a thread. Questions are queued in the durable job queue (agents.jobs) and run
+by a bounded worker pool that shares the pooled Genie and OpenAI clients.
+"""
+import asyncio
+import json
+import re
+from urllib.parse import urlsplit, parse_qs
+
+from config import (
+    SERVICE_HOST, SERVICE_PORT, SERVICE_WORKERS, SERVICE_SYNC_TIMEOUT, SERVICE_MAX_QUEUED,
+)
+from agents.jobs import JobQueue, JobWorkers
+
+MAX_BODY_BYTES = 1 << 20
+MAX_WAIT_SECONDS = 300.0
+
+_REASONS = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            409: "Conflict", 413: "Payload Too Large", 503: "Service Unavailable"}
+_JOB_PATH = re.compile(r"/v1/jobs/([0-9a-f]{32})(/events)?")
+_FINISHED = ("done", "error", "cancelled")
+_TERMINAL_EVENTS = ("done", "error", "cancelled")
+# Streams re-read the job row this often, for jobs finished by another process
+STREAM_RECHECK_SECONDS = 2.0
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _job_view(job: dict) -> dict:
+    """The job as returned to clients."""
+    view = {k: job[k] for k in ("id", "status", "question", "session_id", "answer", "error",
+                                "created_at", "started_at", "finished_at")}
+    view["result"] = job.get("result")
+    view["links"] = {"self": f"/v1/jobs/{job['id']}", "events": f"/v1/jobs/{job['id']}/events"}
+    return view
+
+
+def _final_event(job: dict) -> dict:
+    """Terminal event for a job that finished before the client subscribed."""
+    if job["status"] == "done":
+        return {"type": "done", "answer": job["answer"], **(job.get("result") or {})}
+    if job["status"] == "cancelled":
+        return {"type": "cancelled"}
+    return {"type": "error", "error": job.get("error") or job["status"]}
+
+
+class Service:
+    """Routes HTTP requests to the job queue and its workers."""
+
+    def __init__(self, queue: JobQueue = None, workers: int = SERVICE_WORKERS,
+                 sync_timeout: float = SERVICE_SYNC_TIMEOUT, max_queued: int = SERVICE_MAX_QUEUED):
+        self.queue = queue or JobQueue()
+        self.workers = JobWorkers(self.queue, workers)
+        self.sync_timeout = sync_timeout
+        self.max_queued = max_queued
+
+    # --- Jobs ---
+    async def submit(self, body: dict) -> str:
+        question = (body.get("question") or "").strip() if isinstance(body.get("question"), str) else ""
+        if not question:
+            raise HTTPError(400, "'question' is required")
+        session_id = body.get("session_id")
+        if session_id is not None and not isinstance(session_id, str):
+            raise HTTPError(400, "'session_id' must be a string")
+        counts = await asyncio.to_thread(self.queue.counts)
+        if counts.get("queued", 0) >= self.max_queued:
+            raise HTTPError(503, "Too many queued jobs, retry later")
+        job_id = await asyncio.to_thread(self.queue.submit, question, session_id)
+        self.workers.notify()
+        return job_id
+
+    async def get_job(self, job_id: str) -> dict:
+        job = await asyncio.to_thread(self.queue.get, job_id)
+        if job is None:
+            raise HTTPError(404, f"Unknown job {job_id}")
+        return job
+
+    async def wait_for(self, job_id: str, timeout: float) -> dict:
+        """The job once it has finished, or as it stands after `timeout` seconds."""
+        loop = asyncio.get_running_loop()
+        finished = asyncio.Event()
+
+        def on_event(event):
+            if event["type"] in _TERMINAL_EVENTS:
+                loop.call_soon_threadsafe(finished.set)
+
+        self.workers.subscribe(job_id, on_event)
+        try:
+            job = await self.get_job(job_id)
+            if job["status"] not in _FINISHED and timeout > 0:
+                try:
+                    await asyncio.wait_for(finished.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                job = await self.get_job(job_id)
+            return job
+        finally:
+            self.workers.unsubscribe(job_id, on_event)
+
+    async def stream_events(self, job_id: str, writer: asyncio.StreamWriter):
+        """Send the job's progress events as Server-Sent Events until it finishes.
+
+        Events come from this process's workers; the job row is re-read every
+        STREAM_RECHECK_SECONDS so a job finished or cancelled elsewhere (e.g.
+        claimed by another process) still ends the stream.
+        """
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+
+        def on_event(event):
+            loop.call_soon_threadsafe(events.put_nowait, event)
+
+        past = self.workers.subscribe(job_id, on_event)
+        try:
+            job = await self.get_job(job_id)
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                         b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n")
+            if job["status"] in _FINISHED and not any(e["type"] in _TERMINAL_EVENTS for e in past):
+                past = [_final_event(job)]
+            for event in past:
+                await self._send_event(writer, event)
+                if event["type"] in _TERMINAL_EVENTS:
+                    return
+            while True:
+                try:
+                    event = await asyncio.wait_for(events.get(), STREAM_RECHECK_SECONDS)
+                except asyncio.TimeoutError:
+                    job = await self.get_job(job_id)
+                    if job["status"] not in _FINISHED:
+                        continue
+                    # A terminal event may have been queued while the row was read
+                    event = events.get_nowait() if not events.empty() else _final_event(job)
+                await self._send_event(writer, event)
+                if event["type"] in _TERMINAL_EVENTS:
+                    return
+        finally:
+            self.workers.unsubscribe(job_id, on_event)
+
+    @staticmethod
+    async def _send_event(writer, event: dict):
+        writer.write(f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n".encode())
+        await writer.drain()
+
+    # --- HTTP ---
+    async def dispatch(self, method: str, target: str, body: bytes, writer) -> bool:
+        """Handle one request; returns False if the connection must be closed afterwards."""
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        try:
+            payload = json.loads(body or b"{}") if method == "POST" else {}
+            if not isinstance(payload, dict):
+                raise HTTPError(400, "Request body must be a JSON object")
+
+            if url.path == "/healthz":
+                from agents.coordinator import runtime_stats
+
+                # Both take locks (and the stats may touch SQLite): keep them off the event loop
+                counts = await asyncio.to_thread(self.queue.counts)
+                stats = await asyncio.to_thread(runtime_stats)
+                return await self._send(writer, 200, {"status": "ok", "workers": self.workers.workers,
+                                                      "queued": counts.get("queued", 0),
+                                                      "running": counts.get("running", 0),
+                                                      "stats": stats})
+
+            if url.path == "/v1/ask" and method == "POST":
+                # Validated before submitting, so a bad request leaves no orphan job behind
+                timeout = min(float(payload.get("timeout") or self.sync_timeout), MAX_WAIT_SECONDS)
+                job_id = await self.submit(payload)
+                job = await self.wait_for(job_id, timeout)
+                return await self._send(writer, 200 if job["status"] in _FINISHED else 202, _job_view(job))
+
+            if url.path == "/v1/jobs" and method == "POST":
+                job = await self.get_job(await self.submit(payload))
+                return await self._send(writer, 202, _job_view(job))
+
+            m = _JOB_PATH.fullmatch(url.path)
+            if m and m.group(2) and method == "GET":
+                await self.stream_events(m.group(1), writer)
+                return False
+            if m and method == "GET":
+                wait = min(float((query.get("wait") or ["0"])[0]), MAX_WAIT_SECONDS)
+                job = await self.wait_for(m.group(1), wait) if wait > 0 else await self.get_job(m.group(1))
+                return await self._send(writer, 200, _job_view(job))
+            if m and method == "DELETE":
+                await self.get_job(m.group(1))
+                if not await asyncio.to_thread(self.workers.cancel, m.group(1)):
+                    raise HTTPError(409, "Job has already started")
+                return await self._send(writer, 200, _job_view(await self.get_job(m.group(1))))
+
+            raise HTTPError(405 if url.path in ("/v1/ask", "/v1/jobs") or m else 404, "No such endpoint")
+        except HTTPError as e:
+            return await self._send(writer, e.status, {"error": str(e)})
+        except (ValueError, TypeError) as e:
+            return await self._send(writer, 400, {"error": f"Bad request: {e}"})
+
+    @staticmethod
+    async def _send(writer, status: int, obj: dict) -> bool:
+        data = json.dumps(obj, default=str).encode()
+        head = f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\nContent-Type: application/json\r\n" \
+               f"Content-Length: {len(data)}\r\n"
+        if status == 503:
+            head += "Retry-After: 5\r\n"
+        writer.write(head.encode() + b"\r\n" + data)
+        await writer.drain()
+        return True
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """One client connection; HTTP/1.1 keep-alive is honoured."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length") or 0)
+                if length > MAX_BODY_BYTES:
+                    await self._send(writer, 413, {"error": "Request body too large"})
+                    break
+                body = await reader.readexactly(length) if length else b""
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                if not await self.dispatch(method.upper(), target, body, writer) or not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def run(self, host: str = SERVICE_HOST, port: int = SERVICE_PORT):
+        self.workers.start()
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"🌐 Coordinator service on http://{host}:{port} ({self.workers.workers} workers)")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            # Jobs still running are re-queued by the next start
+            self.workers.stop(timeout=0)
+
+
+def serve(host: str = SERVICE_HOST, port: int = SERVICE_PORT, workers: int = SERVICE_WORKERS):
+    """Run the service until interrupted."""
+    asyncio.run(Service(workers=workers).run(host, port))
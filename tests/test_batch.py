@@ -0,0 +1,69 @@
+"""Batch runs: coordinator statuses map to ok/partial/error, and a rerun retries only unfinished ids."""
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from agents import batch
+
+# Coordinator status per question
+STATUSES = {"q1": "success", "q2": "partial", "q3": "error", "q4": "success"}
+
+
+class _Coordinator:
+    asked = []
+
+    def coordinate_query(self, query):
+        self.asked.append(query)
+        response = {"status": STATUSES[query], "response": f"answer to {query}"}
+        if response["status"] == "error":
+            response["error"] = "Genie unavailable"
+        return response
+
+
+class RunBatchTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.input = os.path.join(self.dir.name, "questions.jsonl")
+        self.output = os.path.join(self.dir.name, "results.jsonl")
+        with open(self.input, "w", encoding="utf-8") as f:
+            for n in range(1, 4):
+                f.write(json.dumps({"id": str(n), "question": f"q{n}"}) + "\n")
+        _Coordinator.asked = []
+        patcher = mock.patch.object(batch, "CoordinatorAgent", _Coordinator)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def records(self):
+        with open(self.output, encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def test_statuses_are_mapped(self):
+        summary = batch.run_batch(self.input, self.output, concurrency=2)
+        self.assertEqual(summary, {"total": 3, "skipped": 0, "ok": 1, "partial": 1, "error": 1})
+        by_id = {r["id"]: r for r in self.records()}
+        self.assertEqual({i: r["status"] for i, r in by_id.items()}, {"1": "ok", "2": "partial", "3": "error"})
+        self.assertEqual(by_id["3"]["error"], "Genie unavailable")
+        self.assertEqual(by_id["1"]["answer"], "answer to q1")
+
+    def test_rerun_skips_ok_ids_and_retries_the_rest(self):
+        batch.run_batch(self.input, self.output)
+        with open(self.input, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"id": "4", "question": "q4"}) + "\n")
+        with open(self.output, "a", encoding="utf-8") as f:
+            f.write('{"id": "4", "status": "o')  # truncated by a crash: not a completed result
+        _Coordinator.asked = []
+        summary = batch.run_batch(self.input, self.output)
+        self.assertEqual(sorted(_Coordinator.asked), ["q2", "q3", "q4"])
+        self.assertEqual(summary["skipped"], 1)
+        self.assertEqual(batch.completed_ids(self.output), {"1", "4"})
+        with open(self.output, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines[3], '{"id": "4", "status": "o')
+        self.assertEqual(sorted(json.loads(line)["id"] for line in lines[4:]), ["2", "3", "4"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+"""Session conversations: first turns start a real conversation, and only a lost one is replaced."""
+import unittest
+
+import requests
+
+from agents import base_agent
+from agents.base_agent import BaseGenieAgent
+from agents.genie_client import GenieClient
+from agents.query_result import encode_result
+from agents.result_cache import MemoryBackend, ResultCache
+
+
+def _http_error(status, text=""):
+    resp = requests.Response()
+    resp.status_code = status
+    resp._content = text.encode()
+    return requests.HTTPError(response=resp)
+
+
+class _Agent(BaseGenieAgent):
+    def get_genie_space_id(self):
+        return "space"
+
+
+class _Genie(GenieClient):
+    """GenieClient whose Genie round trips are scripted instead of sent."""
+
+    def __init__(self, cache=None):
+        super().__init__("space", workspace_instance="localhost", token="t", session=object(), cache=cache)
+        self.started = 0
+        self.follow_up_error = None
+
+    def _new_conversation(self, question, timeout_seconds, timings, stop_event):
+        self.started += 1
+        return f"conv-{self.started}", {"answer": question}
+
+    def send_message(self, conversation_id, question):
+        if self.follow_up_error is not None:
+            raise self.follow_up_error
+        return "msg"
+
+    def poll_for_result(self, conversation_id, message_id, **kwargs):
+        return {"answer": "follow-up"}
+
+
+class SessionConversationTest(unittest.TestCase):
+    def setUp(self):
+        base_agent.conversations.drop("s1")
+        cache = ResultCache(MemoryBackend())
+        cache.set("space", "total revenue", encode_result({"answer": "cached"}))
+        self.genie = _Genie(cache)
+        self.agent = _Agent(self.genie)
+
+    def test_cached_first_turn_still_opens_a_conversation(self):
+        # Without a session the cached answer is fine
+        self.assertEqual(self.agent.ask("total revenue"), {"answer": "cached"})
+        self.assertEqual(self.agent.ask("total revenue", "s1"), {"answer": "total revenue"})
+        self.assertEqual(base_agent.conversations.get("s1", "space"), "conv-1")
+
+    def test_server_error_keeps_the_conversation(self):
+        self.agent.ask("total revenue", "s1")
+        self.genie.follow_up_error = _http_error(400, "bad column")
+        with self.assertRaises(requests.HTTPError):
+            self.agent._ask("and by region?", "s1", None)
+        self.genie.follow_up_error = _http_error(503)
+        with self.assertRaises(requests.HTTPError):
+            self.agent._ask("and by region?", "s1", None)
+        self.assertEqual(base_agent.conversations.get("s1", "space"), "conv-1")
+        self.assertEqual(self.genie.started, 1)
+
+    def test_lost_conversation_is_replaced(self):
+        self.agent.ask("total revenue", "s1")
+        self.genie.follow_up_error = _http_error(404)
+        self.assertEqual(self.agent.ask("and by region?", "s1"), {"answer": "and by region?"})
+        self.assertEqual(base_agent.conversations.get("s1", "space"), "conv-2")
+
+    def test_held_conversation_is_not_registered(self):
+        held = {}
+        self.agent.ask("total revenue", "s1", held=held)
+        self.assertEqual(held, {"space": "conv-1"})
+        self.assertIsNone(base_agent.conversations.get("s1", "space"))
+
+
+if __name__ == "__main__":
+    unittest.main()
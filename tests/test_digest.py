@@ -0,0 +1,40 @@
+"""Result digests stay within their token budget and keep each table's columns when cut down."""
+import unittest
+
+from agents.digest import build_digest, estimate_tokens
+from agents.query_result import ColumnarResult
+
+
+def _table(n, columns=("region", "product", "revenue", "orders")):
+    data = [[f"region-{i % 40}" for i in range(n)], [f"product name {i}" for i in range(n)],
+            [float(i * 3.25) for i in range(n)], [i for i in range(n)]]
+    return ColumnarResult(list(columns), ["STRING", "STRING", "DOUBLE", "LONG"], data)
+
+
+class BuildDigestTest(unittest.TestCase):
+    def test_small_table_is_passed_whole(self):
+        digest = build_digest({"sales": _table(3)}, token_budget=1500, top_k=10)
+        self.assertEqual(digest["sales"]["row_count"], 3)
+        self.assertEqual(len(digest["sales"]["rows"]), 3)
+
+    def test_large_tables_are_summarized_within_budget(self):
+        results = {"sales": _table(5000), "customer": _table(2000)}
+        digest = build_digest(results, token_budget=1500, top_k=10)
+        self.assertLessEqual(estimate_tokens(digest), 1500)
+        self.assertEqual(digest["sales"]["row_count"], 5000)
+        self.assertIn("numeric_stats", digest["sales"])
+        self.assertEqual(digest["joined"]["key"], "region")
+
+    def test_cut_digest_keeps_columns_and_row_counts(self):
+        results = {"sales": _table(5000), "customer": _table(2000), "note": {"message": {"content": "x" * 4000}}}
+        digest = build_digest(results, token_budget=200, top_k=10)
+        self.assertLessEqual(estimate_tokens(digest), 200)
+        self.assertIn("truncated_digest", digest)
+        self.assertEqual(digest["tables"], {
+            "sales": {"columns": ["region", "product", "revenue", "orders"], "row_count": 5000},
+            "customer": {"columns": ["region", "product", "revenue", "orders"], "row_count": 2000},
+        })
+
+
+if __name__ == "__main__":
+    unittest.main()
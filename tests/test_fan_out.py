@@ -0,0 +1,96 @@
+"""Fan-out deadlines (counted from when a call starts; only started calls count against a space)
+and stopping pending calls when a stream consumer goes away."""
+import threading
+import time
+import unittest
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from unittest import mock
+
+from agents import coordinator
+from agents.resilience import get_breaker
+
+
+class _Agent:
+    """Stands in for a SpaceAgent: answers after `delay` seconds unless stopped first."""
+
+    def __init__(self, space_id, delay, deadline):
+        self.space_id = space_id
+        self.delay = delay
+        self.deadline = deadline
+        self.stop_event = None
+        self.started = threading.Event()
+
+    def ask(self, question, session_id=None, held=None, stop_event=None):
+        self.stop_event = stop_event
+        self.started.set()
+        if stop_event.wait(self.delay):
+            raise CancelledError("Polling cancelled")
+        return {"answer": question}
+
+
+class FanOutTest(unittest.TestCase):
+    def fan_out(self, agents, workers):
+        executor = ThreadPoolExecutor(max_workers=workers)
+        self.addCleanup(executor.shutdown, wait=False)
+        with mock.patch.object(coordinator, "GENIE_AGENTS", agents), \
+                mock.patch.object(coordinator, "_executor", executor):
+            return coordinator.fan_out({name: f"{name} question" for name in agents})
+
+    def test_slow_agent_times_out_while_others_answer(self):
+        results = self.fan_out({"fast": _Agent("fanout-fast", 0.0, 2.0),
+                                "slow": _Agent("fanout-slow", 5.0, 0.2)}, workers=2)
+        self.assertEqual(results["fast"], {"answer": "fast question"})
+        self.assertEqual(results["slow"]["status"], "timeout")
+        # The slow call reached the space, so its miss counts against the circuit
+        self.assertEqual(len(get_breaker("fanout-slow")._outcomes), 1)
+
+    def test_queued_call_that_never_started_spares_the_circuit(self):
+        results = self.fan_out({"busy": _Agent("fanout-busy", 0.6, 2.0),
+                                "queued": _Agent("fanout-queued", 0.0, 0.2)}, workers=1)
+        self.assertEqual(results["busy"], {"answer": "busy question"})
+        self.assertEqual(results["queued"]["status"], "timeout")
+        self.assertEqual(len(get_breaker("fanout-queued")._outcomes), 0)
+
+    def test_deadline_runs_from_start_not_submission(self):
+        # "second" waits 0.3s for the only thread, then answers 0.3s later: past
+        # 0.5s from submission but well within 0.5s of starting
+        results = self.fan_out({"first": _Agent("fanout-first", 0.3, 2.0),
+                                "second": _Agent("fanout-second", 0.3, 0.5)}, workers=1)
+        self.assertEqual(results["second"], {"answer": "second question"})
+
+    def test_deadline_start_time(self):
+        deadline = coordinator._Deadline(1.0)
+        self.assertAlmostEqual(deadline.at(), deadline.submitted_at + 1.0)
+        time.sleep(0.05)
+        deadline.start()
+        self.assertAlmostEqual(deadline.at(), deadline.started_at + 1.0)
+        self.assertGreater(deadline.at(), deadline.submitted_at + 1.0)
+
+
+class StreamCloseTest(unittest.TestCase):
+    def test_closing_the_stream_stops_pending_calls(self):
+        agents = {"fast": _Agent("stream-fast", 0.0, 5.0), "slow": _Agent("stream-slow", 5.0, 5.0)}
+        executor = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(executor.shutdown, wait=False)
+        routing = {"agents": ["fast", "slow"], "subqueries": {}}
+        with mock.patch.object(coordinator, "GENIE_AGENTS", agents), \
+                mock.patch.object(coordinator, "_executor", executor), \
+                mock.patch.object(coordinator, "SPECULATIVE_DISPATCH", False), \
+                mock.patch.object(coordinator, "get_openai_client", lambda: None), \
+                mock.patch.object(coordinator, "route", lambda client, question, before_llm=None: (routing, "llm")):
+            stream = coordinator.coordinator_stream("revenue and churn", use_precomputed=False)
+            events = []
+            for event in stream:
+                events.append(event)
+                if event["type"] == "agent_done":
+                    break
+            self.assertTrue(agents["slow"].started.wait(1))
+            started = time.monotonic()
+            stream.close()
+        self.assertEqual(events[-1], {"type": "agent_done", "agent": "fast", "status": "ok"})
+        self.assertTrue(agents["slow"].stop_event.is_set())
+        self.assertLess(time.monotonic() - started, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
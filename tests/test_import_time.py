@@ -0,0 +1,22 @@
+"""Startup budget: the CLI and coordinator import quickly and defer every heavy dependency."""
+import unittest
+
+from benchmarks.import_time import DEFAULT_MAX_MS, heavy_imports, measure
+
+MODULES = ["main", "agents.coordinator"]
+
+
+class ImportTimeTest(unittest.TestCase):
+    def test_heavy_dependencies_are_not_imported_at_startup(self):
+        for module in MODULES:
+            self.assertEqual(heavy_imports(module), [], module)
+
+    def test_cold_import_stays_within_budget(self):
+        for module in MODULES:
+            # Best of three, as the benchmark does, to ride out a busy machine
+            ms = min(measure(module)["ms"] for _ in range(3))
+            self.assertLessEqual(ms, DEFAULT_MAX_MS, module)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+"""Job leases: only jobs whose worker stopped renewing them are re-queued."""
+import asyncio
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+
+from agents.jobs import JobQueue
+from service import HTTPError, Service
+
+
+class JobLeaseTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "jobs.sqlite")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_live_lease_is_not_recovered(self):
+        running = JobQueue(self.path)
+        job_id = running.submit("revenue by region")
+        self.assertEqual(running.claim()["id"], job_id)
+        self.assertEqual(JobQueue(self.path).recover(), 0)
+        self.assertEqual(running.get(job_id)["status"], "running")
+
+    def test_lapsed_lease_is_recovered(self):
+        dead = JobQueue(self.path)
+        job_id = dead.submit("revenue by region")
+        dead.claim()
+        time.sleep(0.05)
+        self.assertEqual(JobQueue(self.path, lease=0.01).recover(), 1)
+        job = dead.get(job_id)
+        self.assertEqual((job["status"], job["owner"]), ("queued", None))
+
+    def test_heartbeat_renews_own_jobs(self):
+        running = JobQueue(self.path, lease=0.2)
+        running.submit("revenue by region")
+        running.claim()
+        time.sleep(0.15)
+        self.assertEqual(running.heartbeat(), 1)
+        time.sleep(0.1)
+        self.assertEqual(JobQueue(self.path, lease=0.2).recover(), 0)
+
+    def test_table_without_lease_columns_is_migrated(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute("CREATE TABLE jobs (id TEXT PRIMARY KEY, question TEXT, session_id TEXT, status TEXT,"
+                     " answer TEXT, result TEXT, error TEXT, created_at REAL, started_at REAL, finished_at REAL)")
+        conn.execute("INSERT INTO jobs (id, question, status, created_at) VALUES ('old', 'q', 'running', 0)")
+        conn.commit()
+        conn.close()
+        queue = JobQueue(self.path)
+        self.assertEqual(queue.recover(), 1)
+        self.assertEqual(queue.claim()["owner"], queue.owner)
+
+
+class SubmitValidationTest(unittest.TestCase):
+    def test_session_id_must_be_a_string(self):
+        service = Service(queue=JobQueue(":memory:"))
+        for session_id in (["a"], {"id": "a"}, 7):
+            with self.assertRaises(HTTPError) as ctx:
+                asyncio.run(service.submit({"question": "revenue by region", "session_id": session_id}))
+            self.assertEqual(ctx.exception.status, 400)
+        self.assertTrue(asyncio.run(service.submit({"question": "revenue by region", "session_id": None})))
+
+
+if __name__ == "__main__":
+    unittest.main()
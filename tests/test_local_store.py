@@ -0,0 +1,64 @@
+"""Refinement planning over stored frames with DECIMAL and INT columns."""
+import unittest
+
+from agents.local_store import LocalStore
+from agents.query_result import ColumnarResult
+
+REGIONS = [["West", "950.00", "12"], ["North", "9000.50", "7"], ["South", "12000.25", "30"], ["East", "100000.00", "3"]]
+
+
+def _result():
+    result = ColumnarResult(["region", "revenue", "orders"], ["STRING", "DECIMAL", "INT"])
+    result.append_rows(REGIONS)
+    return result
+
+
+class RefinementTest(unittest.TestCase):
+    def setUp(self):
+        self.store = LocalStore(path=":memory:", engine="sqlite")
+        self.store.put_turn("s1", "revenue and orders by region", {"sales": _result()})
+
+    def refine(self, question):
+        refined = self.store.refine("s1", question)
+        self.assertIsNotNone(refined, question)
+        # Stored as the next turn, as the coordinator does, so refinements chain
+        self.store.put_turn("s1", question, refined[0])
+        return refined[0]["sales"]
+
+    def test_sort_by_decimal_is_numeric(self):
+        result = self.refine("sort that by revenue")
+        self.assertEqual(result.column("region"), ["East", "South", "North", "West"])
+        self.assertEqual(result.column("revenue"), [100000.0, 12000.25, 9000.5, 950.0])
+
+    def test_top_n_by_decimal(self):
+        self.assertEqual(self.refine("top 2 by revenue").column("region"), ["East", "South"])
+
+    def test_sort_by_int_ascending(self):
+        result = self.refine("sort by orders ascending")
+        self.assertEqual(result.column("orders"), [3, 7, 12, 30])
+
+    def test_top_n_by_int(self):
+        self.assertEqual(self.refine("top 1 by orders").column("region"), ["South"])
+
+    def test_filter_keeps_numeric_values(self):
+        result = self.refine("now only for North")
+        self.assertEqual(list(result.rows()), [("North", 9000.5, 7)])
+        self.assertEqual(result.types[1:], ["DOUBLE", "LONG"])
+
+    def test_later_turn_still_sorts_numerically(self):
+        self.refine("exclude East")
+        result = self.refine("sort that by revenue")
+        self.assertEqual(result.column("region"), ["South", "North", "West"])
+
+    def test_new_data_request_goes_to_genie(self):
+        self.assertIsNone(self.store.refine("s1", "show revenue by product category"))
+
+    def test_other_numbers_go_to_genie(self):
+        self.assertIsNone(self.store.refine("s1", "top 1 by revenue in 2023"))
+
+    def test_include_and_exclude_on_one_column(self):
+        self.assertEqual(self.refine("North but not South").column("region"), ["North"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+"""Adaptive poll intervals: exponential growth, per-status caps and a reset on every status change."""
+import random
+import unittest
+from unittest import mock
+
+from agents.polling import PollSchedule
+
+
+class PollScheduleTest(unittest.TestCase):
+    def schedule(self):
+        return PollSchedule(initial=0.25, maximum=2.0, backoff=2.0, jitter=0.0, status_max={})
+
+    def test_grows_until_the_cap(self):
+        schedule = self.schedule()
+        delays = [schedule.next_delay("EXECUTING_QUERY") for _ in range(6)]
+        self.assertEqual(delays, [0.25, 0.5, 1.0, 2.0, 2.0, 2.0])
+
+    def test_status_change_resets_the_interval(self):
+        schedule = self.schedule()
+        for _ in range(4):
+            schedule.next_delay("ASKING_AI")
+        self.assertEqual(schedule.next_delay("EXECUTING_QUERY"), 0.25)
+        self.assertEqual(schedule.next_delay("EXECUTING_QUERY"), 0.5)
+
+    def test_status_cap_is_tighter_than_the_maximum(self):
+        schedule = PollSchedule(initial=0.25, maximum=2.0, backoff=2.0, jitter=0.0,
+                                status_max={"EXECUTING_QUERY": 0.6})
+        delays = [schedule.next_delay("EXECUTING_QUERY") for _ in range(4)]
+        self.assertEqual(delays, [0.25, 0.5, 0.6, 0.6])
+
+    def test_jitter_stays_within_its_spread(self):
+        schedule = PollSchedule(initial=1.0, maximum=1.0, backoff=2.0, jitter=0.2, status_max={})
+        with mock.patch.object(random, "uniform", side_effect=lambda lo, hi: hi):
+            self.assertAlmostEqual(schedule.next_delay("ASKING_AI"), 1.2)
+        with mock.patch.object(random, "uniform", side_effect=lambda lo, hi: lo):
+            self.assertAlmostEqual(schedule.next_delay("ASKING_AI"), 0.8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+"""Chunked query results: next-chunk links are followed, and fetching stops at the row cap."""
+import unittest
+from unittest import mock
+
+from agents.genie_client import GenieClient
+from agents.query_result import ColumnarResult
+
+MANIFEST = {"schema": {"columns": [{"name": "revenue", "type_name": "DOUBLE", "position": 1},
+                                   {"name": "region", "type_name": "STRING", "position": 0}]},
+            "total_row_count": 5, "truncated": False}
+
+
+def _rows(start, n):
+    return [[f"r{i}", str(i * 1.5)] for i in range(start, start + n)]
+
+
+class _Genie(GenieClient):
+    """Serves query-result pages from `pages` (url -> payload) instead of the network."""
+
+    def __init__(self, pages):
+        super().__init__("space", workspace_instance="https://host", token="t", session=object())
+        self.pages = pages
+        self.fetched = []
+
+    def _get_json(self, url):
+        self.fetched.append(url)
+        return self.pages[url]
+
+
+def _pages():
+    return {
+        "https://host/result": {"statement_response": {
+            "statement_id": "st1", "manifest": MANIFEST,
+            "result": {"data_array": _rows(0, 2), "next_chunk_internal_link": "/chunks/1"}}},
+        "https://host/chunks/1": {"data_array": _rows(2, 2), "next_chunk_internal_link": "/chunks/2"},
+        "https://host/chunks/2": {"data_array": _rows(4, 1)},
+    }
+
+
+class FetchQueryResultTest(unittest.TestCase):
+    def test_follows_every_chunk(self):
+        genie = _Genie(_pages())
+        result = genie._fetch_query_result("https://host/result")
+        self.assertEqual(genie.fetched, ["https://host/result", "https://host/chunks/1", "https://host/chunks/2"])
+        self.assertEqual(result.columns, ["region", "revenue"])
+        self.assertEqual(result.row_count, 5)
+        self.assertEqual(result.column("revenue"), [0.0, 1.5, 3.0, 4.5, 6.0])
+        self.assertEqual((result.total_row_count, result.truncated, result.statement_id), (5, False, "st1"))
+
+    def test_stops_fetching_at_the_row_cap(self):
+        genie = _Genie(_pages())
+        with mock.patch.object(ColumnarResult.append_rows, "__defaults__", (3,)):
+            result = genie._fetch_query_result("https://host/result")
+        self.assertEqual(genie.fetched, ["https://host/result", "https://host/chunks/1"])
+        self.assertEqual(result.row_count, 3)
+        self.assertEqual(result.column("region"), ["r0", "r1", "r2"])
+        self.assertTrue(result.truncated)
+        self.assertEqual(result.total_row_count, 5)
+
+    def test_payload_without_statement_is_returned_unchanged(self):
+        genie = _Genie({"https://host/result": {"message": "no rows"}})
+        self.assertEqual(genie._fetch_query_result("https://host/result"), {"message": "no rows"})
+
+
+class AppendRowsTest(unittest.TestCase):
+    def test_values_are_typed_and_bad_values_kept(self):
+        result = ColumnarResult(["n", "ok", "x"], ["LONG", "BOOLEAN", "DOUBLE"])
+        self.assertTrue(result.append_rows([["1", "true", "2.5"], ["2", "false", "n/a"], ["3", None]]))
+        self.assertEqual(result.data, [[1, 2, 3], [True, False, None], [2.5, "n/a", None]])
+
+    def test_row_cap_truncates(self):
+        result = ColumnarResult(["n"], ["LONG"])
+        self.assertTrue(result.append_rows([["1"], ["2"]], max_rows=3))
+        self.assertFalse(result.append_rows([["3"], ["4"]], max_rows=3))
+        self.assertEqual((result.row_count, result.truncated), (3, True))
+        self.assertFalse(result.append_rows([["5"]], max_rows=3))
+        self.assertEqual(result.row_count, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+"""Governor behaviour after a 429: every caller of the key backs off; stopped callers leave the queue."""
+import threading
+import time
+import unittest
+from concurrent.futures import CancelledError
+
+from agents.rate_limit import Governor, parse_retry_after
+
+
+class GovernorPauseTest(unittest.TestCase):
+    def test_throttled_pauses_every_caller(self):
+        governor = Governor(max_concurrency=4)
+        governor.throttled(0.3)
+        waits = []
+
+        def caller():
+            with governor.slot() as waited:
+                waits.append(waited)
+
+        threads = [threading.Thread(target=caller) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(len(waits), 3)
+        self.assertTrue(all(w >= 0.25 for w in waits), waits)
+        self.assertEqual(governor.stats()["throttled"], 1)
+
+    def test_pause_is_extended_not_shortened(self):
+        governor = Governor()
+        governor.throttled(0.3)
+        governor.throttled(0.05)
+        start = time.monotonic()
+        governor.wait_if_paused()
+        self.assertGreaterEqual(time.monotonic() - start, 0.25)
+
+    def test_no_pause_without_throttling(self):
+        governor = Governor()
+        start = time.monotonic()
+        with governor.slot() as waited:
+            pass
+        self.assertLess(waited, 0.05)
+        self.assertLess(time.monotonic() - start, 0.05)
+
+    def test_stopped_caller_leaves_the_pause(self):
+        governor = Governor()
+        governor.throttled(5)
+        stop = threading.Event()
+        threading.Timer(0.1, stop.set).start()
+        start = time.monotonic()
+        with self.assertRaises(CancelledError):
+            with governor.slot(stop):
+                self.fail("slot taken after stop")
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(governor.stats()["cancelled"], 1)
+
+    def test_stopped_caller_leaves_the_concurrency_queue(self):
+        governor = Governor(max_concurrency=1)
+        stop = threading.Event()
+        with governor.slot():
+            threading.Timer(0.1, stop.set).start()
+            with self.assertRaises(CancelledError):
+                with governor.slot(stop):
+                    self.fail("slot taken after stop")
+        # The stopped caller took nothing, so the slot is free again
+        with governor.slot() as waited:
+            self.assertLess(waited, 0.05)
+        self.assertEqual(governor.stats()["in_flight"], 0)
+
+    def test_retry_after_parsing(self):
+        self.assertEqual(parse_retry_after("3", 1.0), 3.0)
+        self.assertEqual(parse_retry_after(None, 1.5), 1.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+"""Circuit breaker transitions, including a half-open probe that ends without an outcome."""
+import time
+import unittest
+
+from agents.resilience import CircuitBreaker
+
+
+def _open_breaker():
+    breaker = CircuitBreaker(window=4, min_calls=2, failure_ratio=0.5, reset_timeout=0.05)
+    breaker.record(failed=True)
+    breaker.record(failed=True)
+    return breaker
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def test_opens_on_failures_and_rejects(self):
+        breaker = _open_breaker()
+        self.assertEqual(breaker.state, "open")
+        self.assertFalse(breaker.allow())
+        self.assertEqual(breaker.stats()["rejected"], 1)
+
+    def test_half_open_allows_one_probe(self):
+        breaker = _open_breaker()
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, "half_open")
+        self.assertFalse(breaker.allow())
+
+    def test_released_probe_frees_the_slot(self):
+        breaker = _open_breaker()
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        breaker.release()
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, "half_open")
+
+    def test_probe_outcome_closes_or_reopens(self):
+        breaker = _open_breaker()
+        time.sleep(0.06)
+        breaker.allow()
+        breaker.record(failed=False, latency=0.1)
+        self.assertEqual(breaker.state, "closed")
+
+        breaker = _open_breaker()
+        time.sleep(0.06)
+        breaker.allow()
+        breaker.record(failed=True)
+        self.assertEqual(breaker.state, "open")
+
+    def test_release_is_a_no_op_when_closed(self):
+        breaker = CircuitBreaker()
+        breaker.release()
+        self.assertEqual(breaker.state, "closed")
+        self.assertTrue(breaker.allow())
+
+
+if __name__ == "__main__":
+    unittest.main()
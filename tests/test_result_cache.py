@@ -0,0 +1,93 @@
+"""Result cache: TTL expiry, LRU eviction in both backends, and stale answers only behind an open circuit."""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from agents.genie_client import GenieClient
+from agents.query_result import encode_result
+from agents.resilience import get_breaker
+from agents.result_cache import MemoryBackend, ResultCache, SQLiteBackend
+
+
+class _Clock:
+    """Stands in for time.time so entries age without sleeping."""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        self.now += 0.001
+        return self.now
+
+
+class ResultCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = _Clock()
+        patcher = mock.patch("time.time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+
+    def backends(self, max_entries):
+        return [MemoryBackend(max_entries=max_entries),
+                SQLiteBackend(os.path.join(self.dir.name, f"cache{max_entries}.sqlite"), max_entries=max_entries)]
+
+    def test_entries_expire_after_the_ttl(self):
+        for backend in self.backends(10):
+            cache = ResultCache(backend, ttl=60)
+            cache.set("space", "Total revenue?", {"answer": 1})
+            self.assertEqual(cache.get("space", "total revenue"), {"answer": 1})
+            self.clock.now += 61
+            self.assertIsNone(cache.get("space", "total revenue"))
+            self.assertEqual(cache.stats()["expired"], 1)
+            # Expired entries are kept for the open-circuit fallback
+            self.assertEqual(cache.get_stale("space", "total revenue")[1], {"answer": 1})
+
+    def test_least_recently_used_entry_is_evicted(self):
+        for backend in self.backends(2):
+            cache = ResultCache(backend, ttl=0)
+            cache.set("space", "a", 1)
+            cache.set("space", "b", 2)
+            self.assertEqual(cache.get("space", "a"), 1)  # "b" is now the least recently used
+            cache.set("space", "c", 3)
+            self.assertIsNone(cache.get("space", "b"), type(backend).__name__)
+            self.assertEqual(cache.get("space", "a"), 1)
+            self.assertEqual(cache.get("space", "c"), 3)
+            self.assertEqual(cache.stats()["evictions"], 1)
+
+
+class _Genie(GenieClient):
+    def __init__(self, space_id, cache):
+        super().__init__(space_id, workspace_instance="localhost", token="t", session=object(), cache=cache)
+        self.asked = 0
+
+    def _new_conversation(self, question, timeout_seconds, timings, stop_event):
+        self.asked += 1
+        return "conv", {"answer": "fresh"}
+
+
+class StaleFallbackTest(unittest.TestCase):
+    def setUp(self):
+        self.cache = ResultCache(MemoryBackend(), ttl=60)
+        self.cache.set(self.id(), "total revenue", encode_result({"answer": "old"}))
+        self.cache.backend._entries[f"{self.id()}::total revenue"]["stored_at"] -= 120
+        self.genie = _Genie(self.id(), self.cache)
+
+    def test_expired_entry_is_not_served_while_the_circuit_is_closed(self):
+        self.assertEqual(self.genie.query("total revenue"), {"answer": "fresh"})
+        self.assertEqual(self.genie.asked, 1)
+        self.assertEqual(self.cache.stats()["stale_hits"], 0)
+
+    def test_expired_entry_is_served_while_the_circuit_is_open(self):
+        breaker = get_breaker(self.id())
+        while breaker.state != "open":
+            breaker.record(failed=True)
+        self.assertEqual(self.genie.query("total revenue"), {"answer": "old"})
+        self.assertEqual(self.genie.asked, 0)
+        self.assertEqual(self.cache.stats()["stale_hits"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""Routing paths: cached decisions, the keyword pre-router and the LLM fallback."""
+import json
+import unittest
+from collections import deque
+from types import SimpleNamespace
+from unittest import mock
+
+from agents import router
+from agents.result_cache import MemoryBackend, ResultCache
+from agents.spaces import load_spaces
+
+SPACES = load_spaces([
+    {"name": "sales", "space_id": "s1", "keywords": ["revenue", "orders"]},
+    {"name": "customer", "space_id": "s2", "keywords": ["churn", "segment"]},
+])
+
+
+class _LLM:
+    """Stands in for the OpenAI client; answers every routing call with `routing`."""
+
+    def __init__(self, routing):
+        self.routing = routing
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.calls += 1
+        message = SimpleNamespace(content=json.dumps(self.routing))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+class RouteTest(unittest.TestCase):
+    def setUp(self):
+        for patcher in (mock.patch.object(router, "SPACES", SPACES),
+                        mock.patch.object(router, "LOCAL_ROUTER_ENABLED", True),
+                        mock.patch.object(router, "_cache", ResultCache(MemoryBackend(), ttl=60)),
+                        mock.patch.object(router, "_history", deque(maxlen=10))):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.llm = _LLM({"agents": ["sales", "customer"],
+                         "subqueries": {"sales": "revenue by region", "customer": "churn by region"}})
+
+    def test_single_domain_question_is_routed_by_keywords(self):
+        routing, path = router.route(self.llm, "Total revenue last quarter?")
+        self.assertEqual(path, "keywords")
+        self.assertEqual(routing, {"agents": ["sales"], "subqueries": {"sales": "Total revenue last quarter?"}})
+        self.assertEqual(self.llm.calls, 0)
+
+    def test_ambiguous_question_falls_through_to_the_llm(self):
+        started = []
+        for question in ("Regions with high revenue and high churn", "How are we doing?"):
+            routing, path = router.route(self.llm, question, before_llm=lambda: started.append(True))
+            self.assertEqual(path, "llm")
+            self.assertEqual(routing["agents"], ["sales", "customer"])
+        self.assertEqual(self.llm.calls, 2)
+        self.assertEqual(len(started), 2)
+
+    def test_repeated_llm_question_is_answered_from_the_cache(self):
+        router.route(self.llm, "Regions with high revenue and high churn")
+        routing, path = router.route(self.llm, "regions with high revenue and high churn!")
+        self.assertEqual(path, "cache")
+        self.assertEqual(routing["agents"], ["sales", "customer"])
+        self.assertEqual(self.llm.calls, 1)
+
+    def test_keyword_decisions_are_not_cached(self):
+        router.route(self.llm, "Total revenue last quarter?")
+        self.assertEqual(router.route(self.llm, "Total revenue last quarter?")[1], "keywords")
+
+    def test_keywords_disabled_sends_everything_to_the_llm(self):
+        with mock.patch.object(router, "LOCAL_ROUTER_ENABLED", False):
+            self.assertEqual(router.route(self.llm, "Total revenue last quarter?")[1], "llm")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+"""Coalescing of identical in-flight calls, including leader cancellation."""
+import threading
+import time
+import unittest
+from concurrent.futures import CancelledError
+
+from agents.singleflight import SingleFlight
+
+
+class SingleFlightTest(unittest.TestCase):
+    def setUp(self):
+        self.flight = SingleFlight()
+        self.outcomes = {}
+
+    def call(self, name, fn, stop=None):
+        def run():
+            try:
+                self.outcomes[name] = self.flight.do("key", fn, stop_event=stop)
+            except BaseException as e:
+                self.outcomes[name] = e
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        return thread
+
+    def wait_for_waiters(self, n):
+        while self.flight._calls.get("key") is None or self.flight._calls["key"].waiters < n:
+            time.sleep(0.01)
+
+    def test_cancelled_leader_hands_over_to_live_waiter(self):
+        leader_stop, waiter_stop = threading.Event(), threading.Event()
+
+        def cancelled():
+            leader_stop.wait(5)
+            raise CancelledError("Polling cancelled")
+
+        leader = self.call("leader", cancelled, leader_stop)
+        self.wait_for_waiters(0)
+        waiter = self.call("waiter", lambda: "answer", waiter_stop)
+        self.wait_for_waiters(1)
+        leader_stop.set()
+        leader.join(5)
+        waiter.join(5)
+
+        self.assertIsInstance(self.outcomes["leader"], CancelledError)
+        self.assertEqual(self.outcomes["waiter"], "answer")
+        stats = self.flight.stats()
+        self.assertEqual((stats["executed"], stats["coalesced"], stats["takeovers"]), (1, 1, 1))
+
+    def test_stopped_waiter_leaves_leader_running(self):
+        release, waiter_stop = threading.Event(), threading.Event()
+
+        def slow():
+            release.wait(5)
+            return "answer"
+
+        leader = self.call("leader", slow)
+        self.wait_for_waiters(0)
+        waiter = self.call("waiter", lambda: "unused", waiter_stop)
+        self.wait_for_waiters(1)
+        waiter_stop.set()
+        waiter.join(5)
+        self.assertIsInstance(self.outcomes["waiter"], CancelledError)
+
+        release.set()
+        leader.join(5)
+        self.assertEqual(self.outcomes["leader"], "answer")
+        self.assertEqual(self.flight.in_flight(), 0)
+
+    def test_leader_error_is_passed_to_waiters(self):
+        release = threading.Event()
+
+        def failing():
+            release.wait(5)
+            raise RuntimeError("Message status: FAILED")
+
+        leader = self.call("leader", failing)
+        self.wait_for_waiters(0)
+        waiters = [self.call(f"waiter{i}", lambda: "unused") for i in range(2)]
+        self.wait_for_waiters(2)
+        release.set()
+        for thread in [leader] + waiters:
+            thread.join(5)
+
+        for name in ("leader", "waiter0", "waiter1"):
+            self.assertIsInstance(self.outcomes[name], RuntimeError)
+            self.assertEqual(str(self.outcomes[name]), "Message status: FAILED")
+        self.assertEqual(self.flight.stats()["takeovers"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+"""Speculative dispatch: which calls are kept, which are stopped, and how they are counted."""
+import threading
+import unittest
+from concurrent.futures import Future
+from unittest import mock
+
+from agents import base_agent, coordinator
+
+
+class _Space:
+    def __init__(self, space_id):
+        self.space_id = space_id
+
+
+class SpeculationTest(unittest.TestCase):
+    def setUp(self):
+        self.calls = {}
+
+        def dispatch(agent, question, session_id=None, held=None):
+            future, stop = Future(), threading.Event()
+            self.calls[agent] = {"future": future, "stop": stop, "held": held, "question": question}
+            return future, coordinator._Deadline(10), stop
+
+        self.stats = dict.fromkeys(coordinator._spec_stats, 0)
+        agents = {"sales": _Space("spec-sales"), "customer": _Space("spec-customer"), "product": _Space("spec-p")}
+        for patcher in (mock.patch.object(coordinator, "_dispatch", dispatch),
+                        mock.patch.object(coordinator, "likely_agents", lambda: ["sales", "customer"]),
+                        mock.patch.object(coordinator, "GENIE_AGENTS", agents),
+                        mock.patch.object(coordinator, "_spec_stats", self.stats)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        base_agent.conversations.drop("spec-session")
+
+    def speculate(self, session_id=None):
+        speculation = coordinator._Speculation("Revenue by region?", session_id)
+        speculation.start()
+        return speculation
+
+    def test_call_routed_the_raw_question_is_kept(self):
+        kept = self.speculate().resolve({"sales": "revenue by region"})
+        self.assertEqual(list(kept), ["sales"])
+        self.assertFalse(self.calls["sales"]["stop"].is_set())
+        # Predicted but not routed: stopped
+        self.assertTrue(self.calls["customer"]["stop"].is_set())
+        self.assertTrue(self.calls["customer"]["future"].cancelled())
+        self.assertEqual((self.stats["questions"], self.stats["dispatched"], self.stats["kept"],
+                          self.stats["discarded"], self.stats["rewritten"], self.stats["not_predicted"]),
+                         (1, 2, 1, 1, 0, 0))
+
+    def test_call_routed_a_split_subquery_is_redispatched(self):
+        kept = self.speculate().resolve({"sales": "total revenue per region", "customer": "Revenue by region"})
+        self.assertEqual(list(kept), ["customer"])
+        self.assertTrue(self.calls["sales"]["stop"].is_set())
+        self.assertEqual((self.stats["kept"], self.stats["discarded"], self.stats["rewritten"]), (1, 1, 1))
+
+    def test_routed_agent_that_was_not_predicted_is_counted(self):
+        kept = self.speculate().resolve({"product": "Revenue by region?"})
+        self.assertEqual(kept, {})
+        self.assertEqual((self.stats["discarded"], self.stats["not_predicted"]), (2, 1))
+
+    def test_nothing_speculated_leaves_the_stats_alone(self):
+        speculation = coordinator._Speculation("Revenue by region?")
+        self.assertEqual(speculation.resolve({"sales": "Revenue by region?"}), {})
+        self.assertEqual(self.calls, {})
+        self.assertEqual(set(self.stats.values()), {0})
+
+    def test_only_kept_calls_register_their_conversation(self):
+        speculation = self.speculate("spec-session")
+        speculation.resolve({"sales": "Revenue by region?"})
+        for agent, space_id in (("sales", "spec-sales"), ("customer", "spec-customer")):
+            self.calls[agent]["held"][space_id] = f"conv-{agent}"
+        self.assertIsNone(base_agent.conversations.get("spec-session", "spec-sales"))
+        self.calls["sales"]["future"].set_result({"answer": 1})
+        self.assertEqual(base_agent.conversations.get("spec-session", "spec-sales"), "conv-sales")
+        self.assertIsNone(base_agent.conversations.get("spec-session", "spec-customer"))
+
+
+if __name__ == "__main__":
+    unittest.main()
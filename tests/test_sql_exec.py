@@ -0,0 +1,94 @@
+"""Arrow results are typed like the JSON path (decimals as floats, dates as ISO strings), and
+statements that end in an error are cancelled on the warehouse."""
+import datetime
+import decimal
+import json
+import unittest
+
+import requests
+
+from agents.query_result import ColumnarResult
+from agents.sql_exec import StatementExecutor, _append_batches, _arrow_type_name, _pyarrow
+
+pa = _pyarrow()
+
+
+@unittest.skipIf(pa is None, "pyarrow is not installed")
+class ArrowResultTest(unittest.TestCase):
+    def _result(self, batch):
+        result = ColumnarResult(batch.schema.names, [_arrow_type_name(f.type) for f in batch.schema])
+        _append_batches(result, [batch])
+        return result
+
+    def test_decimal_column_becomes_float(self):
+        batch = pa.RecordBatch.from_arrays(
+            [pa.array([decimal.Decimal("12.50"), None], type=pa.decimal128(10, 2))], names=["revenue"])
+        result = self._result(batch)
+        self.assertEqual(result.types, ["DOUBLE"])
+        self.assertEqual(result.data, [[12.5, None]])
+        self.assertIsInstance(result.data[0][0], float)
+        json.dumps(result.data)
+
+    def test_temporal_columns_become_iso_strings(self):
+        batch = pa.RecordBatch.from_arrays(
+            [pa.array([datetime.date(2023, 1, 31)], type=pa.date32()),
+             pa.array([datetime.datetime(2023, 1, 31, 9, 30)], type=pa.timestamp("us"))],
+            names=["day", "at"])
+        result = self._result(batch)
+        self.assertEqual(result.types, ["STRING", "STRING"])
+        self.assertEqual(result.data, [["2023-01-31"], ["2023-01-31T09:30:00"]])
+        json.dumps(result.data)
+
+
+class _Session:
+    """Answers Statement Execution calls from `replies` ((method, url suffix) -> (status, payload))."""
+
+    def __init__(self, replies):
+        self.replies = replies
+        self.sent = []
+
+    def request(self, method, url, **kwargs):
+        suffix = url.split("/api/2.0/sql/statements", 1)[1]
+        self.sent.append((method, suffix))
+        status, payload = self.replies[(method, suffix)]
+        resp = requests.Response()
+        resp.status_code = status
+        resp._content = json.dumps(payload).encode()
+        return resp
+
+
+class StatementCancelTest(unittest.TestCase):
+    def execute(self, poll_reply):
+        session = _Session({
+            ("POST", ""): (200, {"statement_id": "st1", "status": {"state": "PENDING"}}),
+            ("GET", "/st1"): poll_reply,
+            ("POST", "/st1/cancel"): (200, {}),
+        })
+        executor = StatementExecutor("wh", workspace_instance="https://host", token="t", session=session,
+                                     governor_key=f"sql-test:{self.id()}")
+        return session, executor
+
+    def test_error_while_polling_cancels_the_statement(self):
+        session, executor = self.execute((500, {"message": "internal error"}))
+        with self.assertRaises(requests.HTTPError):
+            executor.execute("SELECT 1")
+        self.assertEqual(session.sent[-1], ("POST", "/st1/cancel"))
+
+    def test_finished_statement_is_not_cancelled(self):
+        session, executor = self.execute((200, {
+            "statement_id": "st1", "status": {"state": "SUCCEEDED"},
+            "manifest": {"schema": {"columns": [{"name": "n", "type_name": "LONG"}]}},
+            "result": {"data_array": [["1"]]}}))
+        self.assertEqual(executor.execute("SELECT 1").data, [[1]])
+        self.assertNotIn(("POST", "/st1/cancel"), session.sent)
+
+    def test_failed_statement_is_not_cancelled(self):
+        session, executor = self.execute((200, {"statement_id": "st1",
+                                                "status": {"state": "FAILED", "error": {"message": "bad"}}}))
+        with self.assertRaisesRegex(RuntimeError, "Statement FAILED: bad"):
+            executor.execute("SELECT 1")
+        self.assertNotIn(("POST", "/st1/cancel"), session.sent)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+"""Template fast path: which results skip the consolidation LLM, and how they are rendered."""
+import unittest
+from unittest import mock
+
+from agents import templates
+from agents.query_result import ColumnarResult
+
+
+def _table(rows, columns=2, **kwargs):
+    names = [f"col_{i}" for i in range(columns)]
+    data = [[r * 1000 + c for r in range(rows)] for c in range(columns)]
+    return ColumnarResult(names, ["LONG"] * columns, data, **kwargs)
+
+
+class ChooseSummaryTest(unittest.TestCase):
+    def setUp(self):
+        for name, value in (("TEMPLATE_FAST_PATH", True), ("TEMPLATE_MAX_ROWS", 5), ("TEMPLATE_MAX_COLUMNS", 3)):
+            patcher = mock.patch.object(templates, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def choose(self, *results):
+        return templates.choose_summary({f"agent{i}": r for i, r in enumerate(results)})
+
+    def test_simple_single_source_results_use_the_template(self):
+        self.assertEqual(self.choose(_table(0)), ("template", "empty"))
+        self.assertEqual(self.choose(_table(1, columns=1)), ("template", "scalar"))
+        self.assertEqual(self.choose(_table(1, columns=3)), ("template", "single_row"))
+        self.assertEqual(self.choose(_table(5, columns=3)), ("template", "small_table"))
+        self.assertEqual(self.choose({"message": {"content": "No data for 2019."}}), ("template", "text"))
+
+    def test_large_or_combined_results_go_to_the_llm(self):
+        self.assertEqual(self.choose(_table(6)), ("llm", "too_many_rows"))
+        self.assertEqual(self.choose(_table(3, total_row_count=500)), ("llm", "too_many_rows"))
+        self.assertEqual(self.choose(_table(3, truncated=True)), ("llm", "too_many_rows"))
+        self.assertEqual(self.choose(_table(3, columns=4)), ("llm", "too_many_columns"))
+        self.assertEqual(self.choose(_table(1), _table(1)), ("llm", "multiple_sources"))
+        self.assertEqual(self.choose({"attachments": []}), ("llm", "unstructured"))
+
+    def test_failed_sources_do_not_count_as_sources(self):
+        failed = {"status": "timeout", "error": "customer Genie did not answer within 60s"}
+        self.assertEqual(self.choose(_table(1, columns=1), failed), ("template", "scalar"))
+
+    def test_disabled_fast_path(self):
+        with mock.patch.object(templates, "TEMPLATE_FAST_PATH", False):
+            self.assertEqual(self.choose(_table(1, columns=1)), ("llm", "disabled"))
+
+
+class RenderAnswerTest(unittest.TestCase):
+    def test_empty_result_says_no_rows_matched(self):
+        self.assertEqual(templates.render_answer({"sales": _table(0)}), "**Sales**\n\nNo rows matched the question.")
+
+    def test_scalar_and_failed_source(self):
+        scalar = ColumnarResult(["total_revenue"], ["DOUBLE"], [[1234567.891]])
+        answer = templates.render_answer({"sales": scalar, "customer": {"status": "error", "error": "boom"}})
+        self.assertEqual(answer, "**Sales**\n\n**Total revenue:** 1,234,567.89\n\n_Customer data is unavailable: boom._")
+
+
+if __name__ == "__main__":
+    unittest.main()
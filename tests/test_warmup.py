@@ -0,0 +1,55 @@
+"""Cron schedule matching and the warm-up store file."""
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from unittest import mock
+
+from agents import warmup
+from agents.warmup import CronSchedule, _parse_field
+
+
+class CronScheduleTest(unittest.TestCase):
+    def test_restricted_day_and_weekday_match_either(self):
+        schedule = CronSchedule("0 6 1 * 1")
+        self.assertEqual(schedule.next_after(datetime(2026, 10, 16)), datetime(2026, 10, 19, 6))  # a Monday
+        self.assertEqual(schedule.next_after(datetime(2026, 10, 27)), datetime(2026, 11, 1, 6))  # the 1st
+
+    def test_unrestricted_day_field_leaves_weekday_alone(self):
+        schedule = CronSchedule("0 6 * * 1")
+        self.assertEqual(schedule.next_after(datetime(2026, 10, 27)), datetime(2026, 11, 2, 6))
+        schedule = CronSchedule("0 6 */2 * *")
+        self.assertFalse(schedule.matches(datetime(2026, 10, 2, 6)))
+        self.assertTrue(schedule.matches(datetime(2026, 10, 3, 6)))
+
+    def test_step_without_range_runs_to_the_maximum(self):
+        self.assertEqual(_parse_field("5/15", 0, 59), {5, 20, 35, 50})
+        self.assertEqual(_parse_field("5", 0, 59), {5})
+        self.assertEqual(_parse_field("10-30/10", 0, 59), {10, 20, 30})
+
+
+class WarmStoreFileTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.path = os.path.join(self.dir.name, "warm.sqlite")
+        for patcher in (mock.patch.object(warmup, "WARMUP_STORE_PATH", self.path),
+                        mock.patch.object(warmup, "_store", None),
+                        mock.patch.object(warmup, "_store_on_disk", False)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_readers_do_not_create_the_file(self):
+        self.assertIsNone(warmup.get_warm_store().get("total revenue"))
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_readers_open_the_file_once_the_warm_up_job_creates_it(self):
+        reader = warmup.get_warm_store()
+        warmup.get_warm_store(create=True).put("total revenue", "42")
+        self.assertTrue(os.path.exists(self.path))
+        self.assertIsNot(warmup.get_warm_store(), reader)
+        self.assertEqual(warmup.get_warm_store().get("total revenue")["answer"], "42")
+
+
+if __name__ == "__main__":
+    unittest.main()
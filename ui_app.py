@@ -1,8 +1,75 @@
+import queue
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
 import streamlit as st
-from agents.coordinator import coordinator
+from agents.base_agent import conversations, is_failed
+from agents.coordinator import coordinator_stream
+from agents.local_store import get_local_store
+from agents.result_cache import MemoryBackend, ResultCache
+from agents.tracing import format_breakdown
+from config import UI_MAX_CONCURRENT_QUESTIONS, UI_ANSWER_CACHE_TTL
 
 st.set_page_config(page_title="Multi-Agent System using Databricks Genie", page_icon="🤖", layout="centered")
 
+
+# --- SHARED RESOURCES ---
+# Streamlit re-runs this script on every interaction; everything below is built
+# once per server process and shared by every session and rerun.
+@st.cache_resource
+def get_engine():
+    """The question worker pool and the cross-session answer cache (Genie/OpenAI clients are pooled per process)."""
+    return {
+        "pool": ThreadPoolExecutor(max_workers=UI_MAX_CONCURRENT_QUESTIONS, thread_name_prefix="ui-question"),
+        "answers": ResultCache(MemoryBackend(), ttl=UI_ANSWER_CACHE_TTL) if UI_ANSWER_CACHE_TTL else None,
+    }
+
+
+def _is_complete(done: dict) -> bool:
+    results = done.get("results") or {}
+    return bool(results) and not any(is_failed(r) for r in results.values())
+
+
+def _run_question(events: queue.Queue, prompt: str, session_id: str, answers):
+    """Worker: run the coordinator and hand its events to the script thread."""
+    agents = []
+    try:
+        for event in coordinator_stream(prompt, session_id=session_id):
+            if event["type"] == "routing":
+                agents = event["agents"]
+            elif event["type"] == "done" and answers is not None and _is_complete(event) \
+                    and "precomputed" not in event and "local" not in event:
+                # Cached here rather than in the script, so it lands even if the user navigates away
+                answers.set("ui", prompt, {"answer": event["answer"], "agents": agents})
+            events.put(event)
+    except Exception as e:
+        events.put({"type": "error", "error": str(e)})
+    finally:
+        events.put(None)
+
+
+def stream_answer(prompt: str, session_id: str):
+    """Yield coordinator events; the coordinator runs on the shared pool, not the script thread."""
+    engine = get_engine()
+    # A first question is independent of the session, so another analyst's answer can be reused;
+    # once the session has Genie conversations open or stored results, the question may be a follow-up
+    store = get_local_store()
+    follow_up = conversations.has_session(session_id) or (store is not None and store.has_session(session_id))
+    answers = engine["answers"] if not follow_up else None
+    cached = answers.get("ui", prompt) if answers is not None else None
+    if cached is not None:
+        yield {"type": "routing", "agents": cached["agents"], "path": "shared answer"}
+        yield {"type": "done", "answer": cached["answer"]}
+        return
+
+    events = queue.Queue()
+    engine["pool"].submit(_run_question, events, prompt, session_id, answers)
+    while (event := events.get()) is not None:
+        if event["type"] == "error":
+            raise RuntimeError(event["error"])
+        yield event
+
+
 st.title("🤖 Multi-Agent System using Databricks Genie")
 st.caption("Ask questions about Sales and Customers using Databricks Genies.")
 
@@ -12,27 +79,68 @@ if "messages" not in st.session_state:
         {"role": "assistant", "content": "Hello! How can I help you with your data today?"}
     ]
 
-# Display chat history
-for msg in st.session_state.messages:
-    with st.chat_message(msg["role"]):
-        st.markdown(msg["content"])
-
-# User input
-if prompt := st.chat_input("Enter your question here..."):
-    # Display user message
-    st.session_state.messages.append({"role": "user", "content": prompt})
-    with st.chat_message("user"):
-        st.markdown(prompt)
-
-    # Generate assistant response
-    with st.chat_message("assistant"):
-        with st.spinner("Processing..."):
+# One id per browser session, so follow-ups continue the same Genie conversations
+if "session_id" not in st.session_state:
+    st.session_state["session_id"] = uuid.uuid4().hex
+
+
+def render_messages(messages):
+    for msg in messages:
+        with st.chat_message(msg["role"]):
+            st.markdown(msg["content"])
+
+
+# Earlier turns are drawn on full reruns only; asking a question reruns just the
+# chat fragment below, which draws the turns added since then
+render_messages(st.session_state.messages)
+st.session_state["rendered"] = len(st.session_state.messages)
+
+
+@st.fragment
+def chat():
+    render_messages(st.session_state.messages[st.session_state["rendered"]:])
+
+    # User input
+    if prompt := st.chat_input("Enter your question here..."):
+        # Display user message
+        st.session_state.messages.append({"role": "user", "content": prompt})
+        with st.chat_message("user"):
+            st.markdown(prompt)
+
+        # Generate assistant response, rendering progress and summary tokens as they arrive
+        with st.chat_message("assistant"):
+            status = st.status("Routing question...", expanded=False)
+            placeholder = st.empty()
+            response = ""
+            trace = None
             try:
-                response = coordinator(prompt)
-                st.markdown(response)
+                for event in stream_answer(prompt, st.session_state["session_id"]):
+                    if event["type"] == "routing":
+                        agents = ", ".join(a.capitalize() for a in event["agents"]) or "no"
+                        status.update(label=f"Querying {agents} Genie...")
+                        status.write(f"🧭 Routed to {agents} Genie (via {event['path']})")
+                    elif event["type"] == "agent_done":
+                        icon = "✅" if event["status"] == "ok" else "⚠️"
+                        status.write(f"{icon} {event['agent'].capitalize()} Genie: {event['status']}")
+                        status.update(label="Summarizing results...")
+                    elif event["type"] == "token":
+                        response += event["content"]
+                        placeholder.markdown(response + "▌")
+                    elif event["type"] == "done":
+                        response = event["answer"]
+                        trace = event.get("trace")
+                status.update(label="Done", state="complete")
+                placeholder.markdown(response)
+                if trace:
+                    with st.expander(f"⏱️ Timing breakdown ({trace['duration']:.1f}s)"):
+                        st.code(format_breakdown(trace), language=None)
             except Exception as e:
                 response = f"❌ Error: {e}"
-                st.error(response)
+                status.update(label="Failed", state="error")
+                placeholder.error(response)
+
+        # Save assistant response to history
+        st.session_state.messages.append({"role": "assistant", "content": response})
+
 
-    # Save assistant response to history
-    st.session_state.messages.append({"role": "assistant", "content": response})
\ No newline at end of file
+chat()